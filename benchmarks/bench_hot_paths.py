@@ -0,0 +1,201 @@
+"""
+Micro-benchmarks of the CPU-side hot paths. Every benchmark reports the best rate over a few repeats, results can
+be saved as a baseline and later runs compared against it, failing when a benchmark got slower than the tolerance.
+
+    python benchmarks/bench_hot_paths.py --save benchmarks/baseline.json
+    python benchmarks/bench_hot_paths.py --compare benchmarks/baseline.json --tolerance 0.2
+    python benchmarks/bench_hot_paths.py --only signing wallet
+"""
+import argparse
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+from orjson import orjson
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.dto.filedgr_nft_type import FiledgrArtV0NftType, FiledgrArtV0NftTypeAttributeTraitEnum, \
+    FiledgrArtV0NftTypeCollection, FiledgrArtV0NftTypeTemplate
+from filedgr_xrpl_cli.dto.memo import MemoFormat, MyMemo
+from filedgr_xrpl_cli.my_xrpl.keystore import WalletKeystore
+from filedgr_xrpl_cli.my_xrpl.signing import sign_transaction_json
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from filedgr_xrpl_cli.nft_utils.id_gen import generate_nft_or_campaign_id
+from filedgr_xrpl_cli.nft_utils.metadata import MetadataGenerator
+from filedgr_xrpl_cli.nft_utils.metadata_codec import encode_metadata
+from filedgr_xrpl_cli.nft_utils.token_id import nft_token_ids
+
+ISSUER = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+DISTRIBUTOR = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+ISSUER_ADDRESS = ISSUER.get_wallet().classic_address
+
+
+def bench_trustline() -> Callable[[], object]:
+    return lambda: TransactionBuilder.build_trustline(issuer=ISSUER, distributor=DISTRIBUTOR, code="FILEDGR",
+                                                      nft=True)
+
+
+def bench_token_payment() -> Callable[[], object]:
+    return lambda: TransactionBuilder.build_transaction_token(issuer=ISSUER, distributor=DISTRIBUTOR, code="FILEDGR")
+
+
+def bench_memo_encoding() -> Callable[[], object]:
+    memos = [MyMemo(memo="x" * 512, memo_format=MemoFormat.JSON)]
+    return lambda: TransactionBuilder.build_transaction_token(issuer=ISSUER, distributor=DISTRIBUTOR, code="FILEDGR",
+                                                              memos=memos)
+
+
+def bench_id_gen() -> Callable[[], object]:
+    return generate_nft_or_campaign_id
+
+
+def bench_token_id() -> Callable[[], object]:
+    return lambda: nft_token_ids(issuer=ISSUER_ADDRESS, start_sequence=12)
+
+
+def bench_token_ids_bulk() -> Callable[[], object]:
+    # One call predicting 10k IDs, the rate is in calls
+    return lambda: nft_token_ids(issuer=ISSUER_ADDRESS, start_sequence=12, count=10000)
+
+
+def bench_metadata_model() -> Callable[[], object]:
+    def build() -> str:
+        nft_type = FiledgrArtV0NftType(
+            name="NFT",
+            description="Benchmark",
+            image="ipfs://image",
+            collection=FiledgrArtV0NftTypeCollection(name="Collection", family="Family")
+        )
+        nft_type.add_attribute(trait_type=FiledgrArtV0NftTypeAttributeTraitEnum.TX_RECEIVER,
+                               value="rReceiver", description="The receiver")
+        return nft_type.json(by_alias=True)
+    return build
+
+
+def bench_metadata_generator() -> Callable[[], object]:
+    generator = MetadataGenerator(FiledgrArtV0NftTypeTemplate.parse_obj({
+        "collection": {"name": "Collection", "family": "Family"},
+        "attributes": [{"trait_type": "transactionReceiver", "description": "The receiver"}]
+    }))
+    record = {"name": "NFT", "description": "Benchmark", "image": "ipfs://image", "transactionReceiver": "rReceiver"}
+    return lambda: generator.dumps(record)
+
+
+def bench_metadata_protobuf() -> Callable[[], object]:
+    generator = MetadataGenerator(FiledgrArtV0NftTypeTemplate.parse_obj({
+        "collection": {"name": "Collection", "family": "Family"},
+        "attributes": [{"trait_type": "transactionReceiver", "description": "The receiver"}]
+    }))
+    metadata = generator.build({"name": "NFT", "description": "Benchmark", "image": "ipfs://image",
+                                "transactionReceiver": "rReceiver"})
+    return lambda: encode_metadata(metadata)
+
+
+def bench_wallet_derivation() -> Callable[[], object]:
+    seed = ISSUER.get_wallet().seed
+    return lambda: XRPLWallet(seed=seed, sequence=0)
+
+
+def bench_wallet_keystore() -> Callable[[], object]:
+    keystore = WalletKeystore(f"{tempfile.mkdtemp()}/wallets.db")
+    keystore.put("issuer", ISSUER)
+    return lambda: keystore.get("issuer")
+
+
+def bench_signing() -> Callable[[], object]:
+    transaction_json = TransactionBuilder.build_nft_mint(issuer=ISSUER, uri="ipfs://bench").to_xrpl()
+    transaction_json.update({"Sequence": 1, "Fee": "12", "LastLedgerSequence": 1000})
+    public_key, private_key = ISSUER.get_wallet().public_key, ISSUER.get_wallet().private_key
+    return lambda: sign_transaction_json(dict(transaction_json), public_key, private_key)
+
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {
+    "trustline": bench_trustline,
+    "token_payment": bench_token_payment,
+    "memo_encoding": bench_memo_encoding,
+    "id_gen": bench_id_gen,
+    "token_id": bench_token_id,
+    "token_ids_bulk": bench_token_ids_bulk,
+    "metadata_model": bench_metadata_model,
+    "metadata_generator": bench_metadata_generator,
+    "metadata_protobuf": bench_metadata_protobuf,
+    "wallet_derivation": bench_wallet_derivation,
+    "wallet_keystore": bench_wallet_keystore,
+    "signing": bench_signing,
+}
+
+
+def measure(function: Callable[[], object], min_time: float, repeat: int) -> float:
+    """
+    :return: The best rate in calls per second over `repeat` rounds of at least `min_time` seconds
+    """
+    # Calibrate the number of calls per round
+    calls, elapsed = 1, 0.0
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4:
+            break
+        calls *= 4
+    calls = max(1, int(calls * min_time / elapsed))
+
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = max(best, calls / (time.perf_counter() - start))
+    return best
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> bool:
+    """
+    Prints the change of every benchmark against the baseline.
+    :return: False when a benchmark is slower than the baseline by more than `tolerance`
+    """
+    passed = True
+    print(f"{'benchmark':<20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, rate in results.items():
+        if name not in baseline:
+            print(f"{name:<20} {'-':>12} {rate:>12.0f} {'new':>8}")
+            continue
+        change = rate / baseline[name] - 1
+        regressed = change < -tolerance
+        passed = passed and not regressed
+        print(f"{name:<20} {baseline[name]:>12.0f} {rate:>12.0f} {change:>+7.1%}{' REGRESSION' if regressed else ''}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per measurement round")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Write the results to this baseline file")
+    parser.add_argument("--compare", help="Compare the results against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = measure(BENCHMARKS[name](), min_time=args.min_time, repeat=args.repeat)
+        print(f"{name:<20} {results[name]:>12.0f} calls/s")
+
+    if args.save:
+        with open(args.save, "wb") as file:
+            file.write(orjson.dumps({"python": platform.python_version(), "machine": platform.machine(),
+                                     "results": results}, option=orjson.OPT_INDENT_2))
+    if args.compare:
+        with open(args.compare, "rb") as file:
+            baseline = orjson.loads(file.read())["results"]
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
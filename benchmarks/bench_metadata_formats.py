@@ -0,0 +1,80 @@
+"""
+Compares the JSON and protobuf encodings of NFT metadata: the bytes per NFT, the encode and decode rates and the
+fees of anchoring the metadata of a drop in token payment memos.
+
+    python benchmarks/bench_metadata_formats.py
+    python benchmarks/bench_metadata_formats.py --count 10000 --fee 12
+
+XRPL fees do not grow with the size of a transaction, the metadata costs the base fee of every payment needed to
+carry it: one payment per NFT as long as its memo fits, or the chunks of the whole drop sent by `payment send-file`.
+"""
+import argparse
+import math
+from typing import Callable, Dict, List
+
+from orjson import orjson
+
+from bench_hot_paths import measure
+from filedgr_xrpl_cli.dto.filedgr_nft_type import FiledgrArtV0NftTypeTemplate
+from filedgr_xrpl_cli.my_xrpl.memo_chunks import DEFAULT_MEMO_CHUNK_SIZE, MAX_MEMO_CHUNK_SIZE
+from filedgr_xrpl_cli.nft_utils.metadata import MetadataGenerator
+from filedgr_xrpl_cli.nft_utils.metadata_codec import decode_metadata, delimit, encode_metadata
+
+TEMPLATE = {
+    "collection": {"name": "Filedgr Carbonauten FuckCO2 Hoodies", "family": "Version 0.0.1-BETA"},
+    "attributes": [
+        {"trait_type": "smartNftUri", "value": "https://github.com/XRPLF/XRPL-Standards/discussions/69",
+         "description": "The URL to the smart NFT"},
+        {"trait_type": "transactionToken", "column": "token",
+         "description": "The token on XRPL updating data of the NFT"},
+        {"trait_type": "transactionReceiver", "column": "receiver",
+         "description": "The wallet receiving the transactions updating the NFT."},
+    ]
+}
+
+FORMATS: Dict[str, Dict[str, Callable]] = {
+    "json": {"encode": orjson.dumps, "decode": orjson.loads,
+             "frame": lambda message: message + b"\n"},
+    "protobuf": {"encode": encode_metadata, "decode": decode_metadata, "frame": delimit},
+}
+
+
+def build_drop(count: int) -> List[dict]:
+    generator = MetadataGenerator(FiledgrArtV0NftTypeTemplate.parse_obj(TEMPLATE))
+    return [generator.build({"name": f"Hoodie #{i}",
+                             "description": f"The hoodie number {i} of the drop",
+                             "image": f"ipfs://QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbd{i}",
+                             "token": f"HOODIE{i}",
+                             "receiver": "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"}) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1000, help="The number of NFTs in the drop")
+    parser.add_argument("--fee", type=int, default=10, help="The base fee of a payment in drops")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_MEMO_CHUNK_SIZE,
+                        help="The payload bytes per payment of send-file")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per measurement round")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    drop = build_drop(args.count)
+    print(f"{'format':<10} {'bytes/NFT':>10} {'encode/s':>10} {'decode/s':>10} {'memo fits':>10} "
+          f"{'drop bytes':>11} {'payments':>9} {'drops':>8}")
+    for name, codec in FORMATS.items():
+        encode, decode, frame = codec["encode"], codec["decode"], codec["frame"]
+        messages = [encode(metadata) for metadata in drop]
+        drop_bytes = sum(len(frame(message)) for message in messages)
+        # One payment per NFT when every memo fits, the drop chunked into memos otherwise
+        fits = max(len(message) for message in messages) <= MAX_MEMO_CHUNK_SIZE
+        payments = math.ceil(drop_bytes / args.chunk_size)
+
+        encode_rate = measure(lambda: [encode(metadata) for metadata in drop], args.min_time, args.repeat)
+        decode_rate = measure(lambda: [decode(message) for message in messages], args.min_time, args.repeat)
+        print(f"{name:<10} {drop_bytes / args.count:>10.1f} {encode_rate * args.count:>10.0f} "
+              f"{decode_rate * args.count:>10.0f} {'yes' if fits else 'no':>10} {drop_bytes:>11} {payments:>9} "
+              f"{payments * args.fee:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures how transaction signing throughput scales with the number of ParallelSigner processes.
+
+    python benchmarks/bench_signing.py --count 5000 --processes 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.signing import ParallelSigner
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+
+
+def build_transactions(wallet: XRPLWallet, count: int) -> list:
+    transactions = []
+    for i in range(count):
+        transaction_json = TransactionBuilder.build_nft_mint(issuer=wallet, uri=f"ipfs://bench/{i}").to_xrpl()
+        transaction_json.update({"Sequence": i + 1, "Fee": "12", "LastLedgerSequence": 1000})
+        transactions.append(transaction_json)
+    return transactions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--algorithm", choices=["ed25519", "secp256k1"], default="secp256k1")
+    args = parser.parse_args()
+
+    from xrpl import CryptoAlgorithm
+    seed = Wallet.create(crypto_algorithm=CryptoAlgorithm(args.algorithm)).seed
+    wallet = XRPLWallet(seed=seed, sequence=0)
+    transactions = build_transactions(wallet, args.count)
+
+    baseline = None
+    print(f"{'processes':>9} {'tx/s':>10} {'speed-up':>9}")
+    for processes in args.processes:
+        with ParallelSigner([wallet], processes=processes, chunksize=64) as signer:
+            # Warm the workers up so process start-up is not measured
+            signer.sign([dict(transaction) for transaction in transactions[:processes * 64]])
+            start = time.perf_counter()
+            signer.sign([dict(transaction) for transaction in transactions])
+            elapsed = time.perf_counter() - start
+        rate = args.count / elapsed
+        baseline = baseline or rate
+        print(f"{processes:>9} {rate:>10.0f} {rate / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
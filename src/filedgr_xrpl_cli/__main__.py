@@ -1,22 +1,86 @@
 import sys
-import orjson
+from typing import Optional
+
 import typer
 
+from filedgr_xrpl_cli.cli_commands.network import network_app
 from filedgr_xrpl_cli.cli_commands.nfts import nft_app
+from filedgr_xrpl_cli.cli_commands.options import network_option, path_option
 from filedgr_xrpl_cli.cli_commands.payment import payment_app
 from filedgr_xrpl_cli.cli_commands.wallets import wallet_app
-from filedgr_xrpl_cli.dto.network import all_networks
+from filedgr_xrpl_cli.my_xrpl.journal import DEFAULT_JOURNAL_PATH, JOURNAL_ENV, JOURNAL_NAME, use_journal
 from filedgr_xrpl_cli.nft_utils.id_gen import generate_nft_or_campaign_id
+from filedgr_xrpl_cli.server.client import DAEMON_ENV, use_daemon
 from filedgr_xrpl_cli.settings import default_path
 
 app = typer.Typer()
 app.add_typer(typer_instance=wallet_app, name="wallet")
 app.add_typer(typer_instance=payment_app, name="payment")
 app.add_typer(typer_instance=nft_app, name="nft")
+app.add_typer(typer_instance=network_app, name="network")
+
+
+@app.callback()
+def main(ctx: typer.Context,
+         daemon: Optional[str] = typer.Option(None, envvar=DAEMON_ENV,
+                                              help="Forward the commands to an `xrpl serve` daemon at this Unix "
+                                                   "socket path or http://host:port"),
+         profile: bool = typer.Option(False, help="Print the time spent per phase to stderr when done"),
+         cprofile: Optional[str] = typer.Option(None, help="Write a cProfile dump of the command to this file"),
+         metrics_log: Optional[str] = typer.Option(None, help="Append one JSON line per timed phase to this file"),
+         metrics_prom: Optional[str] = typer.Option(None, help="Write the phase timings in the Prometheus text "
+                                                               "format to this file when done"),
+         journal: Optional[str] = typer.Option(None, envvar=JOURNAL_ENV,
+                                               help="Record every submission in this journal for `xrpl resume`, "
+                                                    f"default {JOURNAL_NAME} in the command's --path, an empty value "
+                                                    "disables it")):
+    use_daemon(daemon)
+    if journal is None:
+        use_journal(DEFAULT_JOURNAL_PATH, default=True)
+    else:
+        use_journal(journal or None)
+    if profile or cprofile or metrics_log or metrics_prom:
+        _instrument(ctx, profile, cprofile, metrics_log, metrics_prom)
+
+
+def _instrument(ctx: typer.Context,
+                profile: bool,
+                cprofile: Optional[str],
+                metrics_log: Optional[str],
+                metrics_prom: Optional[str]) -> None:
+    from .metrics import metrics
+
+    profiler = None
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    log = None
+    if metrics_log:
+        log = open(metrics_log, "a")
+        metrics.set_sink(log)
+
+    def finish():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile)
+        if log is not None:
+            metrics.set_sink(None)
+            log.close()
+        if metrics_prom:
+            from .my_io.file_io import MyFileIO
+            MyFileIO.write_to_file(metrics_prom, metrics.to_prometheus())
+        if profile:
+            typer.echo(metrics.format_breakdown(), err=True)
+
+    ctx.call_on_close(finish)
 
 
 @app.command("init")
 def init(path: str = default_path):
+    import orjson
+
+    from .dto.network import all_networks
     from .my_io.file_io import MyFileIO
 
     # Creating the directory if it does not exist
@@ -37,5 +101,69 @@ def generate_id():
     typer.echo(f"The NFT ID: {nft_result}; The campaign ID: {campaign_result}")
 
 
+@app.command("resume")
+def resume(network: str = network_option(),
+           poll_interval: float = typer.Option(1.0, help="Seconds between the lookups of the pending transactions"),
+           path: str = path_option()):
+    """
+    Settles the transactions an interrupted run left signed or submitted, submitting the ones which can still
+    validate again. Expired transactions were never applied and can safely be run again.
+    """
+    import dataclasses
+
+    from orjson import orjson
+
+    from .my_xrpl.connection import XRPLConnection
+    from .my_xrpl.journal import get_journal
+
+    journal = get_journal()
+    if journal is None:
+        typer.echo("The submission journal is disabled", err=True)
+        raise typer.Exit(1)
+    for entry in journal.resume(XRPLConnection.for_network(network, path), network,
+                                poll_interval=poll_interval):
+        record = {field: value for field, value in dataclasses.asdict(entry).items() if field != "blob"}
+        sys.stdout.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE).decode("utf-8"))
+
+
+@app.command("serve")
+def serve(socket: str = typer.Option(f"{default_path}/daemon.sock",
+                                     help="The Unix socket to listen on, the token is written to <socket>.token"),
+          port: Optional[int] = typer.Option(None, help="Listen on this TCP port instead of the Unix socket"),
+          host: str = "127.0.0.1",
+          allow_remote: bool = typer.Option(False, help="Allow a --host other than loopback, anyone reaching it "
+                                                        "with the token can sign with the keystore wallets"),
+          tickets: bool = typer.Option(False, help="Send the transactions of each account on Tickets so "
+                                                   "concurrent requests are submitted in parallel"),
+          path: str = path_option()):
+    """
+    Runs the wallet, payment and NFT operations as a daemon keeping wallets and connections warm.
+    """
+    import os
+
+    from .my_xrpl.connection import XRPLConnection
+    from .server.client import token_path_for
+    from .server.daemon import XRPLDaemon, create_server
+
+    try:
+        server = create_server(XRPLDaemon(path, tickets=tickets), socket_path=socket, host=host, port=port,
+                               allow_remote=allow_remote)
+    except ValueError as ex:
+        raise typer.BadParameter(str(ex), param_hint="--host")
+    typer.echo(f"Serving on {f'http://{host}:{server.server_address[1]}' if port is not None else socket}, "
+               f"token in {token_path_for(socket)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if port is None and os.path.exists(socket):
+            os.remove(socket)
+        if os.path.exists(token_path_for(socket)):
+            os.remove(token_path_for(socket))
+        XRPLConnection.close_all()
+
+
 if __name__ == '__main__':
     sys.exit(app())
@@ -0,0 +1,43 @@
+from typing import List, Optional
+
+import typer
+
+from filedgr_xrpl_cli.cli_commands.options import networks_argument, path_option
+from filedgr_xrpl_cli.settings import default_path
+
+network_app = typer.Typer()
+
+
+@network_app.command("list")
+def list_networks(path: str = default_path) -> None:
+    """
+    Lists the networks of the `networks` file with their endpoints.
+    """
+    from filedgr_xrpl_cli.dto.network import load_networks
+
+    for name, network in load_networks(path).items():
+        typer.echo(f"{name}\t{' '.join(network.json_rpc_urls())}\t{' '.join(network.ws_urls())}")
+
+
+@network_app.command()
+def probe(networks: Optional[List[str]] = networks_argument(),
+          ws: bool = typer.Option(True, help="Probe the WebSocket endpoints as well"),
+          save: bool = typer.Option(True, help="Make the next commands start on the fastest healthy endpoint"),
+          path: str = path_option()) -> None:
+    """
+    Measures the latency and ledger freshness of every endpoint of the networks.
+    """
+    from filedgr_xrpl_cli.dto.network import load_networks
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection, save_probe_results
+
+    typer.echo(f"{'network':<12} {'endpoint':<48} {'latency ms':>10} {'state':<12} {'ledger':>10} {'lag':>4}  healthy")
+    for network in networks or list(load_networks(path)):
+        conn = XRPLConnection.for_network(network, path)
+        probes = sorted(conn.probe(ws=ws), key=lambda result: (not result.healthy, result.latency or float("inf")))
+        for result in probes:
+            latency = f"{result.latency * 1000:.1f}" if result.latency is not None else "-"
+            typer.echo(f"{network:<12} {result.url:<48} {latency:>10} {result.server_state or '-':<12} "
+                       f"{result.validated_ledger or '-':>10} {'-' if result.ledger_lag is None else result.ledger_lag:>4}"
+                       f"  {'yes' if result.healthy else 'no: ' + (result.error or 'out of sync')}")
+        if save:
+            save_probe_results(network, probes, path)
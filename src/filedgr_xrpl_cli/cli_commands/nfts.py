@@ -1,19 +1,13 @@
-import wsgiref.validate
-from typing import Optional
+import sys
+from typing import List, Optional
 
-import orjson
 import typer
-import xrpl
 from rich import print
-from filedgr_nft_protobuf.serialize import serialize
 
-from filedgr_xrpl_cli.dto.filedgr_nft_type import FiledgrArtV0NftType, FiledgrArtV0NftTypeAttributeTraitEnum, \
-    FiledgrArtV0NftTypeCollection
-from filedgr_xrpl_cli.dto.network import NetworkChoices, all_networks
-from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
-from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
-from filedgr_xrpl_cli.my_xrpl.wallet import FileWalletLoader
-from filedgr_xrpl_cli.settings import default_path
+from filedgr_xrpl_cli.cli_commands.options import network_option, path_option
+from filedgr_xrpl_cli.dto.metadata_format import MetadataFormat
+from filedgr_xrpl_cli.nft_utils.token_id import DEFAULT_NFT_FLAGS
+from filedgr_xrpl_cli.server.client import forward
 
 nft_app = typer.Typer()
 
@@ -21,10 +15,19 @@ nft_app = typer.Typer()
 @nft_app.command()
 def mint(issuer: str,
          uri: str,
-         path: str = default_path,
-         network: NetworkChoices = "testnet"):
-    issuer_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{issuer}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
+         path: str = path_option(),
+         network: str = network_option()):
+    forwarded = forward("nft/mint", path, issuer=issuer, uri=uri, network=network)
+    if forwarded is not None:
+        print(forwarded)
+        return
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    issuer_wallet = KeystoreWalletLoader(path).load_wallet(issuer)
+    conn = XRPLConnection.for_network(network, path)
 
     result = TransactionBuilder.issue_nft(
         conn=conn,
@@ -34,52 +37,181 @@ def mint(issuer: str,
     print(result)
 
 
+@nft_app.command()
+def mint_batch(issuer: str,
+               file: str = typer.Argument(..., help="CSV or JSONL file with a uri and optional taxon/fees per row"),
+               window: int = typer.Option(20, help="The number of transactions kept in flight"),
+               sign_workers: int = typer.Option(1, help="The number of processes signing the transactions"),
+               ws: bool = typer.Option(True, "--ws/--poll", help="Track validations over the network WebSocket"),
+               path: str = path_option(),
+               network: str = network_option()):
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.my_xrpl.batch import BatchSubmitter
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.signing import ParallelSigner
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    issuer_wallet = KeystoreWalletLoader(path).load_wallet(issuer)
+    conn = XRPLConnection.for_network(network, path)
+
+    transactions = (
+        TransactionBuilder.build_nft_mint(
+            issuer=issuer_wallet,
+            uri=record["uri"],
+            taxon=int(record.get("taxon", 1)),
+            fees=int(record.get("fees", 0))
+        ) for record in MyFileIO.iter_records(file)
+    )
+    with ParallelSigner([issuer_wallet], processes=sign_workers) as signer:
+        submitter = BatchSubmitter(conn=conn, wallet=issuer_wallet, window=window, signer=signer,
+                                   tracker=conn.get_tracker() if ws else None)
+        for result in submitter.run(transactions):
+            typer.echo(result.json(exclude_none=True))
+
+
 @nft_app.command()
 def get_id(issuer: str,
-         path: str = default_path,
-         network: NetworkChoices = "testnet") -> str:
+           refresh: bool = typer.Option(True, "--refresh/--cached",
+                                        help="Read MintedNFTokens from the ledger or from the local cache, which "
+                                             "misses mints made outside of this --path"),
+           path: str = path_option(),
+           network: str = network_option()) -> str:
+    forwarded = forward("nft/get-id", path, issuer=issuer, network=network, refresh=refresh)
+    if forwarded is not None:
+        print(forwarded["token_id"])
+        return forwarded["token_id"]
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.nft_utils.token_id import nft_token_ids
 
-    issuer_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{issuer}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
+    issuer_wallet = KeystoreWalletLoader(path).load_wallet(issuer)
+    conn = XRPLConnection.for_network(network, path)
     # Predict NFT ID
-    account_root = xrpl.account.get_account_root(address=issuer_wallet.get_wallet().classic_address,
-                                                 client=conn.get_client())
-    account_id = account_root.get("Account")
-    minted_tokens = account_root.get("MintedNFTokens")
-
-    # Fees
-    fees = 0
-    hex_fees = hex(fees).replace("0x", "").upper()
-    while len(hex_fees) < 4:
-        hex_fees = f"0{hex_fees}"
-
-    hex_sequence = hex(minted_tokens).replace("0x", "").upper()
-    while len(hex_sequence) < 8:
-        hex_sequence = f"0{hex_sequence}"
-
-    taxon = (1 ^ (384160001 * minted_tokens + 2459)) % 4294967296
-    taxon_hex = hex(taxon).replace("0x", "").upper()
-    while len(taxon_hex) < 8:
-        taxon_hex = f"0{taxon_hex}"
-    # return (taxon ^ (384160001 * token_seq + 2459)) % 4294967296
-
-    account_be = xrpl.core.addresscodec.decode_classic_address(account_id)
-
-    token_id = f"000B{hex_fees}{account_be.hex().upper()}{taxon_hex}{hex_sequence}"
+    account_id = issuer_wallet.get_wallet().classic_address
+    start_sequence = conn.get_state().next_token_sequence(account_id, conn.get_client(), refresh=refresh)
+    token_id = nft_token_ids(issuer=account_id, start_sequence=start_sequence)[0]
     print(token_id)
     return token_id
 
 
+@nft_app.command()
+def predict_ids(issuer: str = typer.Argument(..., help="The issuer wallet name or classic address"),
+                count: int = typer.Option(1, help="The number of IDs to predict"),
+                start_seq: Optional[int] = typer.Option(None, help="The token sequence of the first ID"),
+                minted_tokens: Optional[int] = typer.Option(None, help="MintedNFTokens of the issuer, for offline use"),
+                refresh: bool = typer.Option(True, "--refresh/--cached",
+                                             help="Read MintedNFTokens from the ledger or from the local cache, "
+                                                  "which misses mints made outside of this --path"),
+                taxon: int = 1,
+                fees: int = typer.Option(0, help="The transfer fee of the NFTs"),
+                flags: int = typer.Option(DEFAULT_NFT_FLAGS, help="The NFTokenMint flags of the NFTs"),
+                path: str = path_option(),
+                network: str = network_option()):
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.nft_utils.token_id import iter_nft_token_ids
+
+    account_id = _to_account_id(issuer, path)
+    if start_seq is None:
+        if minted_tokens is not None:
+            start_seq = minted_tokens
+        else:
+            conn = XRPLConnection.for_network(network, path)
+            start_seq = conn.get_state().next_token_sequence(account_id, conn.get_client(), refresh=refresh)
+
+    for token_ids in iter_nft_token_ids(issuer=account_id, start_sequence=start_seq, count=count,
+                                        taxon=taxon, transfer_fee=fees, flags=flags):
+        sys.stdout.write("\n".join(token_ids))
+        sys.stdout.write("\n")
+
+
+def _to_account_id(name_or_address: str, path: str) -> str:
+    from xrpl.core.addresscodec import is_valid_classic_address
+
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+
+    if is_valid_classic_address(name_or_address):
+        return name_or_address
+    return KeystoreWalletLoader(path).load_wallet(name_or_address).get_wallet().classic_address
+
+
+@nft_app.command()
+def index(accounts: List[str] = typer.Argument(..., help="The wallet names or classic addresses whose NFTs to index"),
+          full: bool = typer.Option(False, help="Crawl the NFTs again instead of updating from the last indexed "
+                                                "ledger"),
+          path: str = path_option(),
+          network: str = network_option()):
+    """
+    Indexes the NFTs held by accounts into a local database, updating it from the last indexed ledger.
+    """
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.nft_index import NftIndex
+
+    conn = XRPLConnection.for_network(network, path)
+    nft_index = NftIndex(_index_path(path, network))
+    try:
+        for account in accounts:
+            account_id = _to_account_id(account, path)
+            added, removed = nft_index.update(conn, account_id, full=full)
+            print(f"{account_id}: {added} added, {removed} removed, "
+                  f"up to ledger {nft_index.get_ledger_index(account_id)}")
+    finally:
+        nft_index.close()
+
+
+@nft_app.command("list")
+def list_nfts(issuer: Optional[str] = typer.Option(None, help="The wallet name or classic address of the issuer"),
+              owner: Optional[str] = typer.Option(None, help="The wallet name or classic address of the owner"),
+              taxon: Optional[int] = None,
+              uri_prefix: Optional[str] = typer.Option(None, help="Only NFTs whose URI starts with this"),
+              limit: Optional[int] = None,
+              path: str = path_option(),
+              network: str = network_option()):
+    """
+    Lists the NFTs of the local index as JSON lines, see `nft index`.
+    """
+    from orjson import orjson
+
+    from filedgr_xrpl_cli.my_xrpl.nft_index import NftIndex
+
+    nft_index = NftIndex(_index_path(path, network))
+    try:
+        for nft in nft_index.query(issuer=_to_account_id(issuer, path) if issuer else None,
+                                   owner=_to_account_id(owner, path) if owner else None,
+                                   taxon=taxon,
+                                   uri_prefix=uri_prefix,
+                                   limit=limit):
+            sys.stdout.write(orjson.dumps(nft, option=orjson.OPT_APPEND_NEWLINE).decode("utf-8"))
+    finally:
+        nft_index.close()
+
+
+def _index_path(path: str, network: str) -> str:
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+
+    MyFileIO.create_dir(path, recursive=True)
+    return f"{path}/nfts-{network}.db"
+
 
 @nft_app.command()
 def burn(
         issuer: str,
         token_id: str,
-        path: str = default_path,
-        network: NetworkChoices = "testnet"
+        path: str = path_option(),
+        network: str = network_option()
 ):
-    issuer_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{issuer}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
+    forwarded = forward("nft/burn", path, issuer=issuer, token_id=token_id, network=network)
+    if forwarded is not None:
+        print(forwarded)
+        return
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    issuer_wallet = KeystoreWalletLoader(path).load_wallet(issuer)
+    conn = XRPLConnection.for_network(network, path)
     result = TransactionBuilder.burn_nft(
         conn=conn,
         issuer=issuer_wallet,
@@ -93,11 +225,21 @@ def send(
         source: str,
         destination: str,
         token_id: str,
-        path: str = default_path,
-        network: NetworkChoices = "testnet"
+        path: str = path_option(),
+        network: str = network_option()
 ):
-    source_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{source}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
+    forwarded = forward("nft/send", path, source=source, destination=destination, token_id=token_id,
+                        network=network)
+    if forwarded is not None:
+        print(forwarded)
+        return
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    source_wallet = KeystoreWalletLoader(path).load_wallet(source)
+    conn = XRPLConnection.for_network(network, path)
     result = TransactionBuilder.send_nft(
         conn=conn,
         source=source_wallet,
@@ -107,14 +249,59 @@ def send(
     print(result)
 
 
+@nft_app.command()
+def send_batch(source: str,
+               plan: str = typer.Argument(..., help="CSV or JSONL file with a token_id and destination per row"),
+               window: int = typer.Option(20, help="The number of transactions kept in flight"),
+               ws: bool = typer.Option(True, "--ws/--poll", help="Track validations over the network WebSocket"),
+               path: str = path_option(),
+               network: str = network_option()):
+    """
+    Creates the transfer offers of a plan and prints one status line per row with the offer ID.
+    """
+    from orjson import orjson
+
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.my_xrpl.batch import BatchSubmitter
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    source_wallet = KeystoreWalletLoader(path).load_wallet(source)
+    conn = XRPLConnection.for_network(network, path)
+    # Only the rows in flight are kept to report them with their result
+    rows = {}
+
+    def offers():
+        for index, row in enumerate(MyFileIO.iter_records(plan)):
+            rows[index] = row
+            yield TransactionBuilder.build_nft_offer(source=source_wallet,
+                                                     destination=row["destination"],
+                                                     token_id=row["token_id"])
+
+    submitter = BatchSubmitter(conn=conn, wallet=source_wallet, window=window,
+                               tracker=conn.get_tracker() if ws else None)
+    for result in submitter.run(offers()):
+        row = rows.pop(result.index)
+        report = {"token_id": row["token_id"], "destination": row["destination"],
+                  **result.dict(exclude_none=True)}
+        sys.stdout.write(orjson.dumps(report, option=orjson.OPT_APPEND_NEWLINE).decode("utf-8"))
+
+
 @nft_app.command()
 def generate_meta(
         path: str,
         name: str,
         description: str,
         image: str,
-        file: Optional[str] = ''
+        file: Optional[str] = '',
+        metadata_format: MetadataFormat = typer.Option(MetadataFormat.JSON.value, "--format",
+                                                       help="Write the metadata as JSON or compact protobuf")
 ):
+    from filedgr_xrpl_cli.dto.filedgr_nft_type import FiledgrArtV0NftType, FiledgrArtV0NftTypeAttributeTraitEnum, \
+        FiledgrArtV0NftTypeCollection
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+
     nft_type = FiledgrArtV0NftType(
         name=name,
         description=description,
@@ -141,11 +328,53 @@ def generate_meta(
         description="The wallet receiving the transactions updating the NFT."
     )
 
-    file = None
-    try:
-        meta_json = nft_type.json(by_alias=True)
-        file = open(path, "w")
-        file.write(meta_json)
-    finally:
-        if file:
-            file.close()
+    if metadata_format == MetadataFormat.PROTOBUF:
+        from orjson import orjson
+        from filedgr_xrpl_cli.nft_utils.metadata_codec import encode_metadata
+        MyFileIO.write_to_file(path=path, content=encode_metadata(orjson.loads(nft_type.json(by_alias=True))))
+    else:
+        MyFileIO.write_to_file(path=path, content=nft_type.json(by_alias=True))
+
+
+@nft_app.command()
+def generate_meta_batch(
+        file: str = typer.Argument(..., help="CSV or JSONL file with name, description, image, file and attribute "
+                                             "values per row"),
+        template: str = typer.Argument(..., help="JSON or YAML file with the collection and attributes of the drop"),
+        output: str = typer.Argument(..., help="The directory of the metadata files, or the NDJSON file"),
+        ndjson: bool = typer.Option(False, help="Write all metadata to one NDJSON file instead of a file per NFT, "
+                                                "length-delimited messages in protobuf"),
+        name_column: str = typer.Option("id", help="The column naming the metadata file of each NFT"),
+        metadata_format: MetadataFormat = typer.Option(MetadataFormat.JSON.value, "--format",
+                                                       help="Write the metadata as JSON or compact protobuf")
+):
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.nft_utils.metadata import MetadataGenerator
+
+    generator = MetadataGenerator.from_file(template)
+    records = MyFileIO.iter_records(file)
+    if ndjson and metadata_format == MetadataFormat.PROTOBUF:
+        count = generator.write_delimited(records, output)
+    elif ndjson:
+        count = generator.write_ndjson(records, output)
+    else:
+        count = generator.write_files(records, output, name_column=name_column, metadata_format=metadata_format)
+    print(f"Generated the metadata of {count} NFTs in {output}")
+
+
+@nft_app.command()
+def decode_meta(
+        file: str = typer.Argument(..., help="A protobuf metadata file written with --format protobuf"),
+        delimited: bool = typer.Option(False, help="The file holds the length-delimited metadata of many NFTs")
+):
+    """
+    Decodes protobuf metadata back to the art.v0 JSON, one JSON document per line.
+    """
+    from orjson import orjson
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.nft_utils.metadata_codec import decode_metadata, iter_delimited
+
+    with MyFileIO.map_file(file) as content:
+        messages = iter_delimited(content) if delimited else [content]
+        for message in messages:
+            sys.stdout.write(orjson.dumps(decode_metadata(message), option=orjson.OPT_APPEND_NEWLINE).decode("utf-8"))
@@ -0,0 +1,46 @@
+from typing import Any, List, Optional, Union
+
+import typer
+
+from filedgr_xrpl_cli.settings import default_path
+
+
+def _check_networks(ctx: typer.Context, value: Optional[Union[str, List[str]]]) -> Optional[Union[str, List[str]]]:
+    """
+    Accepts the built-in networks and the ones of the `networks` file of the command's --path.
+    """
+    if ctx.resilient_parsing or not value:
+        return value
+    from filedgr_xrpl_cli.dto.network import load_networks
+
+    path = ctx.params.get("path", default_path)
+    known = load_networks(path)
+    for network in [value] if isinstance(value, str) else value:
+        if network not in known:
+            raise typer.BadParameter(f"Unknown network {network}, expected one of {', '.join(known)} or a network "
+                                     f"of {path}/networks")
+    return value
+
+
+def _use_directory(ctx: typer.Context, path: str) -> str:
+    # The submissions of the command are journaled in its directory, unless --journal says otherwise
+    if not ctx.resilient_parsing:
+        from filedgr_xrpl_cli.my_xrpl.journal import use_journal_directory
+
+        use_journal_directory(path)
+    return path
+
+
+def path_option() -> Any:
+    # Read before the other options, so that --network is checked against the networks of this directory
+    return typer.Option(default_path, is_eager=True, callback=_use_directory, help="The CLI directory")
+
+
+def network_option(default: str = "testnet") -> Any:
+    return typer.Option(default, callback=_check_networks,
+                        help="A built-in network or one of the `networks` file of --path")
+
+
+def networks_argument() -> Any:
+    return typer.Argument(None, callback=_check_networks,
+                          help="The networks to probe, default all of the `networks` file of --path")
@@ -1,13 +1,10 @@
-from typing import List
+from typing import List, Optional
 
 import typer
 
-from filedgr_xrpl_cli.dto.memo import MyMemos, MyMemo
-from filedgr_xrpl_cli.dto.network import NetworkChoices, all_networks
-from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
-from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
-from filedgr_xrpl_cli.my_xrpl.wallet import FileWalletLoader
-from filedgr_xrpl_cli.settings import default_path
+from filedgr_xrpl_cli.cli_commands.options import network_option, path_option
+from filedgr_xrpl_cli.dto.metadata_format import MetadataFormat
+from filedgr_xrpl_cli.server.client import daemon_address, forward
 
 payment_app = typer.Typer()
 
@@ -19,30 +16,111 @@ def send_token(issuer: str,
                memo: str = '',
                memo_format: str = '',
                memos: str = '',
-               path: str = default_path,
-               network: NetworkChoices = "testnet"):
-    issuer_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{issuer}")
-    distributor_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{distributor}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
-
-    # TODO: need to return to the typer help loop
-    c_memos: List[MyMemo] = None
-    if memo != '' and memo_format != '':
-        c_memos = [MyMemo(
-            memo=memo,
-            memo_format=memo_format
-        )]
-    elif memos != '':
-        # load the memos file
-        my_memos = MyMemos.parse_file(memos)
-        c_memos = my_memos.__root__
-        pass
+               metadata_format: MetadataFormat = typer.Option(MetadataFormat.JSON.value, "--format",
+                                                              help="Send the json memos as they are or as compact "
+                                                                   "protobuf NFT metadata"),
+               path: str = path_option(),
+               network: str = network_option()):
+    memo_params = _memo_params(memo, memo_format, memos)
+    if memo_params and metadata_format == MetadataFormat.PROTOBUF:
+        memo_params = [dict(params, memo_format="protobuf") if params.get("memo_format") == "json" else params
+                       for params in memo_params]
+    if daemon_address():
+        print(forward("payment/send-token", path, issuer=issuer, distributor=distributor, code=code,
+                      memos=memo_params, network=network))
+        return
+
+    from filedgr_xrpl_cli.dto.memo import MyMemos
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    wallets = KeystoreWalletLoader(path)
+    issuer_wallet = wallets.load_wallet(issuer)
+    distributor_wallet = wallets.load_wallet(distributor)
+    conn = XRPLConnection.for_network(network, path)
 
     result = TransactionBuilder.issue_transaction_token(
         conn=conn,
         issuer=issuer_wallet,
         distributor=distributor_wallet,
         code=code,
-        memos=c_memos
+        memos=MyMemos.parse_obj(memo_params).__root__ if memo_params else None
     )
     print(result)
+
+
+def _memo_params(memo: str, memo_format: str, memos: str) -> Optional[List[dict]]:
+    if memo != '' and memo_format != '':
+        return [{"memo": memo, "memo_format": memo_format}]
+    if memos != '':
+        from orjson import orjson
+        from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+        with MyFileIO.map_file(memos) as content:
+            return orjson.loads(content)
+    return None
+
+
+@payment_app.command()
+def send_file(issuer: str,
+              distributor: str,
+              code: str,
+              file: str = typer.Argument(..., help="The file to anchor in the memos of token payments"),
+              memo_format: str = typer.Option(..., help="The format of the file, e.g. pdf or img/png"),
+              chunk_size: int = typer.Option(768, help="The number of payload bytes per payment, at most 900"),
+              window: int = typer.Option(20, help="The number of transactions kept in flight"),
+              ws: bool = typer.Option(True, "--ws/--poll", help="Track validations over the network WebSocket"),
+              path: str = path_option(),
+              network: str = network_option()):
+    """
+    Splits a file into memo chunks sent in as many payments as needed, one JSON result per chunk is printed.
+    """
+    from filedgr_xrpl_cli.dto.memo import MemoFormat
+    from filedgr_xrpl_cli.my_xrpl.batch import BatchSubmitter
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.memo_chunks import iter_memo_chunks
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    wallets = KeystoreWalletLoader(path)
+    issuer_wallet = wallets.load_wallet(issuer)
+    distributor_wallet = wallets.load_wallet(distributor)
+    conn = XRPLConnection.for_network(network, path)
+
+    transactions = (
+        TransactionBuilder.build_transaction_token_with_memos(
+            issuer=issuer_wallet,
+            distributor=distributor_wallet,
+            code=code,
+            memos=[memo]
+        ) for memo in iter_memo_chunks(file, MemoFormat(memo_format), chunk_size=chunk_size)
+    )
+    submitter = BatchSubmitter(conn=conn, wallet=issuer_wallet, window=window,
+                               tracker=conn.get_tracker() if ws else None)
+    for result in submitter.run(transactions):
+        typer.echo(result.json(exclude_none=True))
+
+
+@payment_app.command()
+def reassemble(results: str = typer.Argument(..., help="The JSON lines printed by send-file"),
+               output: str = typer.Argument(..., help="The file to write the payload to"),
+               path: str = path_option(),
+               network: str = network_option()):
+    """
+    Fetches the payments of a sent file, writes the payload back and verifies its SHA-256.
+    """
+    from xrpl.models import Tx
+
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.memo_chunks import reassemble_memo_chunks
+
+    client = XRPLConnection.for_network(network, path).get_client()
+
+    def iter_memos():
+        for record in MyFileIO.iter_records(results):
+            if record.get("hash"):
+                yield from client.request(Tx(transaction=record["hash"])).result.get("Memos", [])
+
+    header = reassemble_memo_chunks(iter_memos(), output)
+    print(f"Verified {header.total} chunks with SHA-256 {header.digest} into {output}")
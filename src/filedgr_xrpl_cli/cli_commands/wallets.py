@@ -1,14 +1,13 @@
+import sys
 import uuid
+from typing import List
 
 import typer
-from orjson import orjson
 from rich import print
 
-from filedgr_xrpl_cli.dto.network import all_networks, NetworkChoices
-from filedgr_xrpl_cli.my_io.file_io import MyFileIO
-from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
-from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
-from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet, FileWalletLoader
+from filedgr_xrpl_cli.cli_commands.options import network_option, path_option
+from filedgr_xrpl_cli.dto.export_format import ExportFormat
+from filedgr_xrpl_cli.server.client import forward
 from filedgr_xrpl_cli.settings import default_path
 
 wallet_app = typer.Typer()
@@ -17,28 +16,117 @@ wallet_app = typer.Typer()
 @wallet_app.command()
 def create(name: str,
            dump: bool = True,
-           path: str = default_path,
-           network: NetworkChoices = "testnet") -> str:
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
-    if network == NetworkChoices.testnet:
+           path: str = path_option(),
+           network: str = network_option()) -> str:
+    from orjson import orjson
+
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+
+    conn = XRPLConnection.for_network(network, path)
+    if network == "testnet":
         wallet = XRPLWallet.create_testnet_wallet(conn.get_client())
     else:
         wallet = XRPLWallet.create_wallet()
 
     wallet_json = orjson.dumps(wallet.get_wallet().__dict__).decode("utf8")
     if dump:
+        KeystoreWalletLoader(path).store_wallet(name, wallet)
         MyFileIO.write_to_file(path=f"{path}/wallets/{name}", content=wallet_json)
     print(f"Created wallet: {wallet_json}")
 
 
+@wallet_app.command("create-batch")
+def create_batch(prefix: str = typer.Argument(..., help="The wallets are named <prefix>-<number>"),
+                 count: int = typer.Option(..., min=1),
+                 start: int = typer.Option(0, help="The number of the first wallet"),
+                 fund: bool = typer.Option(True, help="Fund the wallets from the faucet on testnet and devnet"),
+                 concurrency: int = typer.Option(8, help="The number of faucet requests in flight"),
+                 rate: float = typer.Option(5.0, help="The maximum faucet requests per second"),
+                 retries: int = typer.Option(5, help="Retries of a faucet request while the faucet is busy"),
+                 path: str = path_option(),
+                 network: str = network_option()) -> None:
+    """
+    Creates and funds many wallets at once and stores them in the keystore in a single transaction.
+    """
+    from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import WalletKeystore
+    from filedgr_xrpl_cli.my_xrpl.provisioning import WalletProvisioner
+
+    names = [f"{prefix}-{number}" for number in range(start, start + count)]
+    MyFileIO.create_dir(path, recursive=True)
+    keystore = WalletKeystore(f"{path}/wallets.db")
+    try:
+        existing = [name for name in names if keystore.get(name) is not None]
+        if existing:
+            raise typer.BadParameter(f"Wallets already exist: {', '.join(existing[:10])}", param_hint="prefix")
+
+        provisioner = WalletProvisioner(conn=XRPLConnection.for_network(network, path),
+                                        concurrency=concurrency,
+                                        rate=rate,
+                                        retries=retries)
+        faucet = network in ("testnet", "devnet")
+        result = provisioner.provision(count, fund=fund and faucet)
+        # Every wallet keeps the name of its position, the unfunded ones are stored too so their keys are not lost
+        stored = keystore.put_many(zip(names, result.wallets))
+    finally:
+        keystore.close()
+
+    for name, wallet in zip(names, result.wallets):
+        address = wallet.get_wallet().classic_address
+        if address in result.failed:
+            print(f"Stored {name} ({address}) unfunded: {result.failed[address]}")
+    print(f"Created {stored} wallets, {names[0]} to {names[-1]}, {len(result.failed)} not funded")
+
+
+@wallet_app.command("import")
+def import_wallets(path: str = default_path) -> None:
+    """
+    Imports the wallet files of the wallet directory into the keystore.
+    """
+    from filedgr_xrpl_cli.my_xrpl.keystore import WalletKeystore
+
+    keystore = WalletKeystore(f"{path}/wallets.db")
+    try:
+        count = keystore.import_directory(f"{path}/wallets")
+    except ValueError as ex:
+        typer.echo(str(ex), err=True)
+        raise typer.Exit(1)
+    finally:
+        keystore.close()
+    print(f"Imported {count} wallets into {path}/wallets.db")
+
+
+@wallet_app.command("list")
+def list_wallets(path: str = default_path) -> None:
+    from filedgr_xrpl_cli.my_xrpl.keystore import WalletKeystore
+
+    keystore = WalletKeystore(f"{path}/wallets.db")
+    for name, classic_address in keystore.iter_names():
+        typer.echo(f"{name}\t{classic_address}")
+    keystore.close()
+
+
 @wallet_app.command()
 def set_domain(
         name: str,
         domain: str = typer.Argument(...),
-        path: str = default_path,
-        network: NetworkChoices = "testnet") -> None:
-    issuer_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{name}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
+        path: str = path_option(),
+        network: str = network_option()) -> None:
+    forwarded = forward("wallet/set-domain", path, name=name, domain=domain, network=network)
+    if forwarded is not None:
+        print(forwarded)
+        return
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    issuer_wallet = KeystoreWalletLoader(path).load_wallet(name)
+    conn = XRPLConnection.for_network(network, path)
 
     result = TransactionBuilder.set_issuer(
         conn=conn,
@@ -53,11 +141,22 @@ def trustline(issuer: str,
               distributor: str,
               code: str = uuid.uuid4(),
               nft: bool = True,
-              path: str = default_path,
-              network: NetworkChoices = "testnet") -> None:
-    issuer_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{issuer}")
-    distributor_wallet = FileWalletLoader().load_wallet(f"{path}/wallets/{distributor}")
-    conn = XRPLConnection(json_rpc_url=all_networks.get(network.value).json_rpc_url)
+              path: str = path_option(),
+              network: str = network_option()) -> None:
+    forwarded = forward("wallet/trustline", path, issuer=issuer, distributor=distributor, code=str(code), nft=nft,
+                        network=network)
+    if forwarded is not None:
+        print(forwarded)
+        return
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+
+    wallets = KeystoreWalletLoader(path)
+    issuer_wallet = wallets.load_wallet(issuer)
+    distributor_wallet = wallets.load_wallet(distributor)
+    conn = XRPLConnection.for_network(network, path)
 
     result = TransactionBuilder.set_trustline(
         conn=conn,
@@ -67,3 +166,62 @@ def trustline(issuer: str,
         nft=nft
     )
     print(result)
+
+
+@wallet_app.command("trustline-batch")
+def trustline_batch(issuer: str,
+                    distributors: List[str] = typer.Argument(..., help="The distributor wallets"),
+                    codes: List[str] = typer.Option(..., "--code", "-c", help="A code every distributor trusts"),
+                    nft: bool = True,
+                    concurrency: int = typer.Option(32, help="The number of requests in flight"),
+                    path: str = path_option(),
+                    network: str = network_option()) -> None:
+    """
+    Sets the trustlines of every distributor to every code, skipping the existing ones, and prints one status
+    line per trustline.
+    """
+    from dataclasses import asdict
+
+    from orjson import orjson
+
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+    from filedgr_xrpl_cli.my_xrpl.trustlines import TrustlineBatch
+
+    wallets = KeystoreWalletLoader(path)
+    batch = TrustlineBatch(conn=XRPLConnection.for_network(network, path),
+                           issuer=wallets.load_wallet(issuer),
+                           nft=nft,
+                           concurrency=concurrency)
+    names = {}
+    distributor_wallets = []
+    for name in distributors:
+        wallet = wallets.load_wallet(name)
+        names[wallet.get_wallet().classic_address] = name
+        distributor_wallets.append(wallet)
+
+    for outcome in batch.run(distributor_wallets, codes):
+        report = {"name": names[outcome.distributor],
+                  **{key: value for key, value in asdict(outcome).items() if value is not None}}
+        sys.stdout.write(orjson.dumps(report, option=orjson.OPT_APPEND_NEWLINE).decode("utf-8"))
+
+
+@wallet_app.command()
+def history(name: str = typer.Argument(..., help="The wallet name or classic address"),
+            output: str = typer.Argument(..., help="The NDJSON file, or the directory of the Parquet files"),
+            output_format: ExportFormat = typer.Option(ExportFormat.NDJSON.value, "--format"),
+            page_size: int = typer.Option(400, help="The number of transactions per account_tx request"),
+            path: str = path_option(),
+            network: str = network_option()) -> None:
+    """
+    Exports the transaction history of an account, resuming an interrupted export of the same output.
+    """
+    from filedgr_xrpl_cli.cli_commands.nfts import _to_account_id
+    from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+    from filedgr_xrpl_cli.my_xrpl.history import AccountHistoryExporter
+
+    exporter = AccountHistoryExporter(conn=XRPLConnection.for_network(network, path),
+                                      account=_to_account_id(name, path),
+                                      page_size=page_size)
+    count = exporter.export(output, output_format=output_format)
+    print(f"Exported {count} transactions to {output}")
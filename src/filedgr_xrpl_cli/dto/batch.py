@@ -0,0 +1,29 @@
+from enum import Enum
+from typing import Optional
+
+from orjson import orjson
+from pydantic import BaseModel
+
+from filedgr_xrpl_cli.dto.filedgr_nft_type import orjson_dumps
+
+
+class BatchItemStatus(Enum):
+    VALIDATED = "validated"
+    FAILED = "failed"
+    EXPIRED = "expired"
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: BatchItemStatus
+    hash: Optional[str]
+    sequence: Optional[int]
+    engine_result: Optional[str]
+    ledger_index: Optional[int]
+    nftoken_id: Optional[str]
+    offer_id: Optional[str]
+    error: Optional[str]
+
+    class Config:
+        json_loads = orjson.loads
+        json_dumps = orjson_dumps
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ExportFormat(Enum):
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
@@ -77,3 +77,25 @@ class FiledgrArtV0NftType(BaseModel):
     def set_collection(self,
                        collection: FiledgrArtV0NftTypeCollection):
         self.collection = collection
+
+
+class FiledgrArtV0NftTypeTemplateAttribute(BaseModel):
+    """
+    An attribute of every NFT of a drop, with a fixed `value` or the value of the record column `column`.
+    """
+    trait_type: FiledgrArtV0NftTypeAttributeTraitEnum
+    description: Optional[str]
+    value: Optional[str]
+    column: Optional[str]
+
+
+class FiledgrArtV0NftTypeTemplate(BaseModel):
+    """
+    The parts of the metadata shared by all NFTs of a drop.
+    """
+    collection: Optional[FiledgrArtV0NftTypeCollection]
+    attributes: List[FiledgrArtV0NftTypeTemplateAttribute] = []
+
+    class Config:
+        json_loads = orjson.loads
+        json_dumps = orjson_dumps
@@ -16,6 +16,8 @@ class MemoFormat(Enum):
     WEBP = 'img/webp'
     ZIP = 'zip'
     GZ = 'gz'
+    # JSON NFT metadata, sent in its protobuf encoding
+    PROTOBUF = 'protobuf'
 
 
 class MyMemo(BaseModel):
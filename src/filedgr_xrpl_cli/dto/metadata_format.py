@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class MetadataFormat(Enum):
+    JSON = "json"
+    PROTOBUF = "protobuf"
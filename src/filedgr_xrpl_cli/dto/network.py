@@ -1,37 +1,45 @@
-from enum import Enum
+from pathlib import Path
+from typing import Dict, List
+
+from orjson import orjson
 from pydantic import BaseModel
 
+from ..settings import default_path
+
 
 class Network(BaseModel):
     json_rpc_url: str
     ws_url: str
+    json_rpc_fallback_urls: List[str] = []
+    ws_fallback_urls: List[str] = []
 
+    def json_rpc_urls(self) -> List[str]:
+        return [self.json_rpc_url] + self.json_rpc_fallback_urls
 
-class NetworkChoices(Enum):
-    mainnet = "mainnet"
-    ripple1 = "ripple1"
-    ripple2 = "ripple2"
-    testnet = "testnet"
-    devnet = "devnet"
-    nft_devnet = "nft-devnet"
+    def ws_urls(self) -> List[str]:
+        return [self.ws_url] + self.ws_fallback_urls
 
 
 all_networks = {
     "mainnet": Network(
         json_rpc_url="https://xrplcluster.com/",
-        ws_url="wss://xrpl.ws/"
+        ws_url="wss://xrpl.ws/",
+        json_rpc_fallback_urls=["https://s1.ripple.com:51234/", "https://s2.ripple.com:51234/"]
     ),
     "ripple1": Network(
         json_rpc_url="https://s1.ripple.com:51234/",
-        ws_url="wss://s1.ripple.com/"
+        ws_url="wss://s1.ripple.com/",
+        json_rpc_fallback_urls=["https://s2.ripple.com:51234/"]
     ),
     "ripple2": Network(
         json_rpc_url="https://s2.ripple.com:51234/",
-        ws_url="wss://s2.ripple.com/"
+        ws_url="wss://s2.ripple.com/",
+        json_rpc_fallback_urls=["https://s1.ripple.com:51234/"]
     ),
     "testnet": Network(
         json_rpc_url="https://s.altnet.rippletest.net:51234/",
-        ws_url="wss://s.altnet.rippletest.net/"
+        ws_url="wss://s.altnet.rippletest.net/",
+        json_rpc_fallback_urls=["https://testnet.xrpl-labs.com/"]
     ),
     "devnet": Network(
         json_rpc_url="https://s.devnet.rippletest.net:51234/",
@@ -40,5 +48,28 @@ all_networks = {
     "nft-devnet": Network(
         json_rpc_url="http://xls20-sandbox.rippletest.net:51234",
         ws_url="wss://xls20-sandbox.rippletest.net:51233"
+    ),
+    "local": Network(
+        json_rpc_url="http://localhost:5005/",
+        ws_url="ws://localhost:6006/"
     )
 }
+
+_loaded_networks: Dict[str, Dict[str, Network]] = {}
+
+
+def load_networks(path: str = default_path) -> Dict[str, Network]:
+    """
+    Reads the `networks` file of a CLI directory once per process. The networks it defines replace the built-in
+    ones of the same name, e.g. to point "mainnet" at a private node, the others are kept.
+    :param path: The CLI directory
+    :return: The networks by name
+    """
+    if path not in _loaded_networks:
+        networks = dict(all_networks)
+        networks_file = Path(path) / "networks"
+        if networks_file.exists():
+            networks.update((name, Network.parse_obj(network))
+                            for name, network in orjson.loads(networks_file.read_bytes()).items())
+        _loaded_networks[path] = networks
+    return _loaded_networks[path]
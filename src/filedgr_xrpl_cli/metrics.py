@@ -0,0 +1,112 @@
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from orjson import orjson
+
+_LabelSet = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class PhaseStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+class Metrics:
+    """
+    Process-wide timers of the phases of an operation: wallet loading, autofill, signing, submission and every
+    JSON-RPC request by endpoint. Timings are aggregated per phase and label set, and written as one JSON line per
+    observation when a sink is set.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__stats: Dict[Tuple[str, _LabelSet], PhaseStats] = {}
+        self.__sink: Optional[IO[str]] = None
+
+    def set_sink(self, sink: Optional[IO[str]]) -> None:
+        """
+        :param sink: The text stream the JSON lines are written to, None stops writing them
+        """
+        self.__sink = sink
+
+    def observe(self, phase: str, seconds: float, **labels: str) -> None:
+        key = (phase, tuple(sorted((name, str(value)) for name, value in labels.items())))
+        with self.__lock:
+            stats = self.__stats.get(key)
+            if stats is None:
+                stats = self.__stats[key] = PhaseStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            if self.__sink is not None:
+                self.__sink.write(orjson.dumps({"ts": time.time(), "phase": phase, "seconds": seconds, **labels},
+                                               option=orjson.OPT_APPEND_NEWLINE).decode("utf-8"))
+
+    @contextmanager
+    def time(self, phase: str, **labels: str) -> Iterator[None]:
+        """
+        Times the body of the with statement as one observation of `phase`, also when it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> List[dict]:
+        """
+        :return: The aggregated timings, one entry per phase and label set
+        """
+        with self.__lock:
+            return [{"phase": phase, "labels": dict(labels), "count": stats.count, "total": stats.total,
+                     "max": stats.max}
+                    for (phase, labels), stats in sorted(self.__stats.items())]
+
+    def to_prometheus(self) -> str:
+        """
+        :return: The aggregated timings in the Prometheus text exposition format
+        """
+        lines = [
+            "# HELP filedgr_xrpl_phase_seconds Time spent per phase of the XRPL operations",
+            "# TYPE filedgr_xrpl_phase_seconds summary",
+        ]
+        max_lines = [
+            "# HELP filedgr_xrpl_phase_seconds_max Slowest observation per phase",
+            "# TYPE filedgr_xrpl_phase_seconds_max gauge",
+        ]
+        for entry in self.snapshot():
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in
+                              [("phase", entry["phase"])] + sorted(entry["labels"].items()))
+            lines.append(f"filedgr_xrpl_phase_seconds_count{{{labels}}} {entry['count']}")
+            lines.append(f"filedgr_xrpl_phase_seconds_sum{{{labels}}} {entry['total']:.6f}")
+            max_lines.append(f"filedgr_xrpl_phase_seconds_max{{{labels}}} {entry['max']:.6f}")
+        return "\n".join(lines + max_lines) + "\n"
+
+    def format_breakdown(self) -> str:
+        """
+        :return: A human readable table of the timings, slowest phase first
+        """
+        rows = sorted(self.snapshot(), key=lambda entry: entry["total"], reverse=True)
+        lines = [f"{'phase':<40} {'count':>7} {'total s':>9} {'avg ms':>9} {'max ms':>9}"]
+        for entry in rows:
+            name = entry["phase"] + "".join(f" {key}={value}" for key, value in sorted(entry["labels"].items()))
+            lines.append(f"{name:<40} {entry['count']:>7} {entry['total']:>9.3f} "
+                         f"{entry['total'] / entry['count'] * 1000:>9.1f} {entry['max'] * 1000:>9.1f}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__stats.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+metrics = Metrics()
@@ -1,7 +1,70 @@
 from __future__ import annotations
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Type
+from typing import Type, Iterator, Dict, Any, BinaryIO, List, Tuple, Union
+import csv
+import mmap
 import os
+import tempfile
+
+
+def _read_default_mode() -> int:
+    # Reading the umask sets it, which is only safe before other threads create files
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# The mode `open` creates files with, read once on import
+_DEFAULT_MODE = _read_default_mode()
+
+
+def _temp_file(path: str) -> Tuple[int, str]:
+    # In the directory of the target, a rename is only atomic within one file system
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    if hasattr(os, "fchmod"):
+        # mkstemp creates files readable by the owner only, keep the mode of the replaced file or the default one
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = _DEFAULT_MODE
+        os.fchmod(fd, mode)
+    return fd, temp_path
+
+
+def _publish(temp_path: str, path: str, overwrite: bool) -> None:
+    """
+    Moves a written temporary file to its path, raising FileExistsError when the path exists and must not be
+    overwritten.
+    """
+    if overwrite:
+        os.replace(temp_path, path)
+        return
+    try:
+        # Unlike a rename, a link fails when the path exists
+        os.link(temp_path, path)
+    finally:
+        os.unlink(temp_path)
+
+
+def _fdatasync(fd: int) -> None:
+    # fdatasync is not available on macOS and Windows
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def _fsync_dir(directory: str) -> None:
+    # Makes the renames in the directory durable, directories cannot be opened on Windows
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 class MyFileIO:
@@ -17,14 +80,56 @@ class MyFileIO:
         return True
 
     @classmethod
-    def write_to_file(cls: Type[MyFileIO], path: str, content: str, overwrite: bool = True) -> bool:
-        file = open(path, "w")
+    def write_to_file(cls: Type[MyFileIO], path: str, content: Union[str, bytes], overwrite: bool = True) -> bool:
+        """
+        Writes a file atomically: readers and a crash see either the previous or the complete new content.
+        :param content: The text, written as UTF-8, or the bytes of the file
+        :param overwrite: Replace the file when it exists
+        :return: False when the file exists and was not overwritten
+        """
+        if not overwrite and os.path.exists(path):
+            return False
         try:
-            file.write(content)
-            return True
-        finally:
-            if file:
-                file.close()
+            with cls.open_atomic(path, overwrite=overwrite) as file:
+                file.write(content.encode("utf-8") if isinstance(content, str) else content)
+        except FileExistsError:
+            return False
+        return True
+
+    @classmethod
+    @contextmanager
+    def open_atomic(cls: Type[MyFileIO], path: str, overwrite: bool = True) -> Iterator[BinaryIO]:
+        """
+        Opens a temporary file for writing in binary mode which replaces the file at `path` once the block exits
+        and its content is on disk. When the block raises, the file at `path` is left as it was.
+        """
+        fd, temp_path = _temp_file(path)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                yield file
+                file.flush()
+                os.fsync(file.fileno())
+            _publish(temp_path, path, overwrite)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+    @classmethod
+    @contextmanager
+    def group_commit(cls: Type[MyFileIO], max_pending: int = 1000) -> Iterator[GroupCommit]:
+        """
+        Batches many atomic file writes behind one sync per directory, committed when the block exits and every
+        `max_pending` files before. When the block raises, the files not committed yet are discarded.
+        """
+        group = GroupCommit(max_pending=max_pending)
+        try:
+            yield group
+        except BaseException:
+            group.abort()
+            raise
+        group.commit()
 
     @classmethod
     def read_from_file(cls: Type[MyFileIO], path: str) -> str:
@@ -34,3 +139,92 @@ class MyFileIO:
             return content
         finally:
             file.close()
+
+    @classmethod
+    @contextmanager
+    def map_file(cls: Type[MyFileIO], path: str) -> Iterator[Union[memoryview, bytes]]:
+        """
+        Memory-maps a file for reading. Pages are read on access instead of copying the whole file into memory,
+        the view can be passed to orjson, hashlib or sliced directly.
+        :return: A read-only view of the file content, valid until the block exits
+        """
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                # Empty files cannot be mapped
+                yield b""
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    @classmethod
+    def iter_records(cls: Type[MyFileIO], path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the rows of a CSV (with header) or JSONL file as dictionaries, one at a time.
+        :param path: The path to a .csv, .jsonl or .ndjson file
+        :return: An iterator over the records of the file
+        """
+        from orjson import orjson
+
+        suffix = Path(path).suffix.lower()
+        if suffix == ".csv":
+            with open(path, "r", newline="") as file:
+                for row in csv.DictReader(file):
+                    yield {key.strip(): value for key, value in row.items() if value not in (None, "")}
+        elif suffix in (".jsonl", ".ndjson"):
+            # orjson parses the bytes of every line without decoding them to text first
+            with open(path, "rb", buffering=1024 * 1024) as file:
+                for line in file:
+                    if line.strip():
+                        yield orjson.loads(line)
+        else:
+            raise ValueError(f"Unsupported record file format: {path}")
+
+
+class GroupCommit:
+    """
+    Atomic writes of many small files with one directory sync for all of them instead of one per file. Every file
+    is written to a temporary file next to it and synced, on commit the temporary files are renamed into place
+    and their directories synced once. A crash before the commit leaves the previous files untouched.
+    """
+
+    def __init__(self, max_pending: int = 1000) -> None:
+        self.__max_pending = max_pending
+        self.__pending: List[Tuple[str, str, bool]] = []
+
+    def write(self, path: str, content: Union[str, bytes], overwrite: bool = True) -> None:
+        fd, temp_path = _temp_file(path)
+        with os.fdopen(fd, "wb") as file:
+            file.write(content.encode("utf-8") if isinstance(content, str) else content)
+            file.flush()
+            # Only the data and size, a rename must never publish a file which is not on disk yet
+            _fdatasync(file.fileno())
+        self.__pending.append((temp_path, path, overwrite))
+        if len(self.__pending) >= self.__max_pending:
+            self.commit()
+
+    def commit(self) -> int:
+        """
+        :return: The number of files committed, the files which existed and were not to be overwritten are skipped
+        """
+        pending, self.__pending = self.__pending, []
+        if not pending:
+            return 0
+        committed = 0
+        for temp_path, path, overwrite in pending:
+            try:
+                _publish(temp_path, path, overwrite)
+                committed += 1
+            except FileExistsError:
+                pass
+        for directory in {os.path.dirname(os.path.abspath(path)) for _, path, _ in pending}:
+            _fsync_dir(directory)
+        return committed
+
+    def abort(self) -> None:
+        pending, self.__pending = self.__pending, []
+        for temp_path, _, _ in pending:
+            os.unlink(temp_path)
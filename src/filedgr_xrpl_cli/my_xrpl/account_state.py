@@ -0,0 +1,141 @@
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Type
+
+from ..settings import default_path
+
+# Seconds a stored account state is used by later commands without asking the ledger again
+ACCOUNT_STATE_MAX_AGE = 300.0
+
+_COLUMNS = ("account", "sequence", "balance", "flags", "owner_count", "minted_nftokens", "first_nftoken_sequence",
+            "ledger_index", "transaction_index", "updated")
+
+
+@dataclass(frozen=True)
+class AccountState:
+    account: str
+    sequence: int
+    # In drops
+    balance: str
+    flags: int
+    owner_count: int
+    minted_nftokens: int
+    first_nftoken_sequence: int
+    ledger_index: int
+    transaction_index: int = 0
+    updated: float = 0.0
+
+    @classmethod
+    def from_account_root(cls: Type[AccountState],
+                          account_root: dict,
+                          ledger_index: int,
+                          transaction_index: int = 0) -> AccountState:
+        """
+        :param account_root: The AccountRoot fields, as returned by account_info or in transaction metadata
+        :param ledger_index: The ledger the fields were read from
+        :param transaction_index: The position in the ledger of the transaction which left the account in this
+        state. States read with account_info count as the first of their ledger, any transaction validated in it
+        replaces them
+        """
+        return cls(account=account_root["Account"],
+                   sequence=account_root["Sequence"],
+                   balance=account_root.get("Balance", "0"),
+                   flags=account_root.get("Flags", 0),
+                   owner_count=account_root.get("OwnerCount", 0),
+                   minted_nftokens=account_root.get("MintedNFTokens", 0),
+                   first_nftoken_sequence=account_root.get("FirstNFTokenSequence", 0),
+                   ledger_index=ledger_index,
+                   transaction_index=transaction_index,
+                   updated=time.time())
+
+    def next_token_sequence(self) -> int:
+        """
+        :return: The token sequence of the next NFT the account mints
+        """
+        return self.first_nftoken_sequence + self.minted_nftokens
+
+
+class AccountStateCache:
+    """
+    The sequence, balance, flags and NFT counters of accounts, kept in a SQLite file of the CLI directory so that
+    back-to-back commands do not read them from the ledger again. States are written from account_info and from
+    the AccountRoot changes in the metadata of our validated transactions, a state is only replaced by a later one.
+    A state older than `max_age` is read from the ledger again; so is one invalidated after a submission showed
+    the account changed elsewhere.
+    """
+
+    def __init__(self, path: str = f"{default_path}/accounts.db", max_age: float = ACCOUNT_STATE_MAX_AGE) -> None:
+        self.__max_age = max_age
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        # A cache, losing the last states to a power cut only costs reading them again
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__db.execute(
+            "CREATE TABLE IF NOT EXISTS accounts ("
+            "network TEXT NOT NULL, "
+            "account TEXT NOT NULL, "
+            "sequence INTEGER NOT NULL, "
+            "balance TEXT NOT NULL, "
+            "flags INTEGER NOT NULL, "
+            "owner_count INTEGER NOT NULL, "
+            "minted_nftokens INTEGER NOT NULL, "
+            "first_nftoken_sequence INTEGER NOT NULL, "
+            "ledger_index INTEGER NOT NULL, "
+            "transaction_index INTEGER NOT NULL, "
+            "updated REAL NOT NULL, "
+            "PRIMARY KEY (network, account))"
+        )
+        self.__db.commit()
+
+    def get(self, network: str, account: str) -> Optional[AccountState]:
+        """
+        :return: The stored state of the account, None when there is none or it is too old to be used
+        """
+        with self.__lock:
+            row = self.__db.execute(f"SELECT {', '.join(_COLUMNS)} FROM accounts WHERE network = ? AND account = ? "
+                                    f"AND updated >= ?", (network, account, time.time() - self.__max_age)).fetchone()
+        return AccountState(*row) if row else None
+
+    def put(self, network: str, state: AccountState) -> None:
+        """
+        Stores the state of an account unless a later state of it is stored already.
+        """
+        with self.__lock, self.__db:
+            self.__db.execute(
+                f"INSERT INTO accounts (network, {', '.join(_COLUMNS)}) VALUES (?, {', '.join('?' * len(_COLUMNS))}) "
+                f"ON CONFLICT (network, account) DO UPDATE SET "
+                f"{', '.join(f'{column} = excluded.{column}' for column in _COLUMNS[1:])} "
+                f"WHERE (excluded.ledger_index, excluded.transaction_index) >= "
+                f"(accounts.ledger_index, accounts.transaction_index)",
+                (network, state.account, state.sequence, state.balance, state.flags, state.owner_count,
+                 state.minted_nftokens, state.first_nftoken_sequence, state.ledger_index, state.transaction_index,
+                 state.updated)
+            )
+
+    def observe_meta(self, network: str, meta: dict, ledger_index: int) -> None:
+        """
+        Stores the AccountRoots a validated transaction created or modified, of the sender and the other accounts.
+        :param meta: The metadata of the transaction
+        :param ledger_index: The ledger the transaction was validated in
+        """
+        transaction_index = meta.get("TransactionIndex", 0)
+        for node in meta.get("AffectedNodes", []):
+            kind, fields = next(iter(node.items()))
+            if fields.get("LedgerEntryType") != "AccountRoot":
+                continue
+            account_root = fields.get("FinalFields") or fields.get("NewFields") or {}
+            if kind == "DeletedNode":
+                self.invalidate(network, account_root["Account"])
+            elif "Account" in account_root and "Sequence" in account_root:
+                self.put(network, AccountState.from_account_root(account_root, ledger_index, transaction_index))
+
+    def invalidate(self, network: str, account: str) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute("DELETE FROM accounts WHERE network = ? AND account = ?", (network, account))
+
+    def close(self) -> None:
+        self.__db.close()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import asyncio
+from typing import Type, List, Optional, TYPE_CHECKING
+
+import xrpl
+from xrpl.models import Response, Transaction
+
+from .connection import XRPLConnection
+from .journal import JournalStatus, get_journal
+from .network_state import LEDGER_OFFSET
+from .tx import TransactionBuilder
+from .wallet import XRPLWallet
+from ..metrics import metrics
+
+if TYPE_CHECKING:
+    from .tickets import TicketPool
+from ..dto.memo import MyMemos
+
+
+class AsyncTransactionBuilder:
+    """
+    Asyncio counterpart of the TransactionBuilder running on the xrpl-py async clients.
+    The transactions are built by the TransactionBuilder, only signing and submission differ. Autofill goes
+    through the network state cache of the connection, which allocates sequences locally per account, so many
+    submissions from the same account can be awaited concurrently.
+    """
+
+    @classmethod
+    async def set_issuer(cls: Type[AsyncTransactionBuilder],
+                         conn: XRPLConnection,
+                         wallet: XRPLWallet,
+                         domain: str = None) -> Response:
+        issuer_settings_tx = TransactionBuilder.build_set_issuer(wallet=wallet, domain=domain)
+        return await cls._sign_and_submit(conn=conn, transaction=issuer_settings_tx, wallet=wallet)
+
+    @classmethod
+    async def set_distributor(cls: Type[AsyncTransactionBuilder],
+                              conn: XRPLConnection,
+                              wallet: XRPLWallet,
+                              domain: str = None) -> Response:
+        hot_settings_tx = TransactionBuilder.build_set_distributor(wallet=wallet, domain=domain)
+        return await cls._sign_and_submit(conn=conn, transaction=hot_settings_tx, wallet=wallet)
+
+    @classmethod
+    async def set_trustline(cls: Type[AsyncTransactionBuilder],
+                            conn: XRPLConnection,
+                            issuer: XRPLWallet,
+                            distributor: XRPLWallet,
+                            code: str,
+                            nft: bool) -> Response:
+        trust_set_tx = TransactionBuilder.build_trustline(issuer=issuer, distributor=distributor, code=code, nft=nft)
+        return await cls._sign_and_submit(conn=conn, transaction=trust_set_tx, wallet=distributor)
+
+    @classmethod
+    async def issue_nft(cls: Type[AsyncTransactionBuilder],
+                        conn: XRPLConnection,
+                        issuer: XRPLWallet,
+                        uri: str,
+                        taxon: int = 1,
+                        fees: int = 0,
+                        tickets: Optional[TicketPool] = None) -> Response:
+        mint_nft_tx = TransactionBuilder.build_nft_mint(issuer=issuer, uri=uri, taxon=taxon, fees=fees)
+        return await cls._sign_and_submit(conn=conn, transaction=mint_nft_tx, wallet=issuer, tickets=tickets)
+
+    @classmethod
+    async def issue_transaction_token(cls: Type[AsyncTransactionBuilder],
+                                      conn: XRPLConnection,
+                                      issuer: XRPLWallet,
+                                      distributor: XRPLWallet,
+                                      code: str,
+                                      memos: Optional[List[MyMemos]] = (),
+                                      tickets: Optional[TicketPool] = None
+                                      ) -> Response:
+        send_token_tx = TransactionBuilder.build_transaction_token(issuer=issuer, distributor=distributor,
+                                                                   code=code, memos=memos)
+        return await cls._sign_and_submit(conn=conn, transaction=send_token_tx, wallet=issuer, tickets=tickets)
+
+    @classmethod
+    async def burn_nft(cls: Type[AsyncTransactionBuilder],
+                       conn: XRPLConnection,
+                       issuer: XRPLWallet,
+                       token_id: str,
+                       tickets: Optional[TicketPool] = None
+                       ) -> Response:
+        burn_nft_tx = TransactionBuilder.build_nft_burn(issuer=issuer, token_id=token_id)
+        return await cls._sign_and_submit(conn=conn, transaction=burn_nft_tx, wallet=issuer, tickets=tickets)
+
+    @classmethod
+    async def send_nft(cls: Type[AsyncTransactionBuilder],
+                       conn: XRPLConnection,
+                       source: XRPLWallet,
+                       destination: str,
+                       token_id,
+                       tickets: Optional[TicketPool] = None) -> Response:
+        offer_nft_tx = TransactionBuilder.build_nft_offer(source=source, destination=destination, token_id=token_id)
+        return await cls._sign_and_submit(conn=conn, transaction=offer_nft_tx, wallet=source, tickets=tickets)
+
+    @classmethod
+    async def _sign_and_submit(cls: Type[AsyncTransactionBuilder],
+                               conn: XRPLConnection,
+                               transaction: Transaction,
+                               wallet: XRPLWallet,
+                               tickets: Optional[TicketPool] = None) -> Response:
+        try:
+            return await cls._sign_and_submit_once(conn=conn, transaction=transaction, wallet=wallet, tickets=tickets)
+        except xrpl.asyncio.transaction.XRPLReliableSubmissionException as ex:
+            if not TransactionBuilder._past_sequence(ex, tickets):
+                raise
+        # The local or stored sequence was stale and has been reset, it is read from the ledger for the retry
+        return await cls._sign_and_submit_once(conn=conn, transaction=transaction, wallet=wallet, tickets=tickets)
+
+    @classmethod
+    async def _sign_and_submit_once(cls: Type[AsyncTransactionBuilder],
+                                    conn: XRPLConnection,
+                                    transaction: Transaction,
+                                    wallet: XRPLWallet,
+                                    tickets: Optional[TicketPool] = None) -> Response:
+        state = conn.get_state()
+        client = conn.get_async_client()
+        account = wallet.get_wallet().classic_address
+        transaction_type = transaction.transaction_type.value
+
+        # Acquiring may wait for a TicketCreate to validate, which must not block the event loop
+        ticket = await asyncio.to_thread(tickets.acquire) if tickets is not None else None
+        journal = get_journal()
+        tx_hash = None
+        try:
+            with metrics.time("autofill", transaction_type=transaction_type):
+                transaction_json = transaction.to_dict()
+                if ticket is not None:
+                    transaction_json["sequence"] = 0
+                    transaction_json["ticket_sequence"] = ticket
+                else:
+                    transaction_json["sequence"] = await state.next_sequence_async(account, client)
+                transaction_json["fee"] = await state.fee_async(client)
+                transaction_json["last_ledger_sequence"] = await state.validated_ledger_async(client) + LEDGER_OFFSET
+            with metrics.time("sign", transaction_type=transaction_type):
+                prepared = await xrpl.asyncio.transaction.safe_sign_transaction(
+                    Transaction.from_dict(transaction_json), wallet.get_wallet())
+            tx_hash = journal.record_transaction(conn.get_network(), prepared) if journal is not None else None
+            with metrics.time("submit", transaction_type=transaction_type):
+                response = await TransactionBuilder._submit_and_wait(transaction=prepared, client=client)
+        except xrpl.asyncio.transaction.XRPLReliableSubmissionException as ex:
+            if journal is not None:
+                journal.record_failure(tx_hash, ex)
+            TransactionBuilder._settle_failure(state=state, account=account, error=ex, ticket=ticket,
+                                               tickets=tickets)
+            raise
+        except BaseException as ex:
+            # Failed before or while submitting with an unknown outcome, resume looks the transaction up
+            if tx_hash is not None:
+                journal.record_status(tx_hash, JournalStatus.SUBMITTED)
+            TransactionBuilder._settle_failure(state=state, account=account, error=ex, ticket=ticket,
+                                               tickets=tickets)
+            raise
+        if journal is not None:
+            journal.record_status(tx_hash, JournalStatus.VALIDATED, "tesSUCCESS")
+        if ticket is not None:
+            tickets.consume(ticket)
+        state.observe_transaction(response.result)
+        return response
@@ -0,0 +1,271 @@
+from __future__ import annotations
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Deque, Dict, List, Optional, Tuple
+
+from xrpl.models import SubmitOnly, Transaction, Tx
+
+from .connection import XRPLConnection
+from .journal import JournalStatus, get_journal
+from .network_state import LEDGER_OFFSET
+from .signing import ParallelSigner, hash_blob
+from .validation import ValidationOutcome, ValidationTracker, offer_id_from_meta
+from .wallet import XRPLWallet
+from ..metrics import metrics
+from ..dto.batch import BatchItemResult, BatchItemStatus
+
+
+@dataclass
+class _InFlight:
+    index: int
+    transaction: Transaction
+    attempts: int
+    sequence: int
+    last_ledger_sequence: int
+    future: Optional[Future] = None
+
+
+class BatchSubmitter:
+    """
+    Submits many transactions from a single account without waiting for each one to validate.
+    The account sequence is fetched once and then allocated locally through the network state cache of the
+    connection, every transaction is signed offline and a window of submissions is kept in flight. Results are
+    yielded as soon as their outcome is final. Whenever the window has room, the free slots are autofilled and
+    signed together, across processes when a ParallelSigner is given.
+
+    A transaction which did not consume its sequence (tef/tel results or an expired LastLedgerSequence) makes
+    the local sequence unreliable, so the submitter stops allocating, lets the window drain and re-reads the
+    sequence from the ledger before continuing. Expired transactions are retried up to `max_retries` times.
+
+    With a connected ValidationTracker the outcomes arrive over its WebSocket subscription and the in-flight
+    transactions are not polled; polling takes over whenever the tracker is disconnected or stays silent.
+    """
+
+    def __init__(self,
+                 conn: XRPLConnection,
+                 wallet: XRPLWallet,
+                 window: int = 20,
+                 max_retries: int = 2,
+                 ledger_offset: int = LEDGER_OFFSET,
+                 poll_interval: float = 1.0,
+                 signer: Optional[ParallelSigner] = None,
+                 tracker: Optional[ValidationTracker] = None) -> None:
+        self.__conn = conn
+        self.__window = max(1, window)
+        self.__max_retries = max_retries
+        self.__ledger_offset = ledger_offset
+        self.__poll_interval = poll_interval
+        self.__signer = signer or ParallelSigner([wallet], processes=1)
+        self.__tracker = tracker
+        self.__journal = get_journal()
+
+        self.__account = wallet.get_wallet().classic_address
+        self.__polled_ledger: Optional[int] = None
+        self.__needs_resync = False
+
+    def run(self, transactions: Iterable[Transaction]) -> Iterator[BatchItemResult]:
+        """
+        Submits the given unsigned transactions and yields one result per transaction as they become final.
+        :param transactions: Unsigned transactions without sequence, fee or LastLedgerSequence
+        :return: An iterator of results, in order of completion
+        """
+        source = iter(enumerate(transactions))
+        retry: Deque[Tuple[int, Transaction, int]] = deque()
+        in_flight: Dict[str, _InFlight] = {}
+        exhausted = False
+
+        while not exhausted or retry or in_flight:
+            if self.__needs_resync and not in_flight:
+                self.__conn.get_state().reset_sequence(self.__account)
+                self.__needs_resync = False
+
+            chunk: List[Tuple[int, Transaction, int]] = []
+            while len(in_flight) + len(chunk) < self.__window and not self.__needs_resync:
+                if retry:
+                    chunk.append(retry.popleft())
+                    continue
+                item = next(source, None)
+                if item is None:
+                    exhausted = True
+                    break
+                chunk.append((item[0], item[1], 0))
+            if chunk:
+                yield from self._submit_chunk(chunk, in_flight, retry)
+
+            if in_flight:
+                if self._is_tracked(in_flight):
+                    yield from self._wait_tracked(in_flight, retry)
+                else:
+                    time.sleep(self.__poll_interval)
+                    yield from self._poll(in_flight, retry)
+
+    def _submit_chunk(self,
+                      chunk: List[Tuple[int, Transaction, int]],
+                      in_flight: Dict[str, _InFlight],
+                      retry: Deque[Tuple[int, Transaction, int]]) -> Iterator[BatchItemResult]:
+        state = self.__conn.get_state()
+        client = self.__conn.get_client()
+        with metrics.time("autofill", transaction_type="batch"):
+            fee = state.fee(client)
+            last_ledger_sequence = state.validated_ledger(client) + self.__ledger_offset
+            sequences = [state.next_sequence(self.__account, client) for _ in chunk]
+            transactions = [self._autofill(transaction, sequence, fee, last_ledger_sequence)
+                            for (_, transaction, _), sequence in zip(chunk, sequences)]
+        with metrics.time("sign", transaction_type="batch"):
+            blobs = self.__signer.sign(transactions)
+        hashes = [hash_blob(blob) for blob in blobs]
+        if self.__journal is not None:
+            # One commit for the whole chunk, before any of it is submitted
+            self.__journal.record_signed(self.__conn.get_network(), self.__account,
+                                         zip(hashes, blobs, sequences, [last_ledger_sequence] * len(blobs)))
+
+        for position, ((index, transaction, attempts), sequence, blob, tx_hash) in \
+                enumerate(zip(chunk, sequences, blobs, hashes)):
+            future = None
+            if self.__tracker is not None:
+                # Registered before submitting, the validation may be streamed before the submit returns
+                future = self.__tracker.track(tx_hash, self.__account, last_ledger_sequence)
+            engine_result, error = self._submit(client, blob)
+            if engine_result.startswith(("tes", "ter", "tec")) or engine_result == "":
+                self._record([tx_hash], JournalStatus.SUBMITTED, engine_result or None)
+                in_flight[tx_hash] = _InFlight(index=index,
+                                               transaction=transaction,
+                                               attempts=attempts,
+                                               sequence=sequence,
+                                               last_ledger_sequence=last_ledger_sequence,
+                                               future=future)
+                if engine_result == "":
+                    self.__needs_resync = True
+                    self._requeue(chunk[position + 1:], retry)
+                    self._record(hashes[position + 1:], JournalStatus.DISCARDED)
+                    return
+                continue
+
+            # Nothing signed after this transaction can apply, those are signed again with new sequences
+            self._requeue(chunk[position + 1:], retry)
+            self._record(hashes[position + 1:], JournalStatus.DISCARDED)
+            # Not applied whatever the result, a retry is signed again
+            self._record([tx_hash], JournalStatus.FAILED, engine_result)
+            if self.__tracker is not None:
+                self.__tracker.forget(tx_hash)
+            if engine_result.startswith("tem"):
+                # Malformed, the sequence was not consumed and can be handed to the next transaction
+                state.set_sequence(self.__account, sequence)
+                yield BatchItemResult(index=index, status=BatchItemStatus.FAILED, hash=tx_hash,
+                                      sequence=sequence, engine_result=engine_result, error=error)
+                return
+
+            self.__needs_resync = True
+            if attempts < self.__max_retries:
+                retry.appendleft((index, transaction, attempts + 1))
+            else:
+                yield BatchItemResult(index=index, status=BatchItemStatus.FAILED, hash=tx_hash,
+                                      sequence=sequence, engine_result=engine_result, error=error)
+            return
+
+    def _poll(self,
+              in_flight: Dict[str, _InFlight],
+              retry: Deque[Tuple[int, Transaction, int]]) -> Iterator[BatchItemResult]:
+        latest = self.__conn.get_state().validated_ledger(self.__conn.get_client(), refresh=True)
+        if latest == self.__polled_ledger:
+            # No ledger closed since the last poll, nothing can have changed
+            return
+        self.__polled_ledger = latest
+
+        for tx_hash, pending in list(in_flight.items()):
+            response = self.__conn.get_client().request(Tx(transaction=tx_hash))
+            result = response.result
+            if response.is_successful() and result.get("validated"):
+                self.__conn.get_state().observe_transaction(result)
+                yield from self._finish(tx_hash, in_flight, retry, ValidationOutcome(
+                    hash=tx_hash,
+                    validated=True,
+                    engine_result=result["meta"]["TransactionResult"],
+                    ledger_index=result.get("ledger_index"),
+                    nftoken_id=result["meta"].get("nftoken_id"),
+                    offer_id=offer_id_from_meta(result["meta"])))
+            elif latest >= pending.last_ledger_sequence:
+                yield from self._finish(tx_hash, in_flight, retry, ValidationOutcome(hash=tx_hash, validated=False))
+
+    def _is_tracked(self, in_flight: Dict[str, _InFlight]) -> bool:
+        return self.__tracker is not None and self.__tracker.is_connected() and \
+            all(pending.future is not None for pending in in_flight.values())
+
+    def _wait_tracked(self,
+                      in_flight: Dict[str, _InFlight],
+                      retry: Deque[Tuple[int, Transaction, int]]) -> Iterator[BatchItemResult]:
+        futures = {pending.future: tx_hash for tx_hash, pending in in_flight.items()}
+        done, _ = wait(futures, timeout=self.__poll_interval * 10, return_when=FIRST_COMPLETED)
+        if not done:
+            # The stream stayed silent for several ledgers, make sure nothing was missed
+            yield from self._poll(in_flight, retry)
+            return
+        for future in done:
+            if futures[future] in in_flight:
+                yield from self._finish(futures[future], in_flight, retry, future.result())
+
+    def _finish(self,
+                tx_hash: str,
+                in_flight: Dict[str, _InFlight],
+                retry: Deque[Tuple[int, Transaction, int]],
+                outcome: ValidationOutcome) -> Iterator[BatchItemResult]:
+        pending = in_flight.pop(tx_hash)
+        if self.__tracker is not None:
+            self.__tracker.forget(tx_hash)
+        if not outcome.validated:
+            self._record([tx_hash], JournalStatus.EXPIRED)
+        elif outcome.engine_result == "tesSUCCESS":
+            self._record([tx_hash], JournalStatus.VALIDATED, outcome.engine_result)
+        else:
+            self._record([tx_hash], JournalStatus.FAILED, outcome.engine_result)
+        if outcome.validated:
+            yield BatchItemResult(
+                index=pending.index,
+                status=BatchItemStatus.VALIDATED if outcome.engine_result == "tesSUCCESS" else BatchItemStatus.FAILED,
+                hash=tx_hash,
+                sequence=pending.sequence,
+                engine_result=outcome.engine_result,
+                ledger_index=outcome.ledger_index,
+                nftoken_id=outcome.nftoken_id,
+                offer_id=outcome.offer_id)
+            return
+
+        # Expired, the sequence was not consumed
+        self.__needs_resync = True
+        if pending.attempts < self.__max_retries:
+            retry.append((pending.index, pending.transaction, pending.attempts + 1))
+        else:
+            yield BatchItemResult(index=pending.index, status=BatchItemStatus.EXPIRED, hash=tx_hash,
+                                  sequence=pending.sequence)
+
+    @staticmethod
+    def _submit(client, blob: str) -> Tuple[str, Optional[str]]:
+        """
+        :return: The engine result of the submission and its message, an empty result when the submit failed
+        """
+        try:
+            response = client.request(SubmitOnly(tx_blob=blob))
+            return response.result.get("engine_result", ""), \
+                response.result.get("engine_result_message", response.result.get("error_message"))
+        except Exception as ex:
+            # The node may or may not have seen the transaction, let it expire and re-read the sequence
+            return "", str(ex)
+
+    def _record(self, hashes: List[str], status: JournalStatus, engine_result: Optional[str] = None) -> None:
+        if self.__journal is not None:
+            for tx_hash in hashes:
+                self.__journal.record_status(tx_hash, status, engine_result)
+
+    @staticmethod
+    def _requeue(items: List[Tuple[int, Transaction, int]], retry: Deque[Tuple[int, Transaction, int]]) -> None:
+        retry.extendleft(reversed(items))
+
+    @staticmethod
+    def _autofill(transaction: Transaction, sequence: int, fee: str, last_ledger_sequence: int) -> dict:
+        transaction_json = transaction.to_xrpl()
+        transaction_json["Sequence"] = sequence
+        transaction_json["Fee"] = fee
+        transaction_json["LastLedgerSequence"] = last_ledger_sequence
+        return transaction_json
@@ -1,14 +1,471 @@
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from json import JSONDecodeError
+from typing import Dict, List, Optional, Tuple, Type
+
+import httpx
+from xrpl.asyncio.clients import AsyncJsonRpcClient, XRPLRequestFailureException, json_to_response, \
+    request_to_json_rpc
 from xrpl.clients import JsonRpcClient
+from xrpl.models import Request, Response, ServerInfo
+
+from orjson import orjson
+
+from .account_state import AccountStateCache
+from .network_state import NetworkStateCache
+from .validation import ValidationTracker
+from ..metrics import metrics
+from ..my_io.file_io import MyFileIO
+from ..settings import default_path
+
+# rippled errors meaning "this node cannot answer right now", the request is retried on the next endpoint
+_FAILOVER_ERRORS = {"tooBusy", "noNetwork", "noCurrent", "noClosed", "amendmentBlocked", "slowDown"}
+_HEALTHY_STATES = {"full", "proposing", "validating"}
+# Validated ledgers an endpoint may lag behind the freshest one and still count as healthy
+MAX_LEDGER_LAG = 2
+_LATENCY_WEIGHT = 0.2
+# Probe results older than this are not used to order the endpoints of a new connection
+PROBE_MAX_AGE = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class EndpointProbe:
+    url: str
+    kind: str
+    latency: Optional[float] = None
+    server_state: Optional[str] = None
+    validated_ledger: Optional[int] = None
+    ledger_lag: Optional[int] = None
+    healthy: bool = False
+    error: Optional[str] = None
+
+
+class EndpointPool:
+    """
+    The endpoints of one network and their health. Requests go to the healthy endpoints, fastest first by their
+    measured latency and in order of preference while unmeasured; an endpoint which fails is skipped until its
+    cool-down has passed.
+    """
+
+    def __init__(self, urls: List[str], cooldown: float = 30.0) -> None:
+        if not urls:
+            raise ValueError("At least one JSON-RPC url is needed to connect to the XRPL")
+        self.__urls = list(dict.fromkeys(urls))
+        self.__cooldown = cooldown
+        self.__retry_at: Dict[str, float] = {}
+        self.__latency: Dict[str, float] = {}
+        self.__lock = threading.Lock()
+
+    def get_urls(self) -> List[str]:
+        return list(self.__urls)
+
+    def ordered(self) -> List[str]:
+        """
+        :return: The healthy endpoints in order of preference followed by the endpoints cooling down
+        """
+        now = time.monotonic()
+        with self.__lock:
+            healthy = [url for url in self.__urls if self.__retry_at.get(url, 0.0) <= now]
+            # Stable, the unmeasured endpoints keep their order behind the measured ones
+            healthy.sort(key=lambda url: self.__latency.get(url, float("inf")))
+            cooling = sorted((url for url in self.__urls if url not in healthy), key=self.__retry_at.get)
+        return healthy + cooling
+
+    def mark_success(self, url: str, latency: float) -> None:
+        with self.__lock:
+            self.__retry_at.pop(url, None)
+            previous = self.__latency.get(url)
+            # Smoothed, a single slow response does not reorder the endpoints
+            self.__latency[url] = latency if previous is None else previous + _LATENCY_WEIGHT * (latency - previous)
+
+    def mark_failure(self, url: str) -> None:
+        with self.__lock:
+            self.__retry_at[url] = time.monotonic() + self.__cooldown
+
+    def get_latency(self, url: str) -> Optional[float]:
+        return self.__latency.get(url)
+
+    def seed(self, latencies: Dict[str, Optional[float]]) -> None:
+        """
+        Orders the endpoints by earlier measurements, a latency of None takes the endpoint out of rotation.
+        """
+        for url, latency in latencies.items():
+            if url not in self.__urls:
+                continue
+            if latency is None:
+                self.mark_failure(url)
+            else:
+                with self.__lock:
+                    self.__latency[url] = latency
+
+
+def _parse(http_response: httpx.Response) -> Response:
+    try:
+        return json_to_response(http_response.json())
+    except JSONDecodeError:
+        raise XRPLRequestFailureException(
+            {
+                "error": http_response.status_code,
+                "error_message": http_response.text,
+            }
+        )
+
+
+def _should_failover(http_response: httpx.Response) -> bool:
+    if http_response.status_code >= 500 or http_response.status_code == 429:
+        return True
+    try:
+        return http_response.json().get("result", {}).get("error") in _FAILOVER_ERRORS
+    except (JSONDecodeError, AttributeError):
+        return False
+
+
+class PooledJsonRpcClient(JsonRpcClient):
+    """
+    Synchronous JSON-RPC client keeping its HTTP connections alive between requests and failing over between
+    the endpoints of an EndpointPool. xrpl-py runs every synchronous helper in a throw-away event loop, so the
+    requests are made with a blocking HTTP client which outlives those loops.
+    """
+
+    def __init__(self, pool: EndpointPool, limits: httpx.Limits, timeout: float) -> None:
+        super().__init__(pool.get_urls()[0])
+        self.__pool = pool
+        self.__http = httpx.Client(limits=limits, timeout=timeout)
+
+    def request(self, request: Request) -> Response:
+        return self._post(request_to_json_rpc(request))
+
+    async def _request_impl(self, request: Request) -> Response:
+        return self._post(request_to_json_rpc(request))
+
+    def request_endpoint(self, url: str, request: Request) -> Response:
+        """
+        Sends a request to one specific endpoint, bypassing the failover.
+        """
+        return _parse(self.__http.post(url, json=request_to_json_rpc(request)))
+
+    def _post(self, payload: dict) -> Response:
+        last_error: Optional[Exception] = None
+        for url in self.__pool.ordered():
+            start = time.perf_counter()
+            try:
+                http_response = self.__http.post(url, json=payload)
+            except httpx.HTTPError as ex:
+                self.__pool.mark_failure(url)
+                metrics.observe("rpc", time.perf_counter() - start, method=payload["method"], endpoint=url,
+                                outcome="error")
+                last_error = ex
+                continue
+            if _should_failover(http_response):
+                self.__pool.mark_failure(url)
+                metrics.observe("rpc", time.perf_counter() - start, method=payload["method"], endpoint=url,
+                                outcome="failover")
+                last_error = XRPLRequestFailureException({"error": http_response.status_code,
+                                                          "error_message": http_response.text})
+                continue
+            elapsed = time.perf_counter() - start
+            self.__pool.mark_success(url, elapsed)
+            metrics.observe("rpc", elapsed, method=payload["method"], endpoint=url, outcome="ok")
+            return _parse(http_response)
+        raise XRPLRequestFailureException({"error": "noEndpoint", "error_message": str(last_error)})
+
+    def close(self) -> None:
+        self.__http.close()
+
+
+class PooledAsyncJsonRpcClient(AsyncJsonRpcClient):
+    """
+    Asynchronous counterpart of the PooledJsonRpcClient. The keep-alive HTTP client is bound to the event loop
+    it was first used in and re-created when it is used from another loop.
+    """
+
+    def __init__(self, pool: EndpointPool, limits: httpx.Limits, timeout: float) -> None:
+        super().__init__(pool.get_urls()[0])
+        self.__pool = pool
+        self.__limits = limits
+        self.__timeout = timeout
+        self.__http: Optional[httpx.AsyncClient] = None
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        http = self.__http
+        if http is None or self.__loop is not loop:
+            previous, http = http, httpx.AsyncClient(limits=self.__limits, timeout=self.__timeout)
+            self.__http, self.__loop = http, loop
+            if previous is not None:
+                await _aclose_quietly(previous)
+        return http
+
+    async def _request_impl(self, request: Request) -> Response:
+        payload = request_to_json_rpc(request)
+        http = await self._get_http()
+        last_error: Optional[Exception] = None
+        for url in self.__pool.ordered():
+            start = time.perf_counter()
+            try:
+                http_response = await http.post(url, json=payload)
+            except httpx.HTTPError as ex:
+                self.__pool.mark_failure(url)
+                metrics.observe("rpc", time.perf_counter() - start, method=payload["method"], endpoint=url,
+                                outcome="error")
+                last_error = ex
+                continue
+            if _should_failover(http_response):
+                self.__pool.mark_failure(url)
+                metrics.observe("rpc", time.perf_counter() - start, method=payload["method"], endpoint=url,
+                                outcome="failover")
+                last_error = XRPLRequestFailureException({"error": http_response.status_code,
+                                                          "error_message": http_response.text})
+                continue
+            elapsed = time.perf_counter() - start
+            self.__pool.mark_success(url, elapsed)
+            metrics.observe("rpc", elapsed, method=payload["method"], endpoint=url, outcome="ok")
+            return _parse(http_response)
+        raise XRPLRequestFailureException({"error": "noEndpoint", "error_message": str(last_error)})
+
+    async def close(self) -> None:
+        if self.__http is not None:
+            await self.__http.aclose()
+            self.__http = None
+
+    def close_sync(self) -> None:
+        """
+        Closes the HTTP client from synchronous code: on its event loop while that is open, otherwise on a new one.
+        """
+        http, loop = self.__http, self.__loop
+        self.__http, self.__loop = None, None
+        if http is None:
+            return
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.create_task, http.aclose())
+        elif loop is not None and not loop.is_closed():
+            loop.run_until_complete(http.aclose())
+        else:
+            asyncio.run(_aclose_quietly(http))
+
+
+async def _aclose_quietly(http: httpx.AsyncClient) -> None:
+    try:
+        await http.aclose()
+    except RuntimeError:
+        # The connections belonged to an event loop which is closed, the client is marked closed and they go with it
+        pass
 
 
 class XRPLConnection:
+    """
+    Connection manager for one XRPL network. It holds a bounded pool of keep-alive HTTP connections spread over
+    all the JSON-RPC endpoints of the network and fails over to the next endpoint when one is down or lagging.
+    Use `for_network` to share one connection per network within the process. With WebSocket endpoints the
+    connection also offers a validation tracker, opened on first use on the fastest endpoint which connects.
+    The connections of `for_network` keep the account states in the CLI directory, shared with later commands.
+    """
 
-    def __init__(self,  json_rpc_url: str):
-        self.__json_rpc_url = json_rpc_url
-        try:
-            self.__client = JsonRpcClient(self.__json_rpc_url)
-        except Exception as ex:
-            print(f"An exception occurred: {ex}")
+    _connections: Dict[Tuple[str, str], XRPLConnection] = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self,
+                 json_rpc_url: str = None,
+                 json_rpc_urls: List[str] = None,
+                 max_connections: int = 20,
+                 timeout: float = 10.0,
+                 state_ttl: float = 3.0,
+                 ws_url: str = None,
+                 network: str = None,
+                 ws_urls: List[str] = None,
+                 accounts: Optional[AccountStateCache] = None):
+        urls = ([json_rpc_url] if json_rpc_url else []) + list(json_rpc_urls or [])
+        self.__pool = EndpointPool(urls)
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.__client = PooledJsonRpcClient(self.__pool, limits=limits, timeout=timeout)
+        self.__async_client = PooledAsyncJsonRpcClient(self.__pool, limits=limits, timeout=timeout)
+        self.__accounts = accounts
+        self.__state = NetworkStateCache(ttl=state_ttl, accounts=accounts, network=network)
+        ws = ([ws_url] if ws_url else []) + list(ws_urls or [])
+        self.__ws_pool = EndpointPool(ws) if ws else None
+        self.__network = network
+        self.__tracker: Optional[ValidationTracker] = None
+        self.__tracker_lock = threading.Lock()
+
+    @classmethod
+    def for_network(cls: Type[XRPLConnection], network: str, path: str = default_path) -> XRPLConnection:
+        """
+        Returns the shared connection of a network of the `networks` file, creating it on first use. Its endpoints
+        are ordered by the results of the last `xrpl network probe`.
+        :param network: The name of the network
+        :param path: The CLI directory with the `networks` file, the probe results and the account states
+        :return: The connection to the network
+        """
+        from filedgr_xrpl_cli.dto.network import load_networks
+
+        with cls._connections_lock:
+            if (path, network) not in cls._connections:
+                definition = load_networks(path)[network]
+                # Kept in the CLI directory once `xrpl init` created it
+                accounts = AccountStateCache(f"{path}/accounts.db") if os.path.isdir(path) else None
+                connection = XRPLConnection(json_rpc_urls=definition.json_rpc_urls(),
+                                            ws_urls=definition.ws_urls(),
+                                            network=network,
+                                            accounts=accounts)
+                connection.seed_latencies(load_probe_results(network, path))
+                cls._connections[(path, network)] = connection
+            return cls._connections[(path, network)]
+
+    @classmethod
+    def close_all(cls: Type[XRPLConnection]) -> None:
+        """
+        Closes the shared connections of all networks.
+        """
+        with cls._connections_lock:
+            for connection in cls._connections.values():
+                connection.close()
+            cls._connections.clear()
+
+    def get_network(self) -> Optional[str]:
+        """
+        :return: The name of the network of a connection made by `for_network`
+        """
+        return self.__network
 
     def get_client(self) -> JsonRpcClient:
         return self.__client
+
+    def get_async_client(self) -> AsyncJsonRpcClient:
+        return self.__async_client
+
+    def get_state(self) -> NetworkStateCache:
+        return self.__state
+
+    def get_endpoints(self) -> EndpointPool:
+        return self.__pool
+
+    def get_ws_endpoints(self) -> Optional[EndpointPool]:
+        return self.__ws_pool
+
+    def seed_latencies(self, latencies: Dict[str, Optional[float]]) -> None:
+        self.__pool.seed(latencies)
+        if self.__ws_pool is not None:
+            self.__ws_pool.seed(latencies)
+
+    def get_tracker(self) -> Optional[ValidationTracker]:
+        """
+        :return: The connected validation tracker of the network, None when the network has no WebSocket endpoint
+        or it cannot be reached
+        """
+        with self.__tracker_lock:
+            if self.__tracker is None or not self.__tracker.is_connected():
+                self.__tracker = None
+                for url in self.__ws_pool.ordered() if self.__ws_pool is not None else []:
+                    start = time.perf_counter()
+                    tracker = ValidationTracker(url, state=self.__state)
+                    if tracker.start():
+                        self.__ws_pool.mark_success(url, time.perf_counter() - start)
+                        self.__tracker = tracker
+                        break
+                    self.__ws_pool.mark_failure(url)
+            return self.__tracker
+
+    def check_health(self) -> Dict[str, bool]:
+        """
+        Asks every JSON-RPC endpoint for its server state and takes the ones which are not in sync out of rotation.
+        :return: The health of every endpoint by url
+        """
+        return {probe.url: probe.healthy for probe in self.probe(ws=False)}
+
+    def probe(self, ws: bool = True) -> List[EndpointProbe]:
+        """
+        Measures the latency and validated ledger of every endpoint concurrently. The endpoints are ordered by their
+        latency, the ones which are not in sync or lag more than MAX_LEDGER_LAG ledgers behind the freshest one are
+        taken out of rotation.
+        :param ws: Probe the WebSocket endpoints as well
+        :return: One probe per endpoint
+        """
+        targets = [(url, "json_rpc") for url in self.__pool.get_urls()]
+        if ws and self.__ws_pool is not None:
+            targets += [(url, "ws") for url in self.__ws_pool.get_urls()]
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            probes = list(executor.map(lambda target: self._probe_endpoint(*target), targets))
+
+        freshest = max((probe.validated_ledger for probe in probes if probe.validated_ledger), default=None)
+        results = []
+        for probe in probes:
+            lag = freshest - probe.validated_ledger if probe.validated_ledger else None
+            healthy = probe.error is None and probe.server_state in _HEALTHY_STATES and \
+                (lag is None or lag <= MAX_LEDGER_LAG)
+            pool = self.__pool if probe.kind == "json_rpc" else self.__ws_pool
+            if healthy:
+                pool.mark_success(probe.url, probe.latency)
+            else:
+                pool.mark_failure(probe.url)
+            results.append(replace(probe, ledger_lag=lag, healthy=healthy))
+        return results
+
+    def _probe_endpoint(self, url: str, kind: str) -> EndpointProbe:
+        start = time.perf_counter()
+        try:
+            if kind == "json_rpc":
+                response = self.__client.request_endpoint(url, ServerInfo())
+            else:
+                from xrpl.clients import WebsocketClient
+
+                with WebsocketClient(url) as client:
+                    # Only the request, not the handshake, is comparable to the JSON-RPC latency
+                    start = time.perf_counter()
+                    response = client.request(ServerInfo())
+        except Exception as ex:
+            return EndpointProbe(url=url, kind=kind, error=str(ex) or type(ex).__name__)
+        latency = time.perf_counter() - start
+        if not response.is_successful():
+            return EndpointProbe(url=url, kind=kind, latency=latency, error=response.result.get("error", "error"))
+        info = response.result["info"]
+        return EndpointProbe(url=url, kind=kind, latency=latency, server_state=info.get("server_state"),
+                             validated_ledger=info.get("validated_ledger", {}).get("seq"))
+
+    def close(self) -> None:
+        self.__client.close()
+        self.__async_client.close_sync()
+        with self.__tracker_lock:
+            if self.__tracker is not None:
+                self.__tracker.close()
+                self.__tracker = None
+        if self.__accounts is not None:
+            self.__accounts.close()
+            self.__accounts = None
+
+
+def save_probe_results(network: str, probes: List[EndpointProbe], path: str = default_path) -> None:
+    """
+    Keeps the latency of every healthy endpoint of a network, None for the others, for new connections to start
+    on the fastest endpoint.
+    """
+    probes_file = f"{path}/probes.json"
+    results = {}
+    if os.path.exists(probes_file):
+        with open(probes_file, "rb") as file:
+            results = orjson.loads(file.read())
+    results[network] = {"time": time.time(),
+                        "latency": {probe.url: probe.latency if probe.healthy else None for probe in probes}}
+    os.makedirs(path, exist_ok=True)
+    MyFileIO.write_to_file(probes_file, orjson.dumps(results))
+
+
+def load_probe_results(network: str,
+                       path: str = default_path,
+                       max_age: float = PROBE_MAX_AGE) -> Dict[str, Optional[float]]:
+    """
+    :return: The latency of the endpoints of a network by url from the last probe, empty when it is too old
+    """
+    probes_file = f"{path}/probes.json"
+    if not os.path.exists(probes_file):
+        return {}
+    with open(probes_file, "rb") as file:
+        result = orjson.loads(file.read()).get(network)
+    if result is None or time.time() - result["time"] > max_age:
+        return {}
+    return result["latency"]
@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def encode_currency(code: str) -> str:
+    """
+    Encodes a token code the way the CLI issues its tokens: the UTF-8 bytes of the code as a 160-bit hex currency
+    code, padded with zeros. Codes are encoded once per process and shared by all transactions using them.
+    :param code: The token code
+    :return: The 40 character, upper case hex currency code
+    """
+    return code.encode("utf-8").hex().upper().ljust(40, "0")
+
+
+@lru_cache(maxsize=1024)
+def decode_currency(code: str) -> str:
+    """
+    :param code: A currency code as it appears in the XRPL JSON, ISO or 160-bit hex
+    :return: The text of a nonstandard hex currency code, the code itself otherwise
+    """
+    if len(code) != 40:
+        return code
+    try:
+        text = bytes.fromhex(code).rstrip(b"\0").decode("utf-8")
+    except ValueError:
+        return code
+    # ISO codes in hex and other reserved codes start with a zero byte
+    return text if text and text.isprintable() else code
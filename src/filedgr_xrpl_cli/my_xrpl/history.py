@@ -0,0 +1,229 @@
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import List, Optional, Union
+
+from orjson import orjson
+from xrpl.clients import XRPLRequestFailureException
+from xrpl.ledger import get_latest_validated_ledger_sequence
+from xrpl.models import AccountTx
+from xrpl.utils import drops_to_xrp, ripple_time_to_datetime
+
+from .connection import XRPLConnection
+from .currency import decode_currency
+from ..dto.export_format import ExportFormat
+from ..my_io.file_io import MyFileIO
+
+DEFAULT_ROWS_PER_PART = 100000
+
+_PARQUET_INT_COLUMNS = ("ledger_index", "sequence")
+_PARQUET_STRING_COLUMNS = ("hash", "date", "transaction_type", "account", "destination", "result", "fee",
+                           "amount", "currency", "issuer", "delivered_amount", "nftoken_id", "memos")
+
+
+class AccountHistoryExporter:
+    """
+    Streams the transaction history of an account, oldest first, into an NDJSON file or a directory of Parquet
+    files, one page of account_tx at a time. After every page written a checkpoint next to the output records the
+    marker of the next page, an interrupted export resumes from it. Running a finished export again appends the
+    transactions of the ledgers validated since.
+    """
+
+    def __init__(self, conn: XRPLConnection, account: str, page_size: int = 400) -> None:
+        self.__conn = conn
+        self.__account = account
+        self.__page_size = page_size
+
+    def export(self,
+               output: str,
+               output_format: ExportFormat = ExportFormat.NDJSON,
+               rows_per_part: int = DEFAULT_ROWS_PER_PART) -> int:
+        """
+        :param output: The NDJSON file, or the directory of the Parquet files
+        :param output_format: The format to write
+        :param rows_per_part: The number of transactions per Parquet file
+        :return: The number of transactions written by this run
+        """
+        client = self.__conn.get_client()
+        checkpoint_path = f"{output}.checkpoint"
+        checkpoint = self._load_checkpoint(checkpoint_path, output, output_format)
+        if checkpoint is None or checkpoint["complete"]:
+            ledger_index_max = get_latest_validated_ledger_sequence(client)
+            ledger_index_min = checkpoint["ledger_index_max"] + 1 if checkpoint else -1
+            if ledger_index_min > ledger_index_max:
+                return 0
+            checkpoint = {
+                "account": self.__account,
+                "format": output_format.value,
+                "ledger_index_min": ledger_index_min,
+                "ledger_index_max": ledger_index_max,
+                "marker": None,
+                "complete": False,
+                "rows": checkpoint["rows"] if checkpoint else 0,
+                "writer": checkpoint["writer"] if checkpoint else {},
+            }
+
+        writer = _open_writer(output_format, output, checkpoint["writer"], rows_per_part)
+        written = 0
+        pending = 0
+        # The page to read next, ahead of the checkpointed marker while a writer buffers rows
+        next_marker = checkpoint["marker"]
+        try:
+            while True:
+                response = client.request(AccountTx(account=self.__account,
+                                                    ledger_index_min=checkpoint["ledger_index_min"],
+                                                    ledger_index_max=checkpoint["ledger_index_max"],
+                                                    forward=True,
+                                                    limit=self.__page_size,
+                                                    marker=next_marker))
+                if not response.is_successful():
+                    raise XRPLRequestFailureException(response.result)
+                for entry in response.result.get("transactions", []):
+                    writer.write(to_record(entry))
+                    pending += 1
+                next_marker = response.result.get("marker")
+                state = writer.commit(final=next_marker is None)
+                if state is not None:
+                    # Only what the writer persisted is covered by the checkpoint
+                    checkpoint.update(marker=next_marker, complete=next_marker is None, writer=state,
+                                      rows=checkpoint["rows"] + pending)
+                    written += pending
+                    pending = 0
+                    _save_checkpoint(checkpoint_path, checkpoint)
+                if next_marker is None:
+                    return written
+        finally:
+            writer.close()
+
+    def _load_checkpoint(self, path: str, output: str, output_format: ExportFormat) -> Optional[dict]:
+        if not (os.path.exists(path) and os.path.exists(output)):
+            return None
+        with open(path, "rb") as file:
+            checkpoint = orjson.loads(file.read())
+        if (checkpoint["account"], checkpoint["format"]) != (self.__account, output_format.value):
+            raise ValueError(f"{output} is an {checkpoint['format']} export of {checkpoint['account']}")
+        return checkpoint
+
+
+def to_record(entry: dict) -> dict:
+    """
+    Flattens one transaction of account_tx into an export row, with decoded memos, currency codes and amounts.
+    :param entry: The transaction with its metadata as returned by account_tx
+    :return: The export row
+    """
+    tx = entry["tx"]
+    meta = entry.get("meta") or {}
+    amount, currency, issuer = _decode_amount(tx.get("Amount", tx.get("LimitAmount")))
+    return {
+        "hash": tx.get("hash"),
+        "ledger_index": tx.get("ledger_index"),
+        "date": ripple_time_to_datetime(tx["date"]).isoformat() if "date" in tx else None,
+        "transaction_type": tx.get("TransactionType"),
+        "account": tx.get("Account"),
+        "destination": tx.get("Destination"),
+        "result": meta.get("TransactionResult"),
+        "fee": tx.get("Fee"),
+        "sequence": tx.get("Sequence") or tx.get("TicketSequence"),
+        "amount": amount,
+        "currency": currency,
+        "issuer": issuer,
+        "delivered_amount": _decode_amount(meta.get("delivered_amount"))[0],
+        "nftoken_id": tx.get("NFTokenID", meta.get("nftoken_id")),
+        "memos": [{"type": _decode_hex(memo["Memo"].get("MemoType")),
+                   "format": _decode_hex(memo["Memo"].get("MemoFormat")),
+                   "data": _decode_hex(memo["Memo"].get("MemoData"))} for memo in tx.get("Memos", [])],
+    }
+
+
+def _decode_amount(amount: Union[str, dict, None]) -> tuple:
+    if amount is None or amount == "unavailable":
+        return None, None, None
+    if isinstance(amount, str):
+        return str(drops_to_xrp(amount)), "XRP", None
+    return amount["value"], decode_currency(amount["currency"]), amount["issuer"]
+
+
+def _decode_hex(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return value
+    try:
+        return bytes.fromhex(value).decode("utf-8")
+    except ValueError:
+        # Binary data stays hex encoded
+        return value
+
+
+def _save_checkpoint(path: str, checkpoint: dict) -> None:
+    MyFileIO.write_to_file(path, orjson.dumps(checkpoint))
+
+
+class _NdjsonWriter:
+
+    def __init__(self, path: str, state: dict) -> None:
+        offset = state.get("offset", 0)
+        if offset:
+            # Drop what was written after the last checkpoint
+            self.__file = open(path, "r+b")
+            self.__file.truncate(offset)
+            self.__file.seek(offset)
+        else:
+            self.__file = open(path, "wb")
+
+    def write(self, record: dict) -> None:
+        self.__file.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+    def commit(self, final: bool) -> Optional[dict]:
+        self.__file.flush()
+        # On disk before the checkpoint refers to it
+        os.fsync(self.__file.fileno())
+        return {"offset": self.__file.tell()}
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class _ParquetWriter:
+
+    def __init__(self, path: str, state: dict, rows_per_part: int) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet exports need pyarrow: pip install filedgr-xrpl-cli[parquet]")
+        self.__pyarrow = pyarrow
+        self.__path = Path(path)
+        self.__path.mkdir(parents=True, exist_ok=True)
+        self.__parts = state.get("parts", 0)
+        self.__rows_per_part = rows_per_part
+        self.__rows: List[dict] = []
+        self.__schema = pyarrow.schema([(column, pyarrow.int64()) for column in _PARQUET_INT_COLUMNS])
+        for column in _PARQUET_STRING_COLUMNS:
+            self.__schema = self.__schema.append(pyarrow.field(column, pyarrow.string()))
+        # Drop the parts written after the last checkpoint
+        for part in self.__path.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= self.__parts:
+                part.unlink()
+
+    def write(self, record: dict) -> None:
+        self.__rows.append(dict(record, memos=orjson.dumps(record["memos"]).decode("utf-8")))
+
+    def commit(self, final: bool) -> Optional[dict]:
+        if len(self.__rows) < self.__rows_per_part and not (final and self.__rows):
+            return {"parts": self.__parts} if final else None
+        table = self.__pyarrow.Table.from_pylist(self.__rows, schema=self.__schema)
+        self.__pyarrow.parquet.write_table(table, self.__path / f"part-{self.__parts:05d}.parquet")
+        self.__parts += 1
+        self.__rows = []
+        return {"parts": self.__parts}
+
+    def close(self) -> None:
+        self.__rows = []
+
+
+def _open_writer(output_format: ExportFormat,
+                 path: str,
+                 state: dict,
+                 rows_per_part: int) -> Union[_NdjsonWriter, _ParquetWriter]:
+    if output_format == ExportFormat.PARQUET:
+        return _ParquetWriter(path, state, rows_per_part)
+    return _NdjsonWriter(path, state)
@@ -0,0 +1,258 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from enum import Enum
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+from ..settings import default_path
+
+if TYPE_CHECKING:
+    from xrpl.models import Transaction
+
+    from .connection import XRPLConnection
+
+# Path of the submission journal, an empty value disables it
+JOURNAL_ENV = "XRPL_CLI_JOURNAL"
+JOURNAL_NAME = "journal.db"
+DEFAULT_JOURNAL_PATH = f"{default_path}/{JOURNAL_NAME}"
+# Seconds the settled transactions are kept, the outstanding ones are kept until they are settled
+JOURNAL_RETENTION = 7 * 24 * 3600
+
+_COLUMNS = ("hash", "network", "account", "sequence", "last_ledger_sequence", "blob", "status", "engine_result")
+_OUTSTANDING = "status IN ('signed', 'submitted')"
+_SETTLED = "status NOT IN ('signed', 'submitted')"
+
+_journal_path: Optional[str] = None
+_journal_default = False
+_journal: Optional[SubmissionJournal] = None
+_journal_lock = threading.Lock()
+
+
+class JournalStatus(Enum):
+    SIGNED = "signed"
+    SUBMITTED = "submitted"
+    VALIDATED = "validated"
+    FAILED = "failed"
+    EXPIRED = "expired"
+    # Signed but never submitted, its sequence was handed to another transaction
+    DISCARDED = "discarded"
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    hash: str
+    network: str
+    account: str
+    sequence: int
+    last_ledger_sequence: int
+    blob: str
+    status: JournalStatus
+    engine_result: Optional[str] = None
+
+
+class SubmissionJournal:
+    """
+    Write-ahead journal of the submitted transactions. Every transaction is recorded signed, with its blob, hash
+    and LastLedgerSequence, before it is submitted and marked final once its outcome is known. After a crash
+    `resume` settles what was left outstanding without signing anything again: resubmitting the same blob cannot
+    apply a transaction twice. Only the outstanding entries are indexed, recovering takes time in the number of
+    transactions in flight when the process died, not in the size of the job. The settled entries are deleted
+    once they are older than `retention` seconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, retention: float = JOURNAL_RETENTION) -> None:
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        # Durable as soon as the transaction commits, short of losing power
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__db.execute(
+            "CREATE TABLE IF NOT EXISTS submissions ("
+            "hash TEXT PRIMARY KEY, "
+            "network TEXT NOT NULL, "
+            "account TEXT NOT NULL, "
+            "sequence INTEGER NOT NULL, "
+            "last_ledger_sequence INTEGER NOT NULL, "
+            "blob TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "engine_result TEXT, "
+            "updated REAL NOT NULL)"
+        )
+        self.__db.execute(f"CREATE INDEX IF NOT EXISTS submissions_outstanding ON submissions (network) "
+                          f"WHERE {_OUTSTANDING}")
+        self.__db.execute(f"CREATE INDEX IF NOT EXISTS submissions_settled ON submissions (updated) WHERE {_SETTLED}")
+        self.__db.commit()
+        self.prune(time.time() - retention)
+
+    def record_signed(self, network: str, account: str, entries: Iterable[Tuple[str, str, int, int]]) -> None:
+        """
+        Records signed transactions in one commit, before they are submitted.
+        :param network: The name of the network the transactions are submitted to
+        :param account: The account sending the transactions
+        :param entries: The hash, blob, sequence (or ticket) and LastLedgerSequence of every transaction
+        """
+        now = time.time()
+        with self.__lock, self.__db:
+            self.__db.executemany(
+                "INSERT OR REPLACE INTO submissions (hash, network, account, sequence, last_ledger_sequence, blob, "
+                "status, engine_result, updated) VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                ((tx_hash, network, account, sequence, last_ledger_sequence, blob, JournalStatus.SIGNED.value, now)
+                 for tx_hash, blob, sequence, last_ledger_sequence in entries)
+            )
+
+    def record_transaction(self, network: str, transaction: Transaction) -> str:
+        """
+        Records one signed transaction before it is submitted.
+        :return: The hash of the transaction
+        """
+        from xrpl.core.binarycodec import encode
+
+        tx_hash = transaction.get_hash()
+        self.record_signed(network, transaction.account, [(tx_hash, encode(transaction.to_xrpl()),
+                                                           transaction.ticket_sequence or transaction.sequence,
+                                                           transaction.last_ledger_sequence)])
+        return tx_hash
+
+    def record_status(self, tx_hash: str, status: JournalStatus, engine_result: Optional[str] = None) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute("UPDATE submissions SET status = ?, engine_result = ?, updated = ? WHERE hash = ?",
+                              (status.value, engine_result, time.time(), tx_hash))
+
+    def record_failure(self, tx_hash: str, error: Exception) -> None:
+        """
+        Records the final outcome of a transaction from the XRPLReliableSubmissionException it failed with.
+        """
+        message = str(error)
+        if message.startswith("Transaction failed: "):
+            # Validated with a tec result
+            self.record_status(tx_hash, JournalStatus.FAILED, message[len("Transaction failed: "):])
+        elif message.startswith(("tem", "tef")):
+            # Rejected right away by its preliminary result, the transaction can never validate
+            self.record_status(tx_hash, JournalStatus.FAILED, message.split(":")[0])
+        elif "LastLedgerSequence" in message:
+            self.record_status(tx_hash, JournalStatus.EXPIRED)
+
+    def prune(self, before: float) -> int:
+        """
+        Deletes the settled transactions last updated before a time, they are never resubmitted.
+        :param before: The time as returned by `time.time()`
+        :return: The number of deleted transactions
+        """
+        with self.__lock, self.__db:
+            return self.__db.execute(f"DELETE FROM submissions WHERE {_SETTLED} AND updated < ?",
+                                     (before,)).rowcount
+
+    def get(self, tx_hash: str) -> Optional[JournalEntry]:
+        with self.__lock:
+            row = self.__db.execute(f"SELECT {', '.join(_COLUMNS)} FROM submissions WHERE hash = ?",
+                                    (tx_hash,)).fetchone()
+        return _to_entry(row) if row else None
+
+    def outstanding(self, network: str) -> List[JournalEntry]:
+        """
+        :return: The transactions of the network which were signed or submitted without a known outcome
+        """
+        with self.__lock:
+            rows = self.__db.execute(f"SELECT {', '.join(_COLUMNS)} FROM submissions "
+                                     f"WHERE network = ? AND {_OUTSTANDING} ORDER BY account, sequence",
+                                     (network,)).fetchall()
+        return [_to_entry(row) for row in rows]
+
+    def resume(self,
+               conn: XRPLConnection,
+               network: str,
+               poll_interval: float = 1.0,
+               workers: int = 16) -> Iterator[JournalEntry]:
+        """
+        Settles the outstanding transactions of a network. Their hashes are looked up concurrently, the validated
+        ones are recorded, the ones past their LastLedgerSequence expire and the others are submitted again as
+        they were signed and followed until they are final.
+        :param conn: The connection to the network
+        :param network: The name of the network
+        :param poll_interval: Seconds between the lookups of the transactions still pending
+        :param workers: The number of concurrent lookups
+        :return: An iterator of the settled entries with their final status
+        """
+        from xrpl.ledger import get_latest_validated_ledger_sequence
+        from xrpl.models import SubmitOnly, Tx
+
+        client = conn.get_client()
+        pending = {entry.hash: entry for entry in self.outstanding(network)}
+        resubmitted = False
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending:
+                latest = get_latest_validated_ledger_sequence(client)
+                responses = executor.map(lambda tx_hash: client.request(Tx(transaction=tx_hash)), list(pending))
+                for entry, response in zip(list(pending.values()), responses):
+                    if response.is_successful() and response.result.get("validated"):
+                        engine_result = response.result["meta"]["TransactionResult"]
+                        status = JournalStatus.VALIDATED if engine_result == "tesSUCCESS" else JournalStatus.FAILED
+                    elif latest >= entry.last_ledger_sequence:
+                        status, engine_result = JournalStatus.EXPIRED, entry.engine_result
+                    else:
+                        continue
+                    del pending[entry.hash]
+                    self.record_status(entry.hash, status, engine_result)
+                    yield replace(entry, status=status, engine_result=engine_result)
+
+                if pending and not resubmitted:
+                    resubmitted = True
+                    for entry in list(pending.values()):
+                        engine_result = client.request(SubmitOnly(tx_blob=entry.blob)).result.get("engine_result")
+                        if engine_result and engine_result.startswith("tem"):
+                            del pending[entry.hash]
+                            self.record_status(entry.hash, JournalStatus.FAILED, engine_result)
+                            yield replace(entry, status=JournalStatus.FAILED, engine_result=engine_result)
+                        else:
+                            # Anything else may still validate or expire, the lookups tell
+                            self.record_status(entry.hash, JournalStatus.SUBMITTED, engine_result)
+                            pending[entry.hash] = replace(entry, engine_result=engine_result)
+                if pending:
+                    time.sleep(poll_interval)
+
+    def close(self) -> None:
+        self.__db.close()
+
+
+def _to_entry(row: tuple) -> JournalEntry:
+    fields = dict(zip(_COLUMNS, row))
+    fields["status"] = JournalStatus(fields["status"])
+    return JournalEntry(**fields)
+
+
+def use_journal(path: Optional[str], default: bool = False) -> None:
+    """
+    Makes the submissions of this process go through the journal at `path`, None disables the journal.
+    :param default: True when the path was not chosen by the user, `use_journal_directory` moves it then
+    """
+    global _journal_path, _journal, _journal_default
+    with _journal_lock:
+        if _journal is not None:
+            _journal.close()
+            _journal = None
+        _journal_path = path
+        _journal_default = default
+
+
+def use_journal_directory(directory: str) -> None:
+    """
+    Moves the default journal into the CLI directory of a command, a journal chosen by the user is kept.
+    """
+    if _journal_default:
+        use_journal(f"{directory}/{JOURNAL_NAME}", default=True)
+
+
+def get_journal() -> Optional[SubmissionJournal]:
+    """
+    :return: The journal configured through `use_journal`, opened on first use, None when there is none
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None and _journal_path:
+            os.makedirs(os.path.dirname(_journal_path) or ".", exist_ok=True)
+            _journal = SubmissionJournal(_journal_path)
+        return _journal
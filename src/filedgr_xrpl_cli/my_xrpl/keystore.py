@@ -0,0 +1,156 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from filedgr_xrpl_cli.metrics import metrics
+from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+from filedgr_xrpl_cli.my_xrpl.wallet import WalletLoader, XRPLWallet, FileWalletLoader
+from filedgr_xrpl_cli.settings import default_path
+
+_COLUMNS = ("name", "classic_address", "seed", "algorithm", "public_key", "private_key", "sequence")
+
+
+class WalletKeystore:
+    """
+    A single SQLite file holding all wallets, indexed by name and by classic address. The derived keys are
+    stored next to the seed, so loading a wallet is one indexed lookup without any key derivation.
+    """
+
+    def __init__(self, path: str = f"{default_path}/wallets.db") -> None:
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute(
+            "CREATE TABLE IF NOT EXISTS wallets ("
+            "name TEXT PRIMARY KEY, "
+            "classic_address TEXT NOT NULL UNIQUE, "
+            "seed TEXT NOT NULL, "
+            "algorithm TEXT, "
+            "public_key TEXT NOT NULL, "
+            "private_key TEXT NOT NULL, "
+            "sequence INTEGER)"
+        )
+        self.__db.commit()
+
+    def get(self, name_or_address: str) -> Optional[XRPLWallet]:
+        """
+        :param name_or_address: The name or the classic address of the wallet
+        :return: The wallet or None when it is not in the keystore
+        """
+        column = "classic_address" if name_or_address.startswith("r") else "name"
+        with self.__lock:
+            row = self.__db.execute(f"SELECT {', '.join(_COLUMNS)} FROM wallets WHERE {column} = ?",
+                                    (name_or_address,)).fetchone()
+            if row is None and column == "classic_address":
+                # Wallet names may start with an "r" as well
+                row = self.__db.execute(f"SELECT {', '.join(_COLUMNS)} FROM wallets WHERE name = ?",
+                                        (name_or_address,)).fetchone()
+        return self._to_wallet(row)[1] if row else None
+
+    def put(self, name: str, wallet: XRPLWallet) -> None:
+        self.put_many([(name, wallet)])
+
+    def put_many(self, wallets: Iterable[Tuple[str, XRPLWallet]]) -> int:
+        """
+        Stores many wallets in a single transaction, replacing wallets with the same name.
+        :return: The number of wallets stored
+        :raise ValueError: When a wallet is stored under another name already, nothing is stored then
+        """
+        rows = [self._to_row(name, wallet) for name, wallet in wallets]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])
+        try:
+            with self.__lock, self.__db:
+                cursor = self.__db.executemany(
+                    f"INSERT INTO wallets ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))}) "
+                    f"ON CONFLICT (name) DO UPDATE SET {updates}",
+                    rows
+                )
+                return cursor.rowcount
+        except sqlite3.IntegrityError:
+            raise ValueError(self._conflict(rows)) from None
+
+    def _conflict(self, rows: List[tuple]) -> str:
+        """
+        :return: Which wallet of the rows is stored under another name, in the keystore or in the rows themselves
+        """
+        names = {}
+        for name, classic_address, *_ in rows:
+            other = names.setdefault(classic_address, name)
+            if other == name:
+                with self.__lock:
+                    stored = self.__db.execute("SELECT name FROM wallets WHERE classic_address = ? AND name != ?",
+                                               (classic_address, name)).fetchone()
+                other = stored[0] if stored else name
+            if other != name:
+                return f"The wallet {classic_address} is stored as {other} already, it cannot be stored as {name}"
+        return "A wallet is stored under another name already"
+
+    def iter_wallets(self) -> Iterator[Tuple[str, XRPLWallet]]:
+        """
+        Streams all wallets ordered by name without loading the keystore into memory.
+        """
+        cursor = self.__db.cursor()
+        cursor.execute(f"SELECT {', '.join(_COLUMNS)} FROM wallets ORDER BY name")
+        for row in cursor:
+            yield self._to_wallet(row)
+
+    def iter_names(self) -> Iterator[Tuple[str, str]]:
+        """
+        Streams the name and classic address of all wallets ordered by name.
+        """
+        cursor = self.__db.cursor()
+        yield from cursor.execute("SELECT name, classic_address FROM wallets ORDER BY name")
+
+    def import_directory(self, path: str) -> int:
+        """
+        Imports every wallet file of a wallet directory, named after its file.
+        :param path: The directory holding one JSON file per wallet
+        :return: The number of wallets imported
+        """
+        loader = FileWalletLoader()
+        return self.put_many(
+            (entry.name, loader.load_wallet(entry.path))
+            for entry in os.scandir(path) if entry.is_file()
+        )
+
+    def close(self) -> None:
+        self.__db.close()
+
+    @staticmethod
+    def _to_row(name: str, wallet: XRPLWallet) -> tuple:
+        xrpl_wallet = wallet.get_wallet()
+        return (name, xrpl_wallet.classic_address, xrpl_wallet.seed, xrpl_wallet.algorithm.value,
+                xrpl_wallet.public_key, xrpl_wallet.private_key, xrpl_wallet.sequence)
+
+    @staticmethod
+    def _to_wallet(row: tuple) -> Tuple[str, XRPLWallet]:
+        fields = dict(zip(_COLUMNS, row))
+        return fields.pop("name"), XRPLWallet(**fields)
+
+
+class KeystoreWalletLoader(WalletLoader):
+    """
+    Loads wallets from the keystore of a CLI directory, falling back to the wallet files of older setups.
+    """
+
+    def __init__(self, path: str = default_path) -> None:
+        self.__path = path
+        self.__keystore: Optional[WalletKeystore] = None
+        if Path(path).exists():
+            self.__keystore = WalletKeystore(f"{path}/wallets.db")
+
+    def load_wallet(self, name: str) -> XRPLWallet:
+        with metrics.time("wallet_load"):
+            wallet = self.__keystore.get(name) if self.__keystore else None
+            if wallet is None:
+                wallet = FileWalletLoader().load_wallet(f"{self.__path}/wallets/{name}")
+            return wallet
+
+    def store_wallet(self, name: str, wallet: XRPLWallet) -> None:
+        if self.__keystore is None:
+            MyFileIO.create_dir(self.__path, recursive=True)
+            self.__keystore = WalletKeystore(f"{self.__path}/wallets.db")
+        self.__keystore.put(name, wallet)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Type
+
+from xrpl.models import Memo
+
+from ..dto.memo import MemoFormat
+from ..my_io.file_io import MyFileIO
+
+# rippled rejects transactions whose serialized Memos exceed 1KB, the header and format take up to ~100 bytes
+MAX_MEMO_CHUNK_SIZE = 900
+DEFAULT_MEMO_CHUNK_SIZE = 768
+
+_CHUNK_TYPE_PREFIX = "chunk"
+
+
+@dataclass(frozen=True)
+class MemoChunkHeader:
+    """
+    The MemoType of a chunk: its position, the number of chunks and the SHA-256 of the whole payload.
+    """
+    index: int
+    total: int
+    digest: str
+
+    def to_memo_type(self) -> str:
+        return f"{_CHUNK_TYPE_PREFIX}/{self.index}/{self.total}/{self.digest}".encode("ascii").hex().upper()
+
+    @classmethod
+    def from_memo_type(cls: Type[MemoChunkHeader], memo_type: str) -> MemoChunkHeader:
+        prefix, index, total, digest = bytes.fromhex(memo_type).decode("ascii").split("/")
+        if prefix != _CHUNK_TYPE_PREFIX:
+            raise ValueError(f"Not a memo chunk: {prefix}")
+        return cls(index=int(index), total=int(total), digest=digest)
+
+
+def iter_memo_chunks(path: str,
+                     memo_format: MemoFormat,
+                     chunk_size: int = DEFAULT_MEMO_CHUNK_SIZE) -> Iterator[Memo]:
+    """
+    Splits a file into memos of at most `chunk_size` bytes, one per transaction. The file is memory-mapped and
+    every chunk is hex encoded straight from the mapping, only one chunk is held in memory at a time.
+    :param path: The file to attach
+    :param memo_format: The format of the whole file, repeated on every chunk
+    :param chunk_size: The number of payload bytes per memo
+    :return: An iterator of the memos in payload order
+    """
+    if not 0 < chunk_size <= MAX_MEMO_CHUNK_SIZE:
+        raise ValueError(f"The chunk size has to be between 1 and {MAX_MEMO_CHUNK_SIZE} bytes")
+
+    enc_format = memo_format.value.encode("utf-8").hex().upper()
+    with MyFileIO.map_file(path) as view:
+        digest = hashlib.sha256(view).hexdigest()
+        total = (len(view) + chunk_size - 1) // chunk_size
+        for index in range(total):
+            header = MemoChunkHeader(index=index, total=total, digest=digest)
+            yield Memo(memo_data=view[index * chunk_size:(index + 1) * chunk_size].hex().upper(),
+                       memo_type=header.to_memo_type(),
+                       memo_format=enc_format)
+
+
+def reassemble_memo_chunks(memos: Iterable[dict], output: str) -> MemoChunkHeader:
+    """
+    Writes the payload of memo chunks back to a file and verifies it against the digest of the headers.
+    :param memos: The memos of the transactions in their XRPL JSON form ({"Memo": {"MemoData": ...}}), in any
+    order; memos which are not chunks are skipped
+    :param output: The file to write the payload to
+    :return: The header of the verified payload
+    """
+    chunks: Dict[int, bytes] = {}
+    header = None
+    for memo in memos:
+        fields = memo.get("Memo", memo)
+        try:
+            chunk_header = MemoChunkHeader.from_memo_type(fields.get("MemoType", ""))
+        except ValueError:
+            continue
+        if header is not None and (chunk_header.digest, chunk_header.total) != (header.digest, header.total):
+            raise ValueError(f"Memo chunk {chunk_header.index} belongs to another payload {chunk_header.digest}")
+        header = chunk_header
+        chunks[chunk_header.index] = bytes.fromhex(fields.get("MemoData", ""))
+
+    if header is None:
+        raise ValueError("No memo chunks found")
+    missing = [index for index in range(header.total) if index not in chunks]
+    if missing:
+        raise ValueError(f"Missing {len(missing)} of {header.total} memo chunks, first missing: {missing[0]}")
+
+    digest = hashlib.sha256()
+    # The output only appears once the payload is verified
+    with MyFileIO.open_atomic(output) as file:
+        for index in range(header.total):
+            digest.update(chunks[index])
+            file.write(chunks[index])
+        if digest.hexdigest() != header.digest:
+            raise ValueError(f"Payload digest {digest.hexdigest()} does not match {header.digest}")
+    return header
@@ -0,0 +1,189 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+from weakref import WeakKeyDictionary
+
+import xrpl
+from xrpl.asyncio.clients import Client, XRPLRequestFailureException
+from xrpl.models import AccountInfo, Response
+
+from .account_state import AccountState
+
+if TYPE_CHECKING:
+    from .account_state import AccountStateCache
+
+# Number of ledgers a signed transaction stays valid for after it has been autofilled
+LEDGER_OFFSET = 20
+
+
+class NetworkStateCache:
+    """
+    The network state autofill needs, shared by every transaction sent through one connection.
+    The validated ledger index is cached for `ttl` seconds and the fee until a newer ledger closes. The next
+    sequence of the accounts we submit from is read from the ledger once and then bumped locally; it has to be
+    reset whenever a submission did not consume its sequence.
+
+    With an account state cache the account states outlive the process: a new process starts from the stored
+    sequence, updated from the metadata of our validated transactions, instead of reading it from the ledger.
+    """
+
+    def __init__(self,
+                 ttl: float = 3.0,
+                 accounts: Optional[AccountStateCache] = None,
+                 network: Optional[str] = None) -> None:
+        self.__ttl = ttl
+        self.__accounts = accounts
+        self.__network = network
+        self.__lock = threading.Lock()
+        # Only the first allocation of an account reads the ledger, holding the lock of that account only
+        self.__account_locks: Dict[str, threading.Lock] = {}
+        # asyncio locks belong to one event loop, every loop using the cache gets its own
+        self.__async_locks: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]] = \
+            WeakKeyDictionary()
+
+        self.__ledger_index: Optional[int] = None
+        self.__ledger_fetched_at = 0.0
+        self.__fee: Optional[str] = None
+        self.__sequences: Dict[str, int] = {}
+
+    def observe_ledger(self, ledger_index: int) -> None:
+        """
+        Records a validated ledger index seen elsewhere, a new ledger invalidates the cached fee.
+        """
+        with self.__lock:
+            if self.__ledger_index is None or ledger_index > self.__ledger_index:
+                if self.__ledger_index is not None:
+                    self.__fee = None
+                self.__ledger_index = ledger_index
+            self.__ledger_fetched_at = time.monotonic()
+
+    def validated_ledger(self, client: Client, refresh: bool = False) -> int:
+        if refresh or self._ledger_expired():
+            self.observe_ledger(xrpl.ledger.get_latest_validated_ledger_sequence(client))
+        return self.__ledger_index
+
+    async def validated_ledger_async(self, client: Client, refresh: bool = False) -> int:
+        if refresh or self._ledger_expired():
+            self.observe_ledger(await xrpl.asyncio.ledger.get_latest_validated_ledger_sequence(client))
+        return self.__ledger_index
+
+    def fee(self, client: Client) -> str:
+        self.validated_ledger(client)
+        if self.__fee is None:
+            self.__fee = xrpl.ledger.get_fee(client)
+        return self.__fee
+
+    async def fee_async(self, client: Client) -> str:
+        await self.validated_ledger_async(client)
+        if self.__fee is None:
+            self.__fee = await xrpl.asyncio.ledger.get_fee(client)
+        return self.__fee
+
+    def next_sequence(self, account: str, client: Client) -> int:
+        with self._account_lock(account):
+            with self.__lock:
+                if account in self.__sequences:
+                    return self._bump(account)
+            sequence = self.account_state(account, client).sequence
+            with self.__lock:
+                self.__sequences.setdefault(account, sequence)
+                return self._bump(account)
+
+    async def next_sequence_async(self, account: str, client: Client) -> int:
+        async with self._async_lock(account):
+            if account not in self.__sequences:
+                sequence = (await self.account_state_async(account, client)).sequence
+                with self.__lock:
+                    self.__sequences.setdefault(account, sequence)
+            with self.__lock:
+                return self._bump(account)
+
+    def account_state(self, account: str, client: Client, refresh: bool = False) -> AccountState:
+        """
+        :param refresh: Read the state from the ledger even when the account state cache holds it
+        :return: The state of the account in the current ledger
+        """
+        state = None if refresh else self._cached_state(account)
+        if state is None:
+            state = self._store_state(client.request(AccountInfo(account=account, ledger_index="current")))
+        return state
+
+    def next_token_sequence(self, account: str, client: Client, refresh: bool = False) -> int:
+        """
+        :param refresh: Read MintedNFTokens from the ledger even when the account state cache holds it
+        :return: The token sequence of the next NFT the account mints
+        """
+        return self.account_state(account, client, refresh=refresh).next_token_sequence()
+
+    async def account_state_async(self, account: str, client: Client, refresh: bool = False) -> AccountState:
+        state = None if refresh else self._cached_state(account)
+        if state is None:
+            # As the xrpl-py helpers do, so sync and async clients both work
+            state = self._store_state(await client._request_impl(AccountInfo(account=account,
+                                                                             ledger_index="current")))
+        return state
+
+    def observe_transaction(self, result: dict) -> None:
+        """
+        Updates the account state cache from a validated transaction as returned by the tx method.
+        """
+        if self.__accounts is not None and result.get("validated") and "meta" in result:
+            self.__accounts.observe_meta(self.__network, result["meta"], result["ledger_index"])
+
+    def invalidate_account(self, account: str) -> None:
+        """
+        Drops the stored state of an account after a submission showed it may have changed, the sequence handed
+        out in this process stays as it is.
+        """
+        if self.__accounts is not None:
+            self.__accounts.invalidate(self.__network, account)
+
+    def set_sequence(self, account: str, sequence: int) -> None:
+        """
+        Hands `sequence` out again next, for a submission which was rejected without consuming it.
+        """
+        with self.__lock:
+            self.__sequences[account] = sequence
+
+    def reset_sequence(self, account: str) -> None:
+        """
+        Forgets the local sequence of an account, the next allocation reads it from the ledger again.
+        """
+        with self.__lock:
+            self.__sequences.pop(account, None)
+        self.invalidate_account(account)
+
+    def _account_lock(self, account: str) -> threading.Lock:
+        with self.__lock:
+            return self.__account_locks.setdefault(account, threading.Lock())
+
+    def _async_lock(self, account: str) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            locks = self.__async_locks.setdefault(loop, {})
+            if account not in locks:
+                locks[account] = asyncio.Lock()
+            return locks[account]
+
+    def _bump(self, account: str) -> int:
+        sequence = self.__sequences[account]
+        self.__sequences[account] = sequence + 1
+        return sequence
+
+    def _cached_state(self, account: str) -> Optional[AccountState]:
+        return self.__accounts.get(self.__network, account) if self.__accounts is not None else None
+
+    def _store_state(self, response: Response) -> AccountState:
+        if not response.is_successful():
+            raise XRPLRequestFailureException(response.result)
+        state = AccountState.from_account_root(response.result["account_data"],
+                                               response.result.get("ledger_current_index",
+                                                                   response.result.get("ledger_index", 0)))
+        if self.__accounts is not None:
+            self.__accounts.put(self.__network, state)
+        return state
+
+    def _ledger_expired(self) -> bool:
+        return self.__ledger_index is None or time.monotonic() - self.__ledger_fetched_at > self.__ttl
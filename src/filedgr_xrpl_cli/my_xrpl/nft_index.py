@@ -0,0 +1,228 @@
+from __future__ import annotations
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from xrpl.core.addresscodec import encode_classic_address
+from xrpl.ledger import get_latest_validated_ledger_sequence
+from xrpl.models import AccountNFTs, AccountTx
+
+from .connection import XRPLConnection
+from ..nft_utils.token_id import parse_nft_token_id
+from ..settings import default_path
+
+_COLUMNS = ("token_id", "owner", "issuer", "taxon", "sequence", "flags", "transfer_fee", "uri", "ledger_index")
+
+
+@dataclass(frozen=True)
+class IndexedNft:
+    token_id: str
+    owner: str
+    issuer: str
+    taxon: int
+    sequence: int
+    flags: int
+    transfer_fee: int
+    uri: Optional[str]
+    ledger_index: int
+
+
+class NftIndex:
+    """
+    A local SQLite index of the NFTs held by a set of accounts, for lookups by issuer, taxon, URI prefix and owner
+    without querying the ledger. An account is crawled once with account_nfts, afterwards only its transactions
+    since the last indexed ledger are fetched and the NFTokenPage changes in their metadata applied.
+    """
+
+    def __init__(self, path: str = f"{default_path}/nfts.db") -> None:
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute(
+            "CREATE TABLE IF NOT EXISTS nfts ("
+            "token_id TEXT PRIMARY KEY, "
+            "owner TEXT NOT NULL, "
+            "issuer TEXT NOT NULL, "
+            "taxon INTEGER NOT NULL, "
+            "sequence INTEGER NOT NULL, "
+            "flags INTEGER NOT NULL, "
+            "transfer_fee INTEGER NOT NULL, "
+            "uri TEXT, "
+            "ledger_index INTEGER NOT NULL)"
+        )
+        self.__db.execute("CREATE INDEX IF NOT EXISTS nfts_owner ON nfts (owner)")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS nfts_issuer_taxon ON nfts (issuer, taxon)")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS nfts_uri ON nfts (uri)")
+        self.__db.execute("CREATE TABLE IF NOT EXISTS accounts (account TEXT PRIMARY KEY, ledger_index INTEGER NOT NULL)")
+        self.__db.commit()
+
+    def get_ledger_index(self, account: str) -> Optional[int]:
+        """
+        :return: The last ledger the NFTs of the account were indexed at, None when it was never indexed
+        """
+        with self.__lock:
+            row = self.__db.execute("SELECT ledger_index FROM accounts WHERE account = ?", (account,)).fetchone()
+        return row[0] if row else None
+
+    def update(self, conn: XRPLConnection, account: str, full: bool = False) -> Tuple[int, int]:
+        """
+        Brings the NFTs of an account up to date, crawling them when the account was never indexed.
+        :param conn: The connection to the network
+        :param account: The classic address of the account
+        :param full: Crawl the NFTs of the account again instead of applying its transactions
+        :return: The number of NFTs added and removed
+        """
+        since = None if full else self.get_ledger_index(account)
+        if since is None:
+            return self.crawl(conn, account), 0
+        return self._apply_transactions(conn, account, since)
+
+    def crawl(self, conn: XRPLConnection, account: str) -> int:
+        """
+        Replaces the indexed NFTs of an account with the ones it holds now.
+        :return: The number of NFTs the account holds
+        """
+        client = conn.get_client()
+        # Transactions validated while crawling are applied again by the next update, which is idempotent
+        ledger_index = get_latest_validated_ledger_sequence(client)
+        rows = []
+        marker = None
+        while True:
+            response = client.request(AccountNFTs(account=account, limit=400, marker=marker))
+            rows.extend(_to_row(nft["NFTokenID"], account, nft.get("URI"), ledger_index)
+                        for nft in response.result.get("account_nfts", []))
+            marker = response.result.get("marker")
+            if marker is None:
+                break
+
+        with self.__lock, self.__db:
+            self.__db.execute("DELETE FROM nfts WHERE owner = ?", (account,))
+            self.__db.executemany(f"INSERT OR REPLACE INTO nfts ({', '.join(_COLUMNS)}) "
+                                  f"VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+            self._set_ledger_index(account, ledger_index)
+        return len(rows)
+
+    def get(self, token_id: str) -> Optional[IndexedNft]:
+        with self.__lock:
+            row = self.__db.execute(f"SELECT {', '.join(_COLUMNS)} FROM nfts WHERE token_id = ?",
+                                    (token_id.upper(),)).fetchone()
+        return IndexedNft(*row) if row else None
+
+    def query(self,
+              issuer: Optional[str] = None,
+              owner: Optional[str] = None,
+              taxon: Optional[int] = None,
+              uri_prefix: Optional[str] = None,
+              limit: Optional[int] = None) -> Iterator[IndexedNft]:
+        """
+        Streams the indexed NFTs matching all given filters, ordered by issuer and token sequence.
+        """
+        conditions, params = [], []
+        for column, value in (("issuer", issuer), ("owner", owner), ("taxon", taxon)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if uri_prefix:
+            # A range instead of LIKE, so the lookup uses the URI index
+            conditions.append("uri >= ? AND uri < ?")
+            params.extend((uri_prefix, uri_prefix + "\U0010FFFF"))
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM nfts"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY issuer, sequence"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        cursor = self.__db.cursor()
+        for row in cursor.execute(sql, params):
+            yield IndexedNft(*row)
+
+    def close(self) -> None:
+        self.__db.close()
+
+    def _apply_transactions(self, conn: XRPLConnection, account: str, since: int) -> Tuple[int, int]:
+        client = conn.get_client()
+        added, removed = 0, 0
+        ledger_index = since
+        marker = None
+        while True:
+            response = client.request(AccountTx(account=account, ledger_index_min=since + 1, ledger_index_max=-1,
+                                                forward=True, limit=400, marker=marker))
+            ledger_index = max(ledger_index, response.result.get("ledger_index_max", ledger_index))
+            with self.__lock, self.__db:
+                for entry in response.result.get("transactions", []):
+                    if not entry.get("validated") or \
+                            entry.get("meta", {}).get("TransactionResult") != "tesSUCCESS":
+                        continue
+                    tx_added, tx_removed = _nft_changes(entry["meta"], account)
+                    tx_ledger_index = entry["tx"].get("ledger_index", ledger_index)
+                    self.__db.executemany("DELETE FROM nfts WHERE token_id = ? AND owner = ?",
+                                          ((token_id, account) for token_id in tx_removed))
+                    self.__db.executemany(f"INSERT OR REPLACE INTO nfts ({', '.join(_COLUMNS)}) "
+                                          f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                                          (_to_row(token_id, account, uri, tx_ledger_index)
+                                           for token_id, uri in tx_added.items()))
+                    added += len(tx_added)
+                    removed += len(tx_removed)
+            marker = response.result.get("marker")
+            if marker is None:
+                break
+
+        with self.__lock, self.__db:
+            self._set_ledger_index(account, ledger_index)
+        return added, removed
+
+    def _set_ledger_index(self, account: str, ledger_index: int) -> None:
+        self.__db.execute("INSERT OR REPLACE INTO accounts (account, ledger_index) VALUES (?, ?)",
+                          (account, ledger_index))
+
+
+def _nft_changes(meta: dict, account: str) -> Tuple[Dict[str, Optional[str]], Set[str]]:
+    """
+    Diffs the NFTokenPages of an account changed by one transaction.
+    :return: The NFTokenIDs and URIs of the NFTs the account received and the NFTokenIDs of the NFTs it lost
+    """
+    before: Dict[str, Optional[str]] = {}
+    after: Dict[str, Optional[str]] = {}
+    for node in meta.get("AffectedNodes", []):
+        kind, fields = next(iter(node.items()))
+        if fields.get("LedgerEntryType") != "NFTokenPage":
+            continue
+        # The first 160 bits of an NFTokenPage index are the account owning it
+        if encode_classic_address(bytes.fromhex(fields["LedgerIndex"][:40])) != account:
+            continue
+        final = _page_tokens((fields.get("NewFields") or fields.get("FinalFields") or {}).get("NFTokens"))
+        previous_fields = fields.get("PreviousFields") or {}
+        if kind == "CreatedNode":
+            after.update(final)
+        elif kind == "DeletedNode":
+            before.update(_page_tokens(previous_fields["NFTokens"]) if "NFTokens" in previous_fields else final)
+        elif "NFTokens" in previous_fields:
+            before.update(_page_tokens(previous_fields["NFTokens"]))
+            after.update(final)
+    # Tokens moving between two pages of the account appear on both sides
+    added = {token_id: uri for token_id, uri in after.items() if token_id not in before}
+    removed = {token_id for token_id in before if token_id not in after}
+    return added, removed
+
+
+def _page_tokens(tokens: Optional[List[dict]]) -> Dict[str, Optional[str]]:
+    return {token["NFToken"]["NFTokenID"]: token["NFToken"].get("URI") for token in tokens or []}
+
+
+def _to_row(token_id: str, owner: str, uri: Optional[str], ledger_index: int) -> tuple:
+    fields = parse_nft_token_id(token_id)
+    return (token_id.upper(), owner, fields.issuer, fields.taxon, fields.sequence, fields.flags,
+            fields.transfer_fee, _decode_uri(uri), ledger_index)
+
+
+def _decode_uri(uri: Optional[str]) -> Optional[str]:
+    if not uri:
+        return None
+    try:
+        return bytes.fromhex(uri).decode("utf-8")
+    except ValueError:
+        # Not UTF-8, keep the hex encoding
+        return uri
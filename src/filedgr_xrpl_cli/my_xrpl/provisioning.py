@@ -0,0 +1,172 @@
+from __future__ import annotations
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from xrpl.asyncio.account import get_next_valid_seq_number
+from xrpl.asyncio.wallet.wallet_generation import get_faucet_url
+from xrpl.clients import XRPLRequestFailureException
+from xrpl.wallet import Wallet
+
+from .connection import XRPLConnection
+from .wallet import XRPLWallet
+
+# Statuses worth asking the faucet again for, it answers 503 while it is busy
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+_MAX_BACKOFF = 30.0
+
+
+@dataclass
+class ProvisioningResult:
+    # Every created wallet in the order of creation, funded or not
+    wallets: List[XRPLWallet]
+    # The classic addresses the faucet could not fund, or whose account did not appear in time, with the reason
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    def funded(self) -> List[XRPLWallet]:
+        return [wallet for wallet in self.wallets if wallet.get_wallet().classic_address not in self.failed]
+
+
+def _create_wallets(count: int) -> List[dict]:
+    return [dict(Wallet.create().__dict__) for _ in range(count)]
+
+
+class _RateLimiter:
+    """
+    Spaces out the requests of all tasks to at most `rate` per second. A pause pushes every following request back.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep) -> None:
+        self.__interval = 1.0 / rate
+        self.__next = 0.0
+        self.__lock = asyncio.Lock()
+        self.__clock = clock
+        self.__sleep = sleep
+
+    async def wait(self) -> None:
+        async with self.__lock:
+            now = self.__clock()
+            delay = self.__next - now
+            self.__next = max(now, self.__next) + self.__interval
+        if delay > 0:
+            await self.__sleep(delay)
+
+    async def pause(self, seconds: float) -> None:
+        async with self.__lock:
+            self.__next = max(self.__next, self.__clock() + seconds)
+
+
+class WalletProvisioner:
+    """
+    Creates many wallets at once: the keys are derived across a pool of processes and the new accounts are funded
+    through concurrent faucet requests, limited to `rate` requests per second and retried with a growing backoff
+    while the faucet is busy. A wallet is returned once its account exists on the ledger, with its sequence.
+    """
+
+    def __init__(self,
+                 conn: XRPLConnection,
+                 faucet_url: Optional[str] = None,
+                 concurrency: int = 8,
+                 rate: float = 5.0,
+                 retries: int = 5,
+                 backoff: float = 1.0,
+                 processes: Optional[int] = None,
+                 timeout: float = 60.0) -> None:
+        self.__conn = conn
+        self.__faucet_url = faucet_url
+        self.__concurrency = concurrency
+        self.__rate = rate
+        self.__retries = retries
+        self.__backoff = backoff
+        self.__processes = processes or os.cpu_count() or 1
+        self.__timeout = timeout
+
+    def generate(self, count: int) -> List[XRPLWallet]:
+        """
+        :param count: The number of wallets to create
+        :return: New wallets with their derived keys, not funded
+        """
+        if self.__processes == 1 or count < 2 * self.__processes:
+            created = _create_wallets(count)
+        else:
+            chunks = [count // self.__processes + (1 if i < count % self.__processes else 0)
+                      for i in range(self.__processes)]
+            with ProcessPoolExecutor(max_workers=self.__processes) as executor:
+                created = [wallet for chunk in executor.map(_create_wallets, chunks) for wallet in chunk]
+        return [XRPLWallet(**wallet) for wallet in created]
+
+    def provision(self, count: int, fund: bool = True) -> ProvisioningResult:
+        """
+        Creates wallets and funds them from the faucet of the network.
+        :param count: The number of wallets to create
+        :param fund: Fund the new wallets, without it they are only created
+        :return: All created wallets and the addresses which could not be funded
+        """
+        wallets = self.generate(count)
+        if not fund:
+            return ProvisioningResult(wallets=wallets)
+        return asyncio.run(self.fund(wallets))
+
+    async def fund(self, wallets: List[XRPLWallet]) -> ProvisioningResult:
+        """
+        Funds wallets from the faucet and waits until their accounts exist.
+        :return: All wallets, the funded ones with their sequence, and the addresses which could not be funded
+        """
+        faucet_url = self.__faucet_url or get_faucet_url(self.__conn.get_endpoints().get_urls()[0])
+        limiter = _RateLimiter(self.__rate)
+        semaphore = asyncio.Semaphore(self.__concurrency)
+        result = ProvisioningResult(wallets=list(wallets))
+
+        async def fund_one(http: httpx.AsyncClient, wallet: XRPLWallet) -> None:
+            address = wallet.get_wallet().classic_address
+            try:
+                async with semaphore:
+                    await self._request_funding(http, limiter, faucet_url, address)
+                # The faucet payment validates within a few ledgers, meanwhile the next wallets are funded
+                wallet.get_wallet().sequence = await self._wait_for_account(address)
+            except Exception as ex:
+                result.failed[address] = str(ex) or type(ex).__name__
+
+        async with httpx.AsyncClient(timeout=30.0) as http:
+            await asyncio.gather(*(fund_one(http, wallet) for wallet in wallets))
+        return result
+
+    async def _request_funding(self,
+                               http: httpx.AsyncClient,
+                               limiter: _RateLimiter,
+                               faucet_url: str,
+                               address: str) -> None:
+        for attempt in range(self.__retries + 1):
+            await limiter.wait()
+            try:
+                response = await http.post(faucet_url, json={"destination": address, "userAgent": "filedgr-xrpl-cli"})
+            except httpx.TransportError:
+                if attempt == self.__retries:
+                    raise
+                await asyncio.sleep(min(self.__backoff * 2 ** attempt, _MAX_BACKOFF))
+                continue
+            if response.status_code not in _RETRY_STATUS or attempt == self.__retries:
+                response.raise_for_status()
+                return
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else min(self.__backoff * 2 ** attempt, _MAX_BACKOFF)
+            # The faucet limits all requests, not this one
+            await limiter.pause(delay)
+
+    async def _wait_for_account(self, address: str) -> int:
+        client = self.__conn.get_async_client()
+        deadline = time.monotonic() + self.__timeout
+        while True:
+            try:
+                return await get_next_valid_seq_number(address, client)
+            except XRPLRequestFailureException as ex:
+                if ex.error != "actNotFound" or time.monotonic() > deadline:
+                    raise
+            await asyncio.sleep(1.0)
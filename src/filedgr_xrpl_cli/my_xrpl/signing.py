@@ -0,0 +1,88 @@
+from __future__ import annotations
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from xrpl.core.binarycodec import encode, encode_for_signing
+from xrpl.core.keypairs import sign as keypairs_sign
+
+from .wallet import XRPLWallet
+
+# Prefix rippled hashes a signed transaction blob with
+_TRANSACTION_HASH_PREFIX = bytes.fromhex("54584E00")
+
+_worker_keys: Dict[str, Tuple[str, str]] = {}
+
+
+def sign_transaction_json(transaction_json: dict, public_key: str, private_key: str) -> str:
+    """
+    Signs an autofilled transaction in its XRPL JSON form.
+    :param transaction_json: The transaction as returned by `Transaction.to_xrpl()`
+    :return: The hex encoded signed blob
+    """
+    transaction_json["SigningPubKey"] = public_key
+    transaction_json["TxnSignature"] = keypairs_sign(bytes.fromhex(encode_for_signing(transaction_json)),
+                                                     private_key)
+    return encode(transaction_json)
+
+
+def hash_blob(blob: str) -> str:
+    """
+    :return: The transaction hash of a signed blob
+    """
+    return hashlib.sha512(_TRANSACTION_HASH_PREFIX + bytes.fromhex(blob)).digest()[:32].hex().upper()
+
+
+def _init_worker(keys: Dict[str, Tuple[str, str]]) -> None:
+    _worker_keys.clear()
+    _worker_keys.update(keys)
+
+
+def _sign_in_worker(transaction_json: dict) -> str:
+    public_key, private_key = _worker_keys[transaction_json["Account"]]
+    return sign_transaction_json(transaction_json, public_key, private_key)
+
+
+class ParallelSigner:
+    """
+    Signs autofilled transactions across a pool of processes. The keys of the wallets are sent to every worker
+    once when it starts, so only the transactions and the blobs cross the process boundary.
+    With a single process the transactions are signed in the calling process.
+    """
+
+    def __init__(self, wallets: Iterable[XRPLWallet], processes: Optional[int] = None, chunksize: int = 16) -> None:
+        self.__keys = {
+            wallet.get_wallet().classic_address: (wallet.get_wallet().public_key, wallet.get_wallet().private_key)
+            for wallet in wallets
+        }
+        self.__processes = processes or os.cpu_count() or 1
+        self.__chunksize = chunksize
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        if self.__processes > 1:
+            self.__executor = ProcessPoolExecutor(max_workers=self.__processes,
+                                                  initializer=_init_worker,
+                                                  initargs=(self.__keys,))
+
+    def sign(self, transactions: Iterable[dict]) -> List[str]:
+        """
+        Signs transactions in their XRPL JSON form, every transaction needs its sequence, fee and
+        LastLedgerSequence already filled in.
+        :param transactions: The transactions as returned by `Transaction.to_xrpl()`
+        :return: The signed blobs in input order
+        """
+        if self.__executor is None:
+            return [sign_transaction_json(transaction, *self.__keys[transaction["Account"]])
+                    for transaction in transactions]
+        return list(self.__executor.map(_sign_in_worker, transactions, chunksize=self.__chunksize))
+
+    def close(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def __enter__(self) -> ParallelSigner:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import heapq
+import threading
+from typing import List, Optional, Set
+
+from xrpl.models import AccountObjects, AccountObjectType
+
+from .connection import XRPLConnection
+from .wallet import XRPLWallet
+
+# An account can own at most 250 tickets
+MAX_TICKETS = 250
+
+
+class TicketPool:
+    """
+    The unused Tickets of one account, handed out to transactions so they can be submitted in parallel and out of
+    order instead of one after another by sequence. A transaction failing on its ticket does not hold up the others.
+
+    The pool reads the account's tickets from the ledger on first use and creates `batch_size` new ones with a
+    TicketCreate whenever no more than `low_water` are left; in the background while some are still available.
+    Every ticket reserves an owner reserve on the account until it is used.
+    """
+
+    def __init__(self,
+                 conn: XRPLConnection,
+                 wallet: XRPLWallet,
+                 low_water: int = 10,
+                 batch_size: int = 50) -> None:
+        self.__conn = conn
+        self.__wallet = wallet
+        self.__low_water = low_water
+        self.__batch_size = min(batch_size, MAX_TICKETS)
+        self.__condition = threading.Condition()
+        self.__available: List[int] = []
+        self.__in_use: Set[int] = set()
+        self.__loaded = False
+        self.__refilling = False
+        self.__error: Optional[Exception] = None
+
+    def acquire(self) -> int:
+        """
+        Takes the lowest unused ticket, waiting for a refill when the pool is empty.
+        :return: The TicketSequence to send a transaction with
+        """
+        with self.__condition:
+            if not self.__loaded:
+                self.__available = self._load_tickets()
+                heapq.heapify(self.__available)
+                self.__loaded = True
+            refill = len(self.__available) <= self.__low_water and not self.__refilling
+            if refill:
+                self.__refilling = True
+                self.__error = None
+
+        if refill:
+            if self.__available:
+                threading.Thread(target=self._refill, name="xrpl-ticket-refill", daemon=True).start()
+            else:
+                self._refill()
+
+        with self.__condition:
+            while not self.__available:
+                if not self.__refilling:
+                    raise self.__error or RuntimeError("No tickets available")
+                self.__condition.wait()
+            ticket = heapq.heappop(self.__available)
+            self.__in_use.add(ticket)
+            return ticket
+
+    def release(self, ticket: int) -> None:
+        """
+        Returns a ticket a rejected or expired transaction did not use.
+        """
+        with self.__condition:
+            if ticket in self.__in_use:
+                self.__in_use.remove(ticket)
+                heapq.heappush(self.__available, ticket)
+                self.__condition.notify()
+
+    def consume(self, ticket: int) -> None:
+        """
+        Marks a ticket as used by a transaction which made it into a ledger.
+        """
+        with self.__condition:
+            self.__in_use.discard(ticket)
+
+    def available(self) -> int:
+        with self.__condition:
+            return len(self.__available)
+
+    def _refill(self) -> None:
+        from .tx import TransactionBuilder
+
+        try:
+            with self.__condition:
+                count = min(self.__batch_size, MAX_TICKETS - len(self.__available) - len(self.__in_use))
+            if count <= 0:
+                raise RuntimeError(f"The account already owns the maximum of {MAX_TICKETS} tickets")
+            tickets = TransactionBuilder.create_tickets(conn=self.__conn, wallet=self.__wallet, count=count)
+            with self.__condition:
+                for ticket in tickets:
+                    heapq.heappush(self.__available, ticket)
+        except Exception as ex:
+            self.__error = ex
+        finally:
+            with self.__condition:
+                self.__refilling = False
+                self.__condition.notify_all()
+
+    def _load_tickets(self) -> List[int]:
+        tickets = []
+        marker = None
+        while True:
+            response = self.__conn.get_client().request(AccountObjects(
+                account=self.__wallet.get_wallet().classic_address,
+                type=AccountObjectType.TICKET,
+                limit=400,
+                marker=marker
+            ))
+            tickets.extend(ticket["TicketSequence"] for ticket in response.result.get("account_objects", []))
+            marker = response.result.get("marker")
+            if marker is None:
+                return tickets
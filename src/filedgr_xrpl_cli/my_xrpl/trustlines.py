@@ -0,0 +1,99 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from xrpl.clients import XRPLRequestFailureException
+from xrpl.models import AccountLines
+
+from .async_tx import AsyncTransactionBuilder
+from .connection import XRPLConnection
+from .currency import encode_currency
+from .wallet import XRPLWallet
+
+
+@dataclass(frozen=True)
+class TrustlineOutcome:
+    distributor: str
+    code: str
+    # "exists" when the distributor already trusted the code, "created" or "failed" otherwise
+    status: str
+    hash: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TrustlineBatch:
+    """
+    Sets the trustlines of many distributors to many codes of one issuer. The trustlines every distributor already
+    has to the issuer are read with account_lines first and skipped, the missing ones are submitted concurrently:
+    across distributors, and per distributor with the sequences allocated locally by the network state cache.
+    """
+
+    def __init__(self, conn: XRPLConnection, issuer: XRPLWallet, nft: bool = True, concurrency: int = 32) -> None:
+        self.__conn = conn
+        self.__issuer = issuer
+        self.__nft = nft
+        self.__concurrency = concurrency
+
+    def run(self, distributors: List[XRPLWallet], codes: List[str]) -> List[TrustlineOutcome]:
+        return asyncio.run(self.run_async(distributors, codes))
+
+    async def run_async(self, distributors: List[XRPLWallet], codes: List[str]) -> List[TrustlineOutcome]:
+        """
+        :param distributors: The wallets to set the trustlines of
+        :param codes: The token codes every distributor trusts
+        :return: The outcome of every distributor and code, in the order of the distributors and codes
+        """
+        semaphore = asyncio.Semaphore(self.__concurrency)
+
+        async def existing(distributor: XRPLWallet) -> Set[str]:
+            async with semaphore:
+                return await self.existing_currencies(distributor.get_wallet().classic_address)
+
+        async def set_trustline(distributor: XRPLWallet, code: str) -> TrustlineOutcome:
+            address = distributor.get_wallet().classic_address
+            async with semaphore:
+                try:
+                    response = await AsyncTransactionBuilder.set_trustline(conn=self.__conn, issuer=self.__issuer,
+                                                                           distributor=distributor, code=code,
+                                                                           nft=self.__nft)
+                except Exception as ex:
+                    return TrustlineOutcome(distributor=address, code=code, status="failed", error=str(ex))
+            return TrustlineOutcome(distributor=address, code=code, status="created",
+                                    hash=response.result.get("hash"))
+
+        trusted = await asyncio.gather(*(existing(distributor) for distributor in distributors))
+        pending = []
+        for distributor, currencies in zip(distributors, trusted):
+            for code in codes:
+                if encode_currency(code) in currencies:
+                    pending.append(self._exists(distributor, code))
+                else:
+                    pending.append(set_trustline(distributor, code))
+        return list(await asyncio.gather(*pending))
+
+    async def existing_currencies(self, account: str) -> Set[str]:
+        """
+        :return: The currency codes of the issuer the account trusts with a limit above zero
+        """
+        client = self.__conn.get_async_client()
+        currencies = set()
+        marker = None
+        while True:
+            # As the xrpl-py helpers do, so sync and async clients both work
+            response = await client._request_impl(AccountLines(account=account,
+                                                               peer=self.__issuer.get_wallet().classic_address,
+                                                               limit=400,
+                                                               marker=marker))
+            if not response.is_successful():
+                if response.result.get("error") == "actNotFound":
+                    return currencies
+                raise XRPLRequestFailureException(response.result)
+            currencies.update(line["currency"] for line in response.result.get("lines", []) if line["limit"] != "0")
+            marker = response.result.get("marker")
+            if marker is None:
+                return currencies
+
+    @staticmethod
+    async def _exists(distributor: XRPLWallet, code: str) -> TrustlineOutcome:
+        return TrustlineOutcome(distributor=distributor.get_wallet().classic_address, code=code, status="exists")
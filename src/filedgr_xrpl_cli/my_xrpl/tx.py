@@ -1,100 +1,123 @@
 from __future__ import annotations
-from typing import Type, List, Optional
+import asyncio
+from typing import Type, List, Optional, TYPE_CHECKING
 
-from xrpl.models import Memo, NFTokenMintFlag
+from xrpl.asyncio.clients import Client
+from xrpl.asyncio.ledger import get_latest_validated_ledger_sequence
+from xrpl.clients import XRPLRequestFailureException
+from xrpl.models import Memo, NFTokenMintFlag, Response, Transaction, Tx
 
 from .connection import XRPLConnection
+from .currency import encode_currency
+from .journal import JournalStatus, get_journal
+from ..metrics import metrics
+from .network_state import LEDGER_OFFSET, NetworkStateCache
 from .wallet import XRPLWallet
 
 import xrpl
 
-from ..dto.memo import MyMemos
+from ..dto.memo import MemoFormat, MyMemo, MyMemos
+
+if TYPE_CHECKING:
+    from .tickets import TicketPool
+
+# Seconds between the lookups of a submitted transaction, about the time a ledger takes to close
+LEDGER_CLOSE_TIME = 1.0
+# The preliminary result of a transaction whose sequence the account already used, it can never validate
+PAST_SEQUENCE = "tefPAST_SEQ"
+# The preliminary result of a transaction using a ticket the account does not own
+NO_TICKET = "tefNO_TICKET"
+
+
+def _memo_data(memo: MyMemo) -> str:
+    if memo.memo_format == MemoFormat.PROTOBUF:
+        # Only protobuf memos pay for loading the codec
+        from orjson import orjson
+        from ..nft_utils.metadata_codec import encode_metadata
+        return encode_metadata(orjson.loads(memo.memo)).hex().upper()
+    return memo.memo.encode('utf-8').hex().upper()
 
 
 class TransactionBuilder:
 
     @classmethod
-    def set_issuer(cls: Type[TransactionBuilder],
-                   conn: XRPLConnection,
-                   wallet: XRPLWallet,
-                   domain: str = None) -> str:
+    def build_set_issuer(cls: Type[TransactionBuilder],
+                         wallet: XRPLWallet,
+                         domain: str = None) -> xrpl.models.transactions.AccountSet:
         enc_domain = None
         if domain:
             enc_domain = bytes.hex(domain.encode("ASCII"))
 
-        issuer_settings_tx = xrpl.models.transactions.AccountSet(
+        return xrpl.models.transactions.AccountSet(
             account=wallet.get_wallet().classic_address,
             transfer_rate=0,
             tick_size=5,
             domain=enc_domain,
             set_flag=xrpl.models.transactions.AccountSetFlag.ASF_DEFAULT_RIPPLE,
         )
-        cst_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=issuer_settings_tx,
-            wallet=wallet.get_wallet(),
-            client=conn.get_client(),
-        )
-        response = xrpl.transaction.send_reliable_submission(cst_prepared, conn.get_client())
-        return response
 
     @classmethod
-    def set_distributor(cls: Type[TransactionBuilder],
-                        conn: XRPLConnection,
-                        wallet: XRPLWallet,
-                        domain: str = None):
+    def set_issuer(cls: Type[TransactionBuilder],
+                   conn: XRPLConnection,
+                   wallet: XRPLWallet,
+                   domain: str = None) -> str:
+        issuer_settings_tx = cls.build_set_issuer(wallet=wallet, domain=domain)
+        return cls._sign_and_submit(conn=conn, transaction=issuer_settings_tx, wallet=wallet)
+
+    @classmethod
+    def build_set_distributor(cls: Type[TransactionBuilder],
+                              wallet: XRPLWallet,
+                              domain: str = None) -> xrpl.models.transactions.AccountSet:
         enc_domain = None
         if domain:
             enc_domain = bytes.hex(domain.encode("ASCII"))
 
-        hot_settings_tx = xrpl.models.transactions.AccountSet(
+        return xrpl.models.transactions.AccountSet(
             account=wallet.get_wallet().classic_address,
             set_flag=xrpl.models.transactions.AccountSetFlag.ASF_REQUIRE_AUTH,
             domain=enc_domain
         )
-        hst_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=hot_settings_tx,
-            wallet=wallet.get_wallet(),
-            client=conn.get_client(),
-        )
-        response = xrpl.transaction.send_reliable_submission(hst_prepared, conn.get_client())
-        return response
 
     @classmethod
-    def set_trustline(cls: Type[TransactionBuilder],
-                      conn: XRPLConnection,
-                      issuer: XRPLWallet,
-                      distributor: XRPLWallet,
-                      code: str,
-                      nft: bool) -> str:
-
-        enc_code = bytes.hex(code.encode("utf-8")).upper()
-        while len(enc_code) < 40:
-            enc_code += "0"
+    def set_distributor(cls: Type[TransactionBuilder],
+                        conn: XRPLConnection,
+                        wallet: XRPLWallet,
+                        domain: str = None):
+        hot_settings_tx = cls.build_set_distributor(wallet=wallet, domain=domain)
+        return cls._sign_and_submit(conn=conn, transaction=hot_settings_tx, wallet=wallet)
 
-        trust_set_tx = xrpl.models.transactions.TrustSet(
+    @classmethod
+    def build_trustline(cls: Type[TransactionBuilder],
+                        issuer: XRPLWallet,
+                        distributor: XRPLWallet,
+                        code: str,
+                        nft: bool) -> xrpl.models.transactions.TrustSet:
+        return xrpl.models.transactions.TrustSet(
             account=distributor.get_wallet().classic_address,
             limit_amount=xrpl.models.amounts.issued_currency_amount.IssuedCurrencyAmount(
-                currency=enc_code,
+                currency=encode_currency(code),
                 issuer=issuer.get_wallet().classic_address,
                 value="0.000001" if nft else "1"
             )
         )
-        ts_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=trust_set_tx,
-            wallet=distributor.get_wallet(),
-            client=conn.get_client(),
-        )
-        response = xrpl.transaction.send_reliable_submission(ts_prepared, conn.get_client())
-        return response
 
     @classmethod
-    def issue_nft(cls: Type[TransactionBuilder],
-                  conn: XRPLConnection,
-                  issuer: XRPLWallet,
-                  uri: str,
-                  taxon: int = 1,
-                  fees: int = 0) -> str:
-        mint_nft_tx = xrpl.models.transactions.NFTokenMint(
+    def set_trustline(cls: Type[TransactionBuilder],
+                      conn: XRPLConnection,
+                      issuer: XRPLWallet,
+                      distributor: XRPLWallet,
+                      code: str,
+                      nft: bool) -> str:
+        trust_set_tx = cls.build_trustline(issuer=issuer, distributor=distributor, code=code, nft=nft)
+        return cls._sign_and_submit(conn=conn, transaction=trust_set_tx, wallet=distributor)
+
+    @classmethod
+    def build_nft_mint(cls: Type[TransactionBuilder],
+                       issuer: XRPLWallet,
+                       uri: str,
+                       taxon: int = 1,
+                       fees: int = 0) -> xrpl.models.transactions.NFTokenMint:
+        return xrpl.models.transactions.NFTokenMint(
             nftoken_taxon=taxon,
             transfer_fee=fees,
             account=issuer.get_wallet().classic_address,
@@ -102,90 +125,282 @@ class TransactionBuilder:
                 'utf-8').hex().upper(),
             flags=[NFTokenMintFlag.TF_BURNABLE, NFTokenMintFlag.TF_TRANSFERABLE, NFTokenMintFlag.TF_ONLY_XRP]
         )
-        mint_nft_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=mint_nft_tx,
-            wallet=issuer.get_wallet(),
-            client=conn.get_client(),
-        )
-        response = xrpl.transaction.send_reliable_submission(mint_nft_prepared, conn.get_client())
-        return response
 
     @classmethod
-    def issue_transaction_token(cls: Type[TransactionBuilder],
-                                conn: XRPLConnection,
+    def issue_nft(cls: Type[TransactionBuilder],
+                  conn: XRPLConnection,
+                  issuer: XRPLWallet,
+                  uri: str,
+                  taxon: int = 1,
+                  fees: int = 0,
+                  tickets: Optional[TicketPool] = None) -> str:
+        mint_nft_tx = cls.build_nft_mint(issuer=issuer, uri=uri, taxon=taxon, fees=fees)
+        return cls._sign_and_submit(conn=conn, transaction=mint_nft_tx, wallet=issuer, tickets=tickets)
+
+    @classmethod
+    def build_transaction_token(cls: Type[TransactionBuilder],
                                 issuer: XRPLWallet,
                                 distributor: XRPLWallet,
                                 code: str,
                                 memos: Optional[List[MyMemos]] = ()
-                                ) -> str:
-
-        enc_code = bytes.hex(code.encode("utf-8")).upper()
-        while len(enc_code) < 40:
-            enc_code += "0"
-
-        quantity = "0.000001"
-
+                                ) -> xrpl.models.transactions.Payment:
         # Formatting memos
         memos_formated: List[Memo] = []
-        if len(memos) > 0:
+        if memos and len(memos) > 0:
             memos_formated = [
-                Memo(memo_data=memo.memo.encode('utf-8').hex().upper(),
+                Memo(memo_data=_memo_data(memo),
                      memo_format=memo.memo_format.value.encode('utf-8').hex().upper()) for memo in memos]
 
+        return cls.build_transaction_token_with_memos(issuer=issuer, distributor=distributor, code=code,
+                                                      memos=memos_formated)
+
+    @classmethod
+    def build_transaction_token_with_memos(cls: Type[TransactionBuilder],
+                                           issuer: XRPLWallet,
+                                           distributor: XRPLWallet,
+                                           code: str,
+                                           memos: List[Memo]) -> xrpl.models.transactions.Payment:
+        """
+        Builds the token payment carrying memos which are already hex encoded.
+        """
+        quantity = "0.000001"
+
         # Sending the token
-        send_token_tx = xrpl.models.transactions.Payment(
+        return xrpl.models.transactions.Payment(
             account=issuer.get_wallet().classic_address,
             destination=distributor.get_wallet().classic_address,
             amount=xrpl.models.amounts.issued_currency_amount.IssuedCurrencyAmount(
-                currency=enc_code,
+                currency=encode_currency(code),
                 issuer=issuer.get_wallet().classic_address,
                 value=quantity
             ),
-            memos=memos_formated
+            memos=memos
         )
-        pay_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=send_token_tx,
-            wallet=issuer.get_wallet(),
-            client=conn.get_client(),
+
+    @classmethod
+    def issue_transaction_token(cls: Type[TransactionBuilder],
+                                conn: XRPLConnection,
+                                issuer: XRPLWallet,
+                                distributor: XRPLWallet,
+                                code: str,
+                                memos: Optional[List[MyMemos]] = (),
+                                tickets: Optional[TicketPool] = None
+                                ) -> str:
+        send_token_tx = cls.build_transaction_token(issuer=issuer, distributor=distributor, code=code, memos=memos)
+        return cls._sign_and_submit(conn=conn, transaction=send_token_tx, wallet=issuer, tickets=tickets)
+
+    @classmethod
+    def build_nft_burn(cls: Type[TransactionBuilder],
+                       issuer: XRPLWallet,
+                       token_id: str
+                       ) -> xrpl.models.transactions.NFTokenBurn:
+        return xrpl.models.transactions.NFTokenBurn(
+            account=issuer.get_wallet().classic_address,
+            nftoken_id=token_id
         )
-        response = xrpl.transaction.send_reliable_submission(pay_prepared, conn.get_client())
-        return response
 
     @classmethod
     def burn_nft(cls: Type[TransactionBuilder],
                  conn: XRPLConnection,
                  issuer: XRPLWallet,
-                 token_id: str
+                 token_id: str,
+                 tickets: Optional[TicketPool] = None
                  ) -> str:
-        burn_nft_tx = xrpl.models.transactions.NFTokenBurn(
-            account=issuer.get_wallet().classic_address,
-            nftoken_id=token_id
-        )
-        burn_nft_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=burn_nft_tx,
-            wallet=issuer.get_wallet(),
-            client=conn.get_client(),
-        )
-        response = xrpl.transaction.send_reliable_submission(transaction=burn_nft_prepared, client=conn.get_client())
-        return response
+        burn_nft_tx = cls.build_nft_burn(issuer=issuer, token_id=token_id)
+        return cls._sign_and_submit(conn=conn, transaction=burn_nft_tx, wallet=issuer, tickets=tickets)
 
     @classmethod
-    def send_nft(cls: Type[TransactionBuilder],
-                 conn: XRPLConnection,
-                 source: XRPLWallet,
-                 destination: str,
-                 token_id) -> str:
-        offer_nft_tx = xrpl.models.transactions.NFTokenCreateOffer(
+    def build_nft_offer(cls: Type[TransactionBuilder],
+                        source: XRPLWallet,
+                        destination: str,
+                        token_id) -> xrpl.models.transactions.NFTokenCreateOffer:
+        return xrpl.models.transactions.NFTokenCreateOffer(
             account=source.get_wallet().classic_address,
             nftoken_id=token_id,
             amount="0",
             destination=destination,
             flags=1
         )
-        offer_nft_prepared = xrpl.transaction.safe_sign_and_autofill_transaction(
-            transaction=offer_nft_tx,
-            wallet=source.get_wallet(),
-            client=conn.get_client()
+
+    @classmethod
+    def send_nft(cls: Type[TransactionBuilder],
+                 conn: XRPLConnection,
+                 source: XRPLWallet,
+                 destination: str,
+                 token_id,
+                 tickets: Optional[TicketPool] = None) -> str:
+        offer_nft_tx = cls.build_nft_offer(source=source, destination=destination, token_id=token_id)
+        return cls._sign_and_submit(conn=conn, transaction=offer_nft_tx, wallet=source, tickets=tickets)
+
+    @classmethod
+    def build_ticket_create(cls: Type[TransactionBuilder],
+                            wallet: XRPLWallet,
+                            count: int) -> xrpl.models.transactions.TicketCreate:
+        return xrpl.models.transactions.TicketCreate(
+            account=wallet.get_wallet().classic_address,
+            ticket_count=count
         )
-        response = xrpl.transaction.send_reliable_submission(transaction=offer_nft_prepared, client=conn.get_client())
+
+    @classmethod
+    def create_tickets(cls: Type[TransactionBuilder],
+                       conn: XRPLConnection,
+                       wallet: XRPLWallet,
+                       count: int) -> List[int]:
+        """
+        :return: The TicketSequences of the created tickets
+        """
+        ticket_create_tx = cls.build_ticket_create(wallet=wallet, count=count)
+        response = cls._sign_and_submit(conn=conn, transaction=ticket_create_tx, wallet=wallet)
+        # The tickets take the sequences following the one of the TicketCreate, the account sequence moves past them
+        sequence = response.result["Sequence"]
+        conn.get_state().set_sequence(wallet.get_wallet().classic_address, sequence + 1 + count)
+        return list(range(sequence + 1, sequence + 1 + count))
+
+    @classmethod
+    def _sign_and_submit(cls: Type[TransactionBuilder],
+                         conn: XRPLConnection,
+                         transaction: Transaction,
+                         wallet: XRPLWallet,
+                         tickets: Optional[TicketPool] = None):
+        try:
+            return cls._sign_and_submit_once(conn=conn, transaction=transaction, wallet=wallet, tickets=tickets)
+        except xrpl.transaction.XRPLReliableSubmissionException as ex:
+            if not cls._past_sequence(ex, tickets):
+                raise
+        # The local or stored sequence was stale and has been reset, it is read from the ledger for the retry
+        return cls._sign_and_submit_once(conn=conn, transaction=transaction, wallet=wallet, tickets=tickets)
+
+    @classmethod
+    def _sign_and_submit_once(cls: Type[TransactionBuilder],
+                              conn: XRPLConnection,
+                              transaction: Transaction,
+                              wallet: XRPLWallet,
+                              tickets: Optional[TicketPool] = None):
+        ticket = tickets.acquire() if tickets is not None else None
+        journal = get_journal()
+        tx_hash = None
+        try:
+            prepared = cls._autofill_and_sign(conn=conn, transaction=transaction, wallet=wallet, ticket=ticket)
+            tx_hash = journal.record_transaction(conn.get_network(), prepared) if journal is not None else None
+            with metrics.time("submit", transaction_type=transaction.transaction_type.value):
+                response = asyncio.run(cls._submit_and_wait(transaction=prepared, client=conn.get_client()))
+        except xrpl.transaction.XRPLReliableSubmissionException as ex:
+            if journal is not None:
+                journal.record_failure(tx_hash, ex)
+            cls._settle_failure(state=conn.get_state(), account=prepared.account, error=ex, ticket=ticket,
+                                tickets=tickets)
+            raise
+        except BaseException as ex:
+            # Failed before or while submitting with an unknown outcome, resume looks the transaction up
+            if tx_hash is not None:
+                journal.record_status(tx_hash, JournalStatus.SUBMITTED)
+            cls._settle_failure(state=conn.get_state(), account=transaction.account, error=ex, ticket=ticket,
+                                tickets=tickets)
+            raise
+        if journal is not None:
+            journal.record_status(tx_hash, JournalStatus.VALIDATED, "tesSUCCESS")
+        if ticket is not None:
+            tickets.consume(ticket)
+        conn.get_state().observe_transaction(response.result)
         return response
+
+    @staticmethod
+    async def _submit_and_wait(transaction: Transaction, client: Client) -> Response:
+        """
+        Like send_reliable_submission, which only fails right away on tem results, but also fails right away on
+        tef results, such as tefPAST_SEQ or tefNO_TICKET, instead of waiting for the LastLedgerSequence of a
+        transaction which can never validate.
+        """
+        if transaction.last_ledger_sequence is None:
+            raise xrpl.transaction.XRPLReliableSubmissionException("Transaction must have a `last_ledger_sequence`")
+        submit_response = await xrpl.asyncio.transaction.submit(transaction, client)
+        prelim_result = submit_response.result["engine_result"]
+        if prelim_result.startswith(("tem", "tef")):
+            raise xrpl.transaction.XRPLReliableSubmissionException(
+                f"{prelim_result}: {submit_response.result['engine_result_message']}")
+        return await TransactionBuilder._wait_for_outcome(transaction=transaction, client=client,
+                                                          prelim_result=prelim_result)
+
+    @staticmethod
+    async def _wait_for_outcome(transaction: Transaction, client: Client, prelim_result: str) -> Response:
+        """
+        Looks the transaction up until it is validated or its LastLedgerSequence is validated without it, with
+        the messages of send_reliable_submission. The latest validated ledger is read before the lookup, so that
+        a transaction validated in its last ledger is not taken for expired.
+        """
+        tx_hash = transaction.get_hash()
+        while True:
+            await asyncio.sleep(LEDGER_CLOSE_TIME)
+            latest = await get_latest_validated_ledger_sequence(client)
+            # As the xrpl-py helpers do, so sync and async clients both work
+            response = await client._request_impl(Tx(transaction=tx_hash))
+            if not response.is_successful() and response.result.get("error") != "txnNotFound":
+                raise XRPLRequestFailureException(response.result)
+            if response.is_successful() and response.result.get("validated"):
+                engine_result = response.result["meta"]["TransactionResult"]
+                if engine_result != "tesSUCCESS":
+                    raise xrpl.transaction.XRPLReliableSubmissionException(f"Transaction failed: {engine_result}")
+                return response
+            if latest >= transaction.last_ledger_sequence:
+                raise xrpl.transaction.XRPLReliableSubmissionException(
+                    f"The latest validated ledger sequence {latest} is greater than LastLedgerSequence "
+                    f"{transaction.last_ledger_sequence} in the transaction. Prelim result: {prelim_result}")
+
+    @staticmethod
+    def _past_sequence(error: Exception, tickets: Optional[TicketPool]) -> bool:
+        """
+        :return: True when a transaction sent on the account sequence failed because the sequence was used already
+        """
+        return tickets is None and str(error).startswith(PAST_SEQUENCE)
+
+    @classmethod
+    def _settle_failure(cls: Type[TransactionBuilder],
+                        state: NetworkStateCache,
+                        account: str,
+                        error: Exception,
+                        ticket: Optional[int] = None,
+                        tickets: Optional[TicketPool] = None) -> None:
+        """
+        Consumes or hands back the sequence or ticket of a transaction which did not validate successfully.
+        :param error: The XRPLReliableSubmissionException the submission failed with, or the error which
+        interrupted it
+        """
+        consumed = str(error).startswith("Transaction failed: tec")
+        if consumed:
+            # Applied without returning its metadata, the stored account state is outdated
+            state.invalidate_account(account)
+        if ticket is not None and (consumed or str(error).startswith(NO_TICKET)):
+            # A ticket the account does not own would be rejected again, it is dropped from the pool
+            tickets.consume(ticket)
+        elif ticket is not None:
+            tickets.release(ticket)
+        elif not consumed:
+            # The sequence was not consumed, the next submission has to read it from the ledger again
+            state.reset_sequence(account)
+
+    @classmethod
+    def _autofill_and_sign(cls: Type[TransactionBuilder],
+                           conn: XRPLConnection,
+                           transaction: Transaction,
+                           wallet: XRPLWallet,
+                           ticket: Optional[int] = None) -> Transaction:
+        """
+        Autofills sequence, fee and LastLedgerSequence from the network state cache of the connection instead of
+        querying the server for every transaction, then signs locally.
+        :param ticket: The TicketSequence to send the transaction with instead of the next sequence
+        """
+        state = conn.get_state()
+        client = conn.get_client()
+        transaction_type = transaction.transaction_type.value
+        with metrics.time("autofill", transaction_type=transaction_type):
+            transaction_json = transaction.to_dict()
+            if ticket is not None:
+                transaction_json["sequence"] = 0
+                transaction_json["ticket_sequence"] = ticket
+            else:
+                transaction_json["sequence"] = state.next_sequence(transaction.account, client)
+            transaction_json["fee"] = state.fee(client)
+            transaction_json["last_ledger_sequence"] = state.validated_ledger(client) + LEDGER_OFFSET
+        with metrics.time("sign", transaction_type=transaction_type):
+            return xrpl.transaction.safe_sign_transaction(Transaction.from_dict(transaction_json),
+                                                          wallet.get_wallet())
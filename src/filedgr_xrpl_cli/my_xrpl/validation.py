@@ -0,0 +1,153 @@
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from xrpl.clients import WebsocketClient
+from xrpl.models import StreamParameter, Subscribe
+
+from .network_state import NetworkStateCache
+
+
+@dataclass(frozen=True)
+class ValidationOutcome:
+    hash: str
+    validated: bool
+    engine_result: Optional[str] = None
+    ledger_index: Optional[int] = None
+    nftoken_id: Optional[str] = None
+    offer_id: Optional[str] = None
+
+
+def offer_id_from_meta(meta: dict) -> Optional[str]:
+    """
+    :param meta: The metadata of a validated transaction
+    :return: The ID of the NFTokenOffer the transaction created, None when it did not create one
+    """
+    if "offer_id" in meta:
+        return meta["offer_id"]
+    # Nodes older than rippled 1.11 do not add the offer_id to the metadata
+    for node in meta.get("AffectedNodes", []):
+        created = node.get("CreatedNode")
+        if created is not None and created.get("LedgerEntryType") == "NFTokenOffer":
+            return created["LedgerIndex"]
+    return None
+
+
+class ValidationTracker:
+    """
+    Tracks the validation of many submitted transactions over one WebSocket subscription per network instead of
+    polling every transaction. The accounts stream reports every validated transaction of the tracked accounts and
+    the ledger stream every validated ledger, which expires the transactions whose LastLedgerSequence it passed.
+    Validated ledgers are also pushed into the network state cache, so autofill does not have to poll for them.
+
+    Register a transaction with `track` before submitting it, its future resolves with the outcome.
+    """
+
+    def __init__(self, ws_url: str, state: Optional[NetworkStateCache] = None, history: int = 10000) -> None:
+        """
+        :param ws_url: The WebSocket endpoint of the network
+        :param state: The network state cache to push the validated ledgers to
+        :param history: The number of recent outcomes kept for transactions registered after their validation
+        """
+        self.__ws_url = ws_url
+        self.__state = state
+        self.__history = history
+        self.__lock = threading.Lock()
+        self.__client: Optional[WebsocketClient] = None
+        self.__reader: Optional[threading.Thread] = None
+        self.__pending: Dict[str, Tuple[int, Future]] = {}
+        self.__recent: OrderedDict[str, ValidationOutcome] = OrderedDict()
+        self.__accounts: Set[str] = set()
+
+    def start(self) -> bool:
+        """
+        Connects and subscribes to the ledger stream.
+        :return: False when the WebSocket endpoint cannot be reached
+        """
+        client = WebsocketClient(self.__ws_url)
+        try:
+            client.open()
+            client.send(Subscribe(streams=[StreamParameter.LEDGER]))
+        except Exception:
+            client.close()
+            return False
+        self.__client = client
+        self.__reader = threading.Thread(target=self._read, name="xrpl-validation-tracker", daemon=True)
+        self.__reader.start()
+        return True
+
+    def is_connected(self) -> bool:
+        return self.__client is not None and self.__client.is_open()
+
+    def track(self, tx_hash: str, account: str, last_ledger_sequence: int) -> Future:
+        """
+        :param tx_hash: The hash of the signed transaction
+        :param account: The account sending the transaction
+        :param last_ledger_sequence: The LastLedgerSequence of the transaction
+        :return: A future resolved with the ValidationOutcome of the transaction
+        """
+        future: Future = Future()
+        with self.__lock:
+            if tx_hash in self.__recent:
+                future.set_result(self.__recent[tx_hash])
+                return future
+            self.__pending[tx_hash] = (last_ledger_sequence, future)
+            subscribe = account not in self.__accounts
+            self.__accounts.add(account)
+        if subscribe and self.__client is not None:
+            self.__client.send(Subscribe(accounts=[account]))
+        return future
+
+    def forget(self, tx_hash: str) -> None:
+        """
+        Stops tracking a transaction which was not applied.
+        """
+        with self.__lock:
+            self.__pending.pop(tx_hash, None)
+
+    def handle(self, message: dict) -> None:
+        """
+        Processes one message of the subscription.
+        """
+        if message.get("type") == "transaction" and message.get("validated"):
+            meta = message.get("meta", {})
+            if self.__state is not None:
+                self.__state.observe_transaction(message)
+            outcome = ValidationOutcome(hash=message["transaction"]["hash"],
+                                        validated=True,
+                                        engine_result=meta.get("TransactionResult", message.get("engine_result")),
+                                        ledger_index=message.get("ledger_index"),
+                                        nftoken_id=meta.get("nftoken_id"),
+                                        offer_id=offer_id_from_meta(meta))
+            self._resolve(outcome)
+        elif message.get("type") == "ledgerClosed":
+            ledger_index = message["ledger_index"]
+            if self.__state is not None:
+                self.__state.observe_ledger(ledger_index)
+            with self.__lock:
+                expired = [tx_hash for tx_hash, (last_ledger_sequence, _) in self.__pending.items()
+                           if ledger_index > last_ledger_sequence]
+            for tx_hash in expired:
+                self._resolve(ValidationOutcome(hash=tx_hash, validated=False, ledger_index=ledger_index))
+
+    def close(self) -> None:
+        if self.__client is not None:
+            self.__client.close()
+            self.__client = None
+
+    def _resolve(self, outcome: ValidationOutcome) -> None:
+        with self.__lock:
+            pending = self.__pending.pop(outcome.hash, None)
+            if outcome.validated:
+                self.__recent[outcome.hash] = outcome
+                while len(self.__recent) > self.__history:
+                    self.__recent.popitem(last=False)
+        if pending is not None:
+            pending[1].set_result(outcome)
+
+    def _read(self) -> None:
+        for message in self.__client:
+            self.handle(message)
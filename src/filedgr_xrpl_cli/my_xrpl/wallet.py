@@ -1,6 +1,7 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Type
+from xrpl import CryptoAlgorithm
 from xrpl.clients import JsonRpcClient
 from xrpl.wallet import Wallet, generate_faucet_wallet
 from filedgr_xrpl_cli.my_io.file_io import MyFileIO
@@ -19,14 +20,26 @@ class FileWalletLoader(WalletLoader):
         from orjson import orjson
         wallet_json = MyFileIO.read_from_file(path)
         wallet = XRPLWallet(**orjson.loads(wallet_json))
+        # The stored keys are used without deriving them again, a file is only trusted once they match its seed
+        wallet.verify_keys()
         return wallet
 
 
 class XRPLWallet:
 
     def __init__(self, **kwargs) -> None:
-        self.__wallet = Wallet(seed=kwargs.get("seed"), sequence=kwargs.get("sequence"))
-        pass
+        if kwargs.get("public_key") and kwargs.get("private_key") and kwargs.get("classic_address"):
+            # The keys were derived when the wallet was stored, skip the derivation from the seed
+            self.__wallet = Wallet.__new__(Wallet)
+            self.__wallet.seed = kwargs.get("seed")
+            self.__wallet.algorithm = CryptoAlgorithm(kwargs.get("algorithm") or (
+                CryptoAlgorithm.ED25519 if self.__wallet.seed.startswith("sEd") else CryptoAlgorithm.SECP256K1))
+            self.__wallet.public_key = kwargs.get("public_key")
+            self.__wallet.private_key = kwargs.get("private_key")
+            self.__wallet.classic_address = kwargs.get("classic_address")
+            self.__wallet.sequence = kwargs.get("sequence")
+        else:
+            self.__wallet = Wallet(seed=kwargs.get("seed"), sequence=kwargs.get("sequence"))
 
     @classmethod
     def create_wallet(cls: Type[XRPLWallet]) -> XRPLWallet:
@@ -40,5 +53,16 @@ class XRPLWallet:
         return XRPLWallet(seed=wallet.seed,
                           sequence=wallet.sequence)
 
+    def verify_keys(self) -> None:
+        """
+        Derives the keys and address from the seed and compares them with the ones the wallet was loaded with.
+        :raise ValueError: When they do not match
+        """
+        derived = Wallet(seed=self.__wallet.seed, sequence=self.__wallet.sequence, algorithm=self.__wallet.algorithm)
+        for field in ("public_key", "private_key", "classic_address"):
+            if getattr(derived, field) != getattr(self.__wallet, field):
+                raise ValueError(f"The {field} of wallet {self.__wallet.classic_address} does not derive from its "
+                                 f"seed")
+
     def get_wallet(self):
         return self.__wallet
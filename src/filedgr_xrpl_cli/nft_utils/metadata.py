@@ -0,0 +1,135 @@
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Type
+
+from orjson import orjson
+
+from ..dto.filedgr_nft_type import FiledgrArtV0NftType, FiledgrArtV0NftTypeTemplate
+from ..dto.metadata_format import MetadataFormat
+from ..my_io.file_io import MyFileIO
+
+_REQUIRED_COLUMNS = ("name", "description", "image")
+
+_SUFFIXES = {MetadataFormat.JSON: ".json", MetadataFormat.PROTOBUF: ".pb"}
+
+
+def _file_name(name: str) -> str:
+    """
+    :return: The name, when it names a file in the output directory and not a path leading out of it
+    """
+    if not name or name in (".", "..") or "\0" in name or any(sep in name for sep in ("/", "\\", os.sep)):
+        raise ValueError(f"Not a valid metadata file name: {name!r}")
+    return name
+
+
+class MetadataGenerator:
+    """
+    Builds the art.v0 metadata of many NFTs from records and a template. The template is validated once, every
+    record is then turned into a plain dictionary with the same layout `FiledgrArtV0NftType.json(by_alias=True)`
+    produces and serialized by orjson, without a pydantic model per NFT.
+    """
+
+    def __init__(self, template: FiledgrArtV0NftTypeTemplate) -> None:
+        self.__schema = FiledgrArtV0NftType.__fields__["schema_"].default
+        self.__nft_type = FiledgrArtV0NftType.__fields__["nft_type"].default
+        self.__collection = template.collection.dict() if template.collection else None
+        self.__attributes = [
+            (attribute.trait_type.value, attribute.description, attribute.value,
+             attribute.column or attribute.trait_type.value)
+            for attribute in template.attributes
+        ]
+
+    @classmethod
+    def from_file(cls: Type[MetadataGenerator], path: str) -> MetadataGenerator:
+        """
+        :param path: A .json, .yaml or .yml template
+        """
+        if Path(path).suffix.lower() in (".yaml", ".yml"):
+            import yaml
+            with open(path, "r") as file:
+                return cls(FiledgrArtV0NftTypeTemplate.parse_obj(yaml.safe_load(file)))
+        return cls(FiledgrArtV0NftTypeTemplate.parse_file(path))
+
+    def build(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        :param record: The name, description, image, optional file and the attribute values of one NFT
+        :return: The metadata of the NFT
+        """
+        missing = [column for column in _REQUIRED_COLUMNS if not record.get(column)]
+        if missing:
+            raise ValueError(f"Record is missing {', '.join(missing)}: {record}")
+
+        attributes = []
+        for trait_type, description, default, column in self.__attributes:
+            value = record.get(column, default)
+            if value is None:
+                raise ValueError(f"Record has no value for the attribute {trait_type}: {record}")
+            attributes.append({"trait_type": trait_type, "description": description, "value": str(value)})
+
+        file = record.get("file")
+        return {
+            "schema": self.__schema,
+            "nftType": self.__nft_type,
+            "name": str(record["name"]),
+            "description": str(record["description"]),
+            "image": str(record["image"]),
+            "file": str(file) if file is not None else None,
+            "collection": self.__collection,
+            "attributes": attributes if attributes else None,
+        }
+
+    def dumps(self, record: Dict[str, Any], metadata_format: MetadataFormat = MetadataFormat.JSON) -> bytes:
+        if metadata_format == MetadataFormat.PROTOBUF:
+            # google.protobuf is only imported for protobuf metadata, once and then from sys.modules
+            from .metadata_codec import encode_metadata
+            return encode_metadata(self.build(record))
+        return orjson.dumps(self.build(record))
+
+    def write_ndjson(self, records: Iterable[Dict[str, Any]], path: str) -> int:
+        """
+        Streams the metadata of all records into one file, one JSON document per line.
+        :return: The number of documents written
+        """
+        count = 0
+        with MyFileIO.open_atomic(path) as file:
+            for record in records:
+                file.write(orjson.dumps(self.build(record), option=orjson.OPT_APPEND_NEWLINE))
+                count += 1
+        return count
+
+    def write_delimited(self, records: Iterable[Dict[str, Any]], path: str) -> int:
+        """
+        Streams the protobuf metadata of all records into one file, every message prefixed by its varint length.
+        :return: The number of messages written
+        """
+        from .metadata_codec import delimit, encode_metadata
+
+        count = 0
+        with MyFileIO.open_atomic(path) as file:
+            for record in records:
+                file.write(delimit(encode_metadata(self.build(record))))
+                count += 1
+        return count
+
+    def write_files(self,
+                    records: Iterable[Dict[str, Any]],
+                    directory: str,
+                    name_column: str = "id",
+                    metadata_format: MetadataFormat = MetadataFormat.JSON) -> int:
+        """
+        Writes the metadata of every record to its own file `<directory>/<name>.json`, or `<name>.pb` in protobuf.
+        The files are written atomically and synced to disk in groups instead of one by one.
+        :param name_column: The column naming the file, records without it are named by their position. Names with
+        path separators are rejected
+        :return: The number of files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        suffix = _SUFFIXES[metadata_format]
+        count = 0
+        with MyFileIO.group_commit() as group:
+            for index, record in enumerate(records):
+                group.write(os.path.join(directory, f"{_file_name(str(record.get(name_column, index)))}{suffix}"),
+                            self.dumps(record, metadata_format))
+                count += 1
+        return count
@@ -0,0 +1,166 @@
+from typing import Any, Dict, Iterator, Union
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+from ..dto.filedgr_nft_type import FiledgrArtV0NftType
+
+_SCHEMA = FiledgrArtV0NftType.__fields__["schema_"].default
+_NFT_TYPE = FiledgrArtV0NftType.__fields__["nft_type"].default
+
+# The numbers are part of the wire format, new trait types get new numbers
+_TRAIT_NUMBERS = {
+    "smartNftUri": 1,
+    "transactionReceiver": 2,
+    "transactionToken": 3,
+    "transactionFlag": 4,
+}
+_TRAIT_NAMES = {number: name for name, number in _TRAIT_NUMBERS.items()}
+
+_OPTIONAL = descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
+_REPEATED = descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+_STRING = descriptor_pb2.FieldDescriptorProto.TYPE_STRING
+_ENUM = descriptor_pb2.FieldDescriptorProto.TYPE_ENUM
+_MESSAGE = descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
+
+
+def _build_message_class():
+    """
+    Declares the art.v0 metadata next to the `com.filedgr.nft.Nft` reference of filedgr-nft-protobuf:
+
+        message ArtV0 {
+          optional string schema = 1;    // unset for the default art.v0 schema
+          optional string nft_type = 2;  // unset for "art.v0"
+          optional string name = 3;
+          optional string description = 4;
+          optional string image = 5;
+          optional string file = 6;
+          optional Collection collection = 7;
+          repeated Attribute attributes = 8;
+        }
+
+    proto2, so that unset optional fields read back as None rather than empty strings.
+    """
+    file = descriptor_pb2.FileDescriptorProto(name="filedgr_art_v0.proto", package="com.filedgr.nft", syntax="proto2")
+    trait = file.enum_type.add(name="TraitType")
+    for name, number in _TRAIT_NUMBERS.items():
+        trait.value.add(name=name, number=number)
+
+    collection = file.message_type.add(name="Collection")
+    collection.field.add(name="name", number=1, label=_OPTIONAL, type=_STRING)
+    collection.field.add(name="family", number=2, label=_OPTIONAL, type=_STRING)
+
+    attribute = file.message_type.add(name="Attribute")
+    attribute.field.add(name="trait_type", number=1, label=_OPTIONAL, type=_ENUM,
+                        type_name=".com.filedgr.nft.TraitType")
+    attribute.field.add(name="description", number=2, label=_OPTIONAL, type=_STRING)
+    attribute.field.add(name="value", number=3, label=_OPTIONAL, type=_STRING)
+
+    art = file.message_type.add(name="ArtV0")
+    for number, name in enumerate(("schema", "nft_type", "name", "description", "image", "file"), start=1):
+        art.field.add(name=name, number=number, label=_OPTIONAL, type=_STRING)
+    art.field.add(name="collection", number=7, label=_OPTIONAL, type=_MESSAGE,
+                  type_name=".com.filedgr.nft.Collection")
+    art.field.add(name="attributes", number=8, label=_REPEATED, type=_MESSAGE,
+                  type_name=".com.filedgr.nft.Attribute")
+
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("com.filedgr.nft.ArtV0"))
+
+
+_ArtV0 = _build_message_class()
+
+
+def encode_metadata(metadata: Dict[str, Any]) -> bytes:
+    """
+    Encodes art.v0 metadata as protobuf. Field names are replaced by field numbers, the trait types by enum
+    numbers and the default schema and NFT type are left out.
+    :param metadata: The metadata with the layout of `FiledgrArtV0NftType.json(by_alias=True)`
+    :return: The serialized message
+    """
+    message = _ArtV0(name=metadata["name"], description=metadata["description"], image=metadata["image"])
+    if metadata.get("schema", _SCHEMA) != _SCHEMA:
+        message.schema = metadata["schema"]
+    if metadata.get("nftType", _NFT_TYPE) != _NFT_TYPE:
+        message.nft_type = metadata["nftType"]
+    if metadata.get("file") is not None:
+        message.file = metadata["file"]
+    collection = metadata.get("collection")
+    if collection is not None:
+        message.collection.name = collection["name"]
+        if collection.get("family") is not None:
+            message.collection.family = collection["family"]
+    for attribute in metadata.get("attributes") or ():
+        encoded = message.attributes.add(trait_type=_TRAIT_NUMBERS[attribute["trait_type"]],
+                                         value=attribute["value"])
+        if attribute.get("description") is not None:
+            encoded.description = attribute["description"]
+    return message.SerializeToString()
+
+
+def decode_metadata(data: Union[bytes, memoryview]) -> Dict[str, Any]:
+    """
+    :param data: A message written by `encode_metadata`
+    :return: The metadata with the layout of `FiledgrArtV0NftType.json(by_alias=True)`
+    """
+    message = _ArtV0.FromString(bytes(data))
+    attributes = [
+        {"trait_type": _TRAIT_NAMES[attribute.trait_type],
+         "description": attribute.description if attribute.HasField("description") else None,
+         "value": attribute.value}
+        for attribute in message.attributes
+    ]
+    return {
+        "schema": message.schema if message.HasField("schema") else _SCHEMA,
+        "nftType": message.nft_type if message.HasField("nft_type") else _NFT_TYPE,
+        "name": message.name,
+        "description": message.description,
+        "image": message.image,
+        "file": message.file if message.HasField("file") else None,
+        "collection": {
+            "name": message.collection.name,
+            "family": message.collection.family if message.collection.HasField("family") else None,
+        } if message.HasField("collection") else None,
+        "attributes": attributes if attributes else None,
+    }
+
+
+def _varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def delimit(message: bytes) -> bytes:
+    """
+    :return: The message prefixed by its varint length, the way protobuf streams many messages in one file
+    """
+    return _varint(len(message)) + message
+
+
+def iter_delimited(data: Union[bytes, memoryview]) -> Iterator[bytes]:
+    """
+    :param data: Messages written one after another by `delimit`
+    :return: An iterator over the messages, without their length prefix
+    """
+    with memoryview(data) as view:
+        position = 0
+        while position < len(view):
+            length, shift = 0, 0
+            while True:
+                if position >= len(view):
+                    raise ValueError("Truncated length prefix")
+                byte = view[position]
+                position += 1
+                length |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            if position + length > len(view):
+                raise ValueError("Truncated message")
+            # A copy, so that no slice keeps a mapped file open
+            yield bytes(view[position:position + length])
+            position += length
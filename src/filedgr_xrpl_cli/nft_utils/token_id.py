@@ -0,0 +1,118 @@
+import binascii
+from typing import Iterator, List, NamedTuple
+
+# tfBurnable | tfOnlyXRP | tfTransferable, the flags the TransactionBuilder mints with
+DEFAULT_NFT_FLAGS = 0x000B
+
+_TAXON_MULTIPLIER = 384160001
+_TAXON_INCREMENT = 2459
+_UINT32 = 0xFFFFFFFF
+
+# numpy is an optional speed-up, imported on first use and False when it is not installed
+_numpy = None
+
+
+def _get_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+
+class NftTokenIdFields(NamedTuple):
+    flags: int
+    transfer_fee: int
+    issuer: str
+    taxon: int
+    sequence: int
+
+
+def scramble_taxon(taxon: int, token_sequence: int) -> int:
+    """
+    Method to cipher the taxon the way rippled stores it in an NFTokenID.
+    :param taxon: The taxon of the NFT
+    :param token_sequence: The sequence of the NFT on the issuer account
+    :return: The ciphered taxon
+    """
+    return (taxon ^ (_TAXON_MULTIPLIER * token_sequence + _TAXON_INCREMENT)) & _UINT32
+
+
+def nft_token_ids(issuer: str,
+                  start_sequence: int,
+                  count: int = 1,
+                  taxon: int = 1,
+                  transfer_fee: int = 0,
+                  flags: int = DEFAULT_NFT_FLAGS) -> List[str]:
+    """
+    Method to compute the NFTokenIDs of `count` consecutive mints of an issuer without querying the ledger.
+    The 32 byte IDs are packed into one buffer and hex encoded in a single pass, vectorized with numpy when it
+    is installed.
+    :param issuer: The classic address of the issuer
+    :param start_sequence: The token sequence of the first NFT (MintedNFTokens, plus FirstNFTokenSequence once
+    fixNFTokenRemint is enabled)
+    :param count: The number of IDs to compute
+    :param taxon: The taxon of the NFTs
+    :param transfer_fee: The transfer fee of the NFTs
+    :param flags: The NFTokenMint flags of the NFTs
+    :return: The NFTokenIDs in mint order
+    """
+    from xrpl.core.addresscodec import decode_classic_address
+
+    if count <= 0:
+        return []
+    prefix = flags.to_bytes(2, "big") + transfer_fee.to_bytes(2, "big") + decode_classic_address(issuer)
+
+    np = _get_numpy()
+    if np:
+        sequences = (np.arange(count, dtype=np.uint64) + np.uint64(start_sequence)) & np.uint64(_UINT32)
+        scrambled = (np.uint64(taxon) ^ (np.uint64(_TAXON_MULTIPLIER) * sequences + np.uint64(_TAXON_INCREMENT))) \
+            & np.uint64(_UINT32)
+        packed = np.empty((count, 32), dtype=np.uint8)
+        packed[:, :24] = np.frombuffer(prefix, dtype=np.uint8)
+        packed[:, 24:28] = scrambled.astype(">u4").view(np.uint8).reshape(count, 4)
+        packed[:, 28:] = sequences.astype(">u4").view(np.uint8).reshape(count, 4)
+        buffer = packed.tobytes()
+    else:
+        buffer = b"".join(
+            prefix + scramble_taxon(taxon, sequence).to_bytes(4, "big") + (sequence & _UINT32).to_bytes(4, "big")
+            for sequence in range(start_sequence, start_sequence + count)
+        )
+
+    encoded = binascii.hexlify(buffer).upper().decode("ascii")
+    return [encoded[i:i + 64] for i in range(0, len(encoded), 64)]
+
+
+def iter_nft_token_ids(issuer: str,
+                       start_sequence: int,
+                       count: int,
+                       chunk_size: int = 65536,
+                       **kwargs) -> Iterator[List[str]]:
+    """
+    Method to compute a large range of NFTokenIDs in chunks of bounded size.
+    :return: An iterator of lists with at most `chunk_size` NFTokenIDs
+    """
+    for offset in range(0, count, chunk_size):
+        yield nft_token_ids(issuer, start_sequence + offset, min(chunk_size, count - offset), **kwargs)
+
+
+def parse_nft_token_id(token_id: str) -> NftTokenIdFields:
+    """
+    Method to decode the fields packed into an NFTokenID.
+    :param token_id: The hex encoded NFTokenID
+    :return: The flags, transfer fee, issuer classic address, unciphered taxon and token sequence of the NFT
+    """
+    from xrpl.core.addresscodec import encode_classic_address
+
+    raw = bytes.fromhex(token_id)
+    if len(raw) != 32:
+        raise ValueError(f"Not an NFTokenID: {token_id}")
+    sequence = int.from_bytes(raw[28:], "big")
+    return NftTokenIdFields(flags=int.from_bytes(raw[:2], "big"),
+                            transfer_fee=int.from_bytes(raw[2:4], "big"),
+                            issuer=encode_classic_address(raw[4:24]),
+                            taxon=scramble_taxon(int.from_bytes(raw[24:28], "big"), sequence),
+                            sequence=sequence)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+import http.client
+import os
+import socket
+from typing import Optional
+
+from ..settings import default_path
+
+# Address of a running `xrpl serve` daemon the commands forward to: a Unix socket path or http://host:port
+DAEMON_ENV = "XRPL_CLI_DAEMON"
+# The token file of a daemon listening on TCP, by default the one next to the default socket
+DAEMON_TOKEN_ENV = "XRPL_CLI_DAEMON_TOKEN"
+
+_daemon_address: Optional[str] = None
+
+
+class DaemonError(Exception):
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"Daemon returned {status}: {message}")
+        self.status = status
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.__socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.__socket_path)
+
+
+def token_path_for(socket_path: str) -> str:
+    """
+    :return: The path of the token file the daemon listening on `socket_path` writes
+    """
+    return f"{socket_path}.token"
+
+
+class DaemonClient:
+    """
+    Thin client of the `xrpl serve` daemon, keeping one connection to it open.
+    """
+
+    def __init__(self, address: str, timeout: float = 120.0, token: Optional[str] = None) -> None:
+        """
+        :param address: The path of the daemon's Unix socket or its http://host:port URL
+        :param timeout: Seconds to wait for an operation, submissions wait for validation
+        :param token: The daemon's token, read from its token file by default
+        """
+        if address.startswith("http://"):
+            self.__connection = http.client.HTTPConnection(address[len("http://"):].rstrip("/"), timeout=timeout)
+            token_path = os.environ.get(DAEMON_TOKEN_ENV) or token_path_for(f"{default_path}/daemon.sock")
+        else:
+            self.__connection = _UnixHTTPConnection(address, timeout=timeout)
+            token_path = token_path_for(address)
+        if token is None:
+            with open(token_path, "r") as file:
+                token = file.read().strip()
+        self.__token = token
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def call(self, operation: str, **params) -> dict:
+        """
+        :param operation: The name of the operation, e.g. "nft/mint"
+        :param params: The arguments of the operation
+        :return: The result of the operation
+        """
+        return self._request("POST", f"/{operation}", params)
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    def _request(self, method: str, url: str, params: Optional[dict] = None) -> dict:
+        from orjson import orjson
+
+        body = orjson.dumps(params) if params is not None else None
+        self.__connection.request(method, url, body=body, headers={"Content-Type": "application/json",
+                                                                   "Authorization": f"Bearer {self.__token}"})
+        response = self.__connection.getresponse()
+        content = orjson.loads(response.read())
+        if response.status != 200:
+            raise DaemonError(response.status, content.get("error", ""))
+        return content
+
+
+def use_daemon(address: Optional[str]) -> None:
+    """
+    Makes the commands of this process forward to the daemon at `address`, None runs them locally.
+    """
+    global _daemon_address
+    _daemon_address = address
+
+
+def daemon_address() -> Optional[str]:
+    """
+    :return: The daemon configured through `use_daemon` or the XRPL_CLI_DAEMON variable, None when there is none
+    """
+    return _daemon_address or os.environ.get(DAEMON_ENV) or None
+
+
+def forward(operation: str, path: str, **params) -> Optional[dict]:
+    """
+    Runs an operation on the configured daemon.
+    :param path: The CLI directory of the command, the daemon refuses it unless it serves the same directory
+    :return: The result of the operation, or None when no daemon is configured and the command has to run locally
+    """
+    address = daemon_address()
+    if not address:
+        return None
+    client = DaemonClient(address)
+    try:
+        # Absolute, as the daemon resolves relative paths against its own working directory
+        return client.call(operation, path=os.path.abspath(path), **params)
+    finally:
+        client.close()
@@ -0,0 +1,276 @@
+from __future__ import annotations
+import hmac
+import ipaddress
+import os
+import secrets
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from orjson import orjson
+from xrpl.transaction import XRPLReliableSubmissionException
+
+from ..dto.memo import MyMemos
+from ..metrics import metrics
+from ..my_xrpl.connection import XRPLConnection
+from ..my_xrpl.keystore import KeystoreWalletLoader
+from ..my_xrpl.tickets import TicketPool
+from ..my_xrpl.tx import TransactionBuilder
+from ..my_xrpl.wallet import XRPLWallet
+from ..settings import default_path
+from .client import token_path_for
+
+_LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+class XRPLDaemon:
+    """
+    The wallet, payment and NFT operations of the CLI behind one long-running process. Wallets are loaded once
+    and kept in memory, and every network keeps its pooled connection and network state cache between requests.
+    Operations are looked up by the name of the CLI command, e.g. "nft/mint", and take the command's arguments.
+
+    With tickets, mints, token payments and NFT offers of the same account are sent on Tickets from a pool per
+    account and network, so concurrent requests are submitted in parallel instead of queuing on the sequence.
+    """
+
+    def __init__(self, path: str = default_path, tickets: bool = False) -> None:
+        self.__path = path
+        self.__loader = KeystoreWalletLoader(path)
+        self.__wallets: Dict[str, XRPLWallet] = {}
+        self.__wallets_lock = threading.Lock()
+        self.__tickets = tickets
+        self.__ticket_pools: Dict[Tuple[str, str], TicketPool] = {}
+        self.__operations: Dict[str, Callable[..., dict]] = {
+            "wallet/set-domain": self.set_domain,
+            "wallet/trustline": self.trustline,
+            "payment/send-token": self.send_token,
+            "nft/mint": self.mint,
+            "nft/get-id": self.get_id,
+            "nft/burn": self.burn,
+            "nft/send": self.send,
+        }
+
+    def get_operations(self) -> List[str]:
+        return sorted(self.__operations)
+
+    def dispatch(self, operation: str, params: dict) -> dict:
+        """
+        :param operation: The name of the operation
+        :param params: The keyword arguments of the operation, and optionally the CLI directory of the client as
+        `path`, which has to be the one of the daemon
+        :return: The JSON serializable result of the operation
+        """
+        if operation not in self.__operations:
+            raise LookupError(f"Unknown operation: {operation}")
+        params = dict(params)
+        path = params.pop("path", None)
+        if path is not None and os.path.realpath(path) != os.path.realpath(self.__path):
+            raise ValueError(f"The daemon serves the CLI directory {os.path.abspath(self.__path)}, not {path}")
+        return self.__operations[operation](**params)
+
+    def health(self) -> dict:
+        return {"status": "ok", "operations": self.get_operations(), "wallets": len(self.__wallets)}
+
+    def load_wallet(self, name: str) -> XRPLWallet:
+        with self.__wallets_lock:
+            if name not in self.__wallets:
+                self.__wallets[name] = self.__loader.load_wallet(name)
+            return self.__wallets[name]
+
+    def get_ticket_pool(self, name: str, network: str) -> Optional[TicketPool]:
+        """
+        :return: The ticket pool of the wallet on the network, None when the daemon does not use tickets
+        """
+        if not self.__tickets:
+            return None
+        wallet = self.load_wallet(name)
+        with self.__wallets_lock:
+            if (name, network) not in self.__ticket_pools:
+                self.__ticket_pools[(name, network)] = TicketPool(XRPLConnection.for_network(network, self.__path), wallet)
+            return self.__ticket_pools[(name, network)]
+
+    def set_domain(self, name: str, domain: str, network: str = "testnet") -> dict:
+        return _to_json(TransactionBuilder.set_issuer(conn=XRPLConnection.for_network(network, self.__path),
+                                                      wallet=self.load_wallet(name),
+                                                      domain=domain))
+
+    def trustline(self, issuer: str, distributor: str, code: str, nft: bool = True, network: str = "testnet") -> dict:
+        return _to_json(TransactionBuilder.set_trustline(conn=XRPLConnection.for_network(network, self.__path),
+                                                         issuer=self.load_wallet(issuer),
+                                                         distributor=self.load_wallet(distributor),
+                                                         code=code,
+                                                         nft=nft))
+
+    def send_token(self,
+                   issuer: str,
+                   distributor: str,
+                   code: str,
+                   memos: Optional[List[dict]] = None,
+                   network: str = "testnet") -> dict:
+        return _to_json(TransactionBuilder.issue_transaction_token(
+            conn=XRPLConnection.for_network(network, self.__path),
+            issuer=self.load_wallet(issuer),
+            distributor=self.load_wallet(distributor),
+            code=code,
+            memos=MyMemos.parse_obj(memos).__root__ if memos else None,
+            tickets=self.get_ticket_pool(issuer, network)))
+
+    def mint(self, issuer: str, uri: str, taxon: int = 1, fees: int = 0, network: str = "testnet") -> dict:
+        return _to_json(TransactionBuilder.issue_nft(conn=XRPLConnection.for_network(network, self.__path),
+                                                     issuer=self.load_wallet(issuer),
+                                                     uri=uri,
+                                                     taxon=taxon,
+                                                     fees=fees,
+                                                     tickets=self.get_ticket_pool(issuer, network)))
+
+    def get_id(self, issuer: str, network: str = "testnet", refresh: bool = True) -> dict:
+        from ..nft_utils.token_id import nft_token_ids
+
+        account_id = self.load_wallet(issuer).get_wallet().classic_address
+        conn = XRPLConnection.for_network(network, self.__path)
+        start_sequence = conn.get_state().next_token_sequence(account_id, conn.get_client(), refresh=refresh)
+        return {"token_id": nft_token_ids(issuer=account_id, start_sequence=start_sequence)[0]}
+
+    def burn(self, issuer: str, token_id: str, network: str = "testnet") -> dict:
+        return _to_json(TransactionBuilder.burn_nft(conn=XRPLConnection.for_network(network, self.__path),
+                                                    issuer=self.load_wallet(issuer),
+                                                    token_id=token_id))
+
+    def send(self, source: str, destination: str, token_id: str, network: str = "testnet") -> dict:
+        return _to_json(TransactionBuilder.send_nft(conn=XRPLConnection.for_network(network, self.__path),
+                                                    source=self.load_wallet(source),
+                                                    destination=destination,
+                                                    token_id=token_id,
+                                                    tickets=self.get_ticket_pool(source, network)))
+
+
+def _to_json(response) -> dict:
+    return {"status": response.status.value, "result": response.result}
+
+
+class _DaemonRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /health, GET /metrics (Prometheus text) and POST /<group>/<command> with the arguments as a JSON object.
+    Every request carries the daemon's token as `Authorization: Bearer <token>` and a loopback Host, so that web
+    pages, which can reach localhost but cannot read the token file, cannot have transactions signed.
+    """
+
+    daemon: XRPLDaemon
+    token: str
+    hosts: Tuple[str, ...]
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        if self.path.strip("/") == "health":
+            self._reply(200, self.daemon.health())
+        elif self.path.strip("/") == "metrics":
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        # Pages can only send text/plain or form posts without a CORS preflight
+        if self.headers.get("Content-Type", "").split(";")[0].strip().lower() != "application/json":
+            self._reply(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            params = orjson.loads(body) if body else {}
+            self._reply(200, self.daemon.dispatch(self.path.strip("/"), params))
+        except (LookupError, FileNotFoundError) as ex:
+            # Unknown operations and wallets
+            self._reply(404, {"error": str(ex)})
+        except (TypeError, ValueError) as ex:
+            self._reply(400, {"error": str(ex)})
+        except XRPLReliableSubmissionException as ex:
+            self._reply(422, {"error": str(ex)})
+        except Exception as ex:
+            self._reply(500, {"error": f"{type(ex).__name__}: {ex}"})
+
+    def _authorized(self) -> bool:
+        host = self.headers.get("Host", "")
+        # Strip the port, "[::1]:8080" or "localhost:8080"
+        host = host[1:host.index("]")] if host.startswith("[") and "]" in host else host.rsplit(":", 1)[0]
+        if host.lower() not in self.hosts:
+            self._reply(403, {"error": f"Host not allowed: {host}"})
+            return False
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), self.token.encode()):
+            self._reply(401, {"error": "Missing or wrong daemon token"})
+            return False
+        return True
+
+    def _reply(self, code: int, content: dict) -> None:
+        body = orjson.dumps(content)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # Unix socket peers have no address, the request handler expects a (host, port) pair
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def _write_token(token_path: str) -> str:
+    token = secrets.token_urlsafe(32)
+    fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as file:
+        # The mode of os.open only applies to new files
+        os.chmod(token_path, 0o600)
+        file.write(token)
+    return token
+
+
+def _is_loopback(host: str) -> bool:
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_server(daemon: XRPLDaemon,
+                  socket_path: str = f"{default_path}/daemon.sock",
+                  host: str = "127.0.0.1",
+                  port: Optional[int] = None,
+                  allow_remote: bool = False) -> socketserver.BaseServer:
+    """
+    Creates the HTTP server of a daemon, listening on a Unix socket or, when a port is given, on TCP. A new token
+    is written next to the socket, `<socket_path>.token` readable by the owner only, in both cases.
+    :param daemon: The daemon serving the requests
+    :param socket_path: The path of the Unix socket, an existing socket file is replaced
+    :param host: The interface to listen on for TCP
+    :param port: The TCP port, 0 picks a free port
+    :param allow_remote: Allow listening on an interface other than loopback
+    :return: The server, not yet serving
+    """
+    if port is not None and not allow_remote and not _is_loopback(host):
+        raise ValueError(f"Refusing to listen on the non-loopback host {host} without allow_remote")
+    hosts = _LOOPBACK_HOSTS if _is_loopback(host) else _LOOPBACK_HOSTS + (host.lower(),)
+    handler = type("DaemonRequestHandler", (_DaemonRequestHandler,),
+                   {"daemon": daemon, "token": _write_token(token_path_for(socket_path)), "hosts": hosts})
+    if port is not None:
+        return ThreadingHTTPServer((host, port), handler)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = _UnixHTTPServer(socket_path, handler)
+    os.chmod(socket_path, 0o600)
+    return server
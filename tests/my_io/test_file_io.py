@@ -0,0 +1,70 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+
+
+class TestMyFileIO(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_failed_write_keeps_the_previous_file(self):
+        target = f"{self.path}/networks"
+        MyFileIO.write_to_file(target, "previous")
+
+        with self.assertRaises(RuntimeError):
+            with MyFileIO.open_atomic(target) as file:
+                file.write(b"partial")
+                raise RuntimeError("crash")
+
+        self.assertEqual("previous", MyFileIO.read_from_file(target))
+        self.assertFalse(MyFileIO.write_to_file(target, "new", overwrite=False))
+        self.assertEqual("previous", MyFileIO.read_from_file(target))
+        self.assertEqual(["networks"], os.listdir(self.path))
+
+    def test_group_commit_syncs_the_directory_once(self):
+        MyFileIO.write_to_file(f"{self.path}/kept.json", "kept")
+
+        with mock.patch("os.sync", create=True) as sync, \
+                mock.patch("filedgr_xrpl_cli.my_io.file_io._fsync_dir") as fsync_dir:
+            with MyFileIO.group_commit(max_pending=100) as group:
+                for i in range(10):
+                    group.write(f"{self.path}/{i}.json", f"{i}")
+                group.write(f"{self.path}/kept.json", "replaced", overwrite=False)
+                self.assertFalse(os.path.exists(f"{self.path}/0.json"))
+
+        # Every file is synced on its own, never the whole host
+        sync.assert_not_called()
+        self.assertEqual(1, fsync_dir.call_count)
+        self.assertEqual([f"{i}.json" for i in range(10)] + ["kept.json"], sorted(os.listdir(self.path)))
+        self.assertEqual("9", MyFileIO.read_from_file(f"{self.path}/9.json"))
+        self.assertEqual("kept", MyFileIO.read_from_file(f"{self.path}/kept.json"))
+
+    def test_map_file(self):
+        MyFileIO.write_to_file(f"{self.path}/memos.json", b'[{"memo": "a"}]')
+        MyFileIO.write_to_file(f"{self.path}/empty", b"")
+
+        with MyFileIO.map_file(f"{self.path}/memos.json") as content:
+            self.assertEqual(b'[{"memo": "a"}]', bytes(content))
+        with MyFileIO.map_file(f"{self.path}/empty") as content:
+            self.assertEqual(0, len(content))
+
+    def test_keeps_the_mode_of_replaced_files(self):
+        umask = os.umask(0)
+        os.umask(umask)
+        existing = f"{self.path}/wallet"
+        with open(existing, "w") as file:
+            file.write("old")
+        os.chmod(existing, 0o600)
+
+        MyFileIO.write_to_file(f"{self.path}/new", "content")
+        MyFileIO.write_to_file(existing, "new")
+
+        self.assertEqual(0o666 & ~umask, os.stat(f"{self.path}/new").st_mode & 0o777)
+        self.assertEqual(0o600, os.stat(existing).st_mode & 0o777)
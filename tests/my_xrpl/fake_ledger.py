@@ -0,0 +1,119 @@
+import threading
+
+from xrpl.clients import JsonRpcClient
+from xrpl.core.binarycodec import decode
+from xrpl.models import Response
+from xrpl.models.response import ResponseStatus
+
+from filedgr_xrpl_cli.my_xrpl.network_state import NetworkStateCache
+
+
+class FakeLedgerClient(JsonRpcClient):
+    """
+    In-memory stand-in for a rippled node. Every `ledger` request closes a ledger which validates all queued
+    transactions whose sequence directly follows the account sequence, and those using one of its tickets.
+    Transactions with a sequence the account already used are rejected with tefPAST_SEQ. A rejection which is an
+    exception is raised by the submit request instead.
+    """
+
+    def __init__(self, sequence: int = 10, ledger_index: int = 100, reject=(), tickets=(), lines=()):
+        super().__init__("http://fake")
+        self.sequence = sequence
+        self.ledger_index = ledger_index
+        self.reject = dict(reject)
+        self.queued = {}
+        self.validated = {}
+        self.transactions = {}
+        self.tickets = set(tickets)
+        self.lines = list(lines)
+        self.requests = []
+        self.lock = threading.RLock()
+
+    async def _request_impl(self, request):
+        method = request.method.value
+        with self.lock:
+            self.requests.append(method)
+            handler = getattr(self, f"_{method}")
+            return Response(status=ResponseStatus.SUCCESS, result=handler(request))
+
+    def _account_objects(self, request):
+        return {"account_objects": [{"LedgerEntryType": "Ticket", "TicketSequence": ticket}
+                                    for ticket in sorted(self.tickets)]}
+
+    def _account_lines(self, request):
+        return {"account": request.account, "lines": self.lines}
+
+    def _account_info(self, request):
+        return {"account_data": {"Account": request.account, "Sequence": self.sequence}}
+
+    def _fee(self, request):
+        return {"drops": {"base_fee": "10", "open_ledger_fee": "10", "minimum_fee": "10",
+                          "median_fee": "5000"}, "current_queue_size": "0", "max_queue_size": "2000"}
+
+    def _ledger(self, request):
+        self.ledger_index += 1
+        while True:
+            ready = [h for h, tx in list(self.queued.items()) if tx["Sequence"] == self.sequence]
+            if not ready:
+                break
+            tx_hash = ready[0]
+            tx = self.queued.pop(tx_hash)
+            self.validated[tx_hash] = self.ledger_index
+            self.sequence += 1
+            if tx["TransactionType"] == "TicketCreate":
+                self.tickets.update(range(self.sequence, self.sequence + tx["TicketCount"]))
+                self.sequence += tx["TicketCount"]
+        for tx_hash, tx in list(self.queued.items()):
+            if tx["Sequence"] == 0 and tx.get("TicketSequence") in self.tickets:
+                self.tickets.remove(tx["TicketSequence"])
+                self.validated[tx_hash] = self.ledger_index
+                self.queued.pop(tx_hash)
+        return {"ledger_index": self.ledger_index}
+
+    def _submit(self, request):
+        tx = decode(request.tx_blob)
+        # Transactions are rejected by their sequence, or ticket when they use one
+        key = tx.get("TicketSequence") or tx["Sequence"]
+        if key in self.reject:
+            result = self.reject.pop(key)
+            if isinstance(result, Exception):
+                # The request failed on its way, the transaction never reached the ledger
+                raise result
+            return {"engine_result": result, "engine_result_message": "rejected"}
+        if 0 < tx["Sequence"] < self.sequence:
+            return {"engine_result": "tefPAST_SEQ", "engine_result_message": "This sequence number has already passed."}
+        from xrpl.models import Transaction
+        tx_hash = Transaction.from_xrpl(tx).get_hash()
+        self.queued[tx_hash] = tx
+        self.transactions[tx_hash] = tx
+        return {"engine_result": "tesSUCCESS", "engine_result_message": "ok"}
+
+    def _tx(self, request):
+        if request.transaction in self.validated:
+            tx = self.transactions[request.transaction]
+            meta = {"TransactionResult": "tesSUCCESS", "AffectedNodes": []}
+            if tx["TransactionType"] == "NFTokenCreateOffer":
+                meta["AffectedNodes"].append({"CreatedNode": {"LedgerEntryType": "NFTokenOffer",
+                                                              "LedgerIndex": request.transaction[::-1]}})
+            return {"validated": True, "ledger_index": self.validated[request.transaction],
+                    "Sequence": tx["Sequence"], "meta": meta}
+        return {"validated": False}
+
+
+class FakeConnection:
+
+    def __init__(self, client):
+        self.client = client
+        self.state = NetworkStateCache()
+
+    def get_network(self):
+        return "fake"
+
+    def get_client(self):
+        return self.client
+
+    def get_async_client(self):
+        return self.client
+
+    def get_state(self):
+        return self.state
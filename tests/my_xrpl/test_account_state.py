@@ -0,0 +1,83 @@
+import tempfile
+import time
+from unittest import TestCase
+
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.account_state import AccountState, AccountStateCache
+from filedgr_xrpl_cli.my_xrpl.network_state import NetworkStateCache
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeConnection, FakeLedgerClient
+
+
+def _meta(account: str, sequence: int, minted: int, transaction_index: int = 0, kind: str = "ModifiedNode") -> dict:
+    fields = {"Account": account, "Sequence": sequence, "Balance": "99999988", "MintedNFTokens": minted}
+    return {"TransactionIndex": transaction_index, "TransactionResult": "tesSUCCESS",
+            "AffectedNodes": [{kind: {"LedgerEntryType": "AccountRoot", "FinalFields": fields}},
+                              {"ModifiedNode": {"LedgerEntryType": "NFTokenPage", "FinalFields": {}}}]}
+
+
+class TestAccountStateCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = f"{self.directory.name}/accounts.db"
+        self.account = Wallet.create().classic_address
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_keeps_the_latest_state(self):
+        cache = AccountStateCache(self.path)
+        cache.put("testnet", AccountState.from_account_root({"Account": self.account, "Sequence": 5}, 100))
+
+        cache.observe_meta("testnet", _meta(self.account, 6, 1, transaction_index=3), 100)
+        cache.observe_meta("testnet", _meta(self.account, 4, 0), 99)
+
+        state = cache.get("testnet", self.account)
+        self.assertEqual((6, 1, "99999988", 100, 3),
+                         (state.sequence, state.next_token_sequence(), state.balance, state.ledger_index,
+                          state.transaction_index))
+        self.assertIsNone(cache.get("mainnet", self.account))
+        self.assertIsNone(AccountStateCache(self.path, max_age=-1).get("testnet", self.account))
+
+        cache.observe_meta("testnet", _meta(self.account, 7, 1, kind="DeletedNode"), 101)
+        self.assertIsNone(cache.get("testnet", self.account))
+        cache.close()
+
+    def test_later_processes_start_from_the_stored_sequence(self):
+        client = FakeLedgerClient(sequence=10)
+        state = NetworkStateCache(accounts=AccountStateCache(self.path), network="testnet")
+        self.assertEqual(10, state.next_sequence(self.account, client))
+        state.observe_transaction({"validated": True, "ledger_index": 101, "meta": _meta(self.account, 11, 0)})
+
+        next_process = NetworkStateCache(accounts=AccountStateCache(self.path), network="testnet")
+        self.assertEqual(11, next_process.next_sequence(self.account, client))
+        self.assertEqual(1, client.requests.count("account_info"))
+
+        # A submission which did not consume its sequence makes the next process read the ledger again
+        next_process.reset_sequence(self.account)
+        self.assertEqual(10, NetworkStateCache(accounts=AccountStateCache(self.path),
+                                               network="testnet").next_sequence(self.account, client))
+        self.assertEqual(2, client.requests.count("account_info"))
+
+    def test_stale_stored_sequence_is_resynced_on_past_sequence(self):
+        wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        account = wallet.get_wallet().classic_address
+        accounts = AccountStateCache(self.path)
+        # Left behind by an earlier process, the account moved on since
+        accounts.put("testnet", AccountState.from_account_root({"Account": account, "Sequence": 21}, 100))
+        client = FakeLedgerClient(sequence=26)
+        conn = FakeConnection(client)
+        conn.state = NetworkStateCache(accounts=accounts, network="testnet")
+
+        start = time.monotonic()
+        result = TransactionBuilder.issue_nft(conn=conn, issuer=wallet, uri="ipfs://1")
+
+        self.assertEqual(26, result.result["Sequence"])
+        self.assertEqual(1, client.requests.count("account_info"))
+        self.assertEqual(2, client.requests.count("submit"))
+        # Without waiting for the LastLedgerSequence of the stale transaction
+        self.assertLess(time.monotonic() - start, 5)
+        accounts.close()
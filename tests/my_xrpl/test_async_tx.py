@@ -0,0 +1,43 @@
+import asyncio
+from unittest import TestCase
+
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.async_tx import AsyncTransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestAsyncTransactionBuilder(TestCase):
+
+    def setUp(self):
+        self.wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+
+    def test_concurrent_mints_from_one_account(self):
+        client = FakeLedgerClient(sequence=7)
+        conn = FakeConnection(client)
+
+        async def mint_all():
+            return await asyncio.gather(*[
+                AsyncTransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri=f"ipfs://{i}")
+                for i in range(5)
+            ])
+
+        responses = asyncio.run(mint_all())
+
+        self.assertEqual(5, len(responses))
+        self.assertTrue(all(response.result["validated"] for response in responses))
+        self.assertEqual(1, client.requests.count("account_info"))
+        self.assertEqual(1, client.requests.count("fee"))
+        self.assertEqual(12, client.sequence)
+
+    def test_transport_errors_reset_the_sequence(self):
+        client = FakeLedgerClient(sequence=7, reject={7: ConnectionError("reset")})
+        conn = FakeConnection(client)
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(AsyncTransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://lost"))
+        response = asyncio.run(AsyncTransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://next"))
+
+        self.assertEqual(7, response.result["Sequence"])
+        self.assertEqual(2, client.requests.count("account_info"))
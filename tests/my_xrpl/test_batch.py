@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.dto.batch import BatchItemStatus
+from filedgr_xrpl_cli.my_xrpl.batch import BatchSubmitter
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestBatchSubmitter(TestCase):
+
+    def setUp(self):
+        seed = Wallet.create().seed
+        self.wallet = XRPLWallet(seed=seed, sequence=0)
+
+    def _mints(self, count):
+        return [TransactionBuilder.build_nft_mint(issuer=self.wallet, uri=f"ipfs://{i}") for i in range(count)]
+
+    def test_sequences_are_allocated_locally(self):
+        client = FakeLedgerClient(sequence=10)
+        submitter = BatchSubmitter(conn=FakeConnection(client), wallet=self.wallet, window=5, poll_interval=0)
+
+        results = list(submitter.run(self._mints(12)))
+
+        self.assertEqual(12, len(results))
+        self.assertTrue(all(result.status == BatchItemStatus.VALIDATED for result in results))
+        self.assertEqual(list(range(10, 22)), sorted(result.sequence for result in results))
+        self.assertEqual(1, client.requests.count("account_info"))
+
+    def test_offer_ids_are_reported(self):
+        client = FakeLedgerClient(sequence=10)
+        submitter = BatchSubmitter(conn=FakeConnection(client), wallet=self.wallet, window=3, poll_interval=0)
+        offers = [TransactionBuilder.build_nft_offer(source=self.wallet, destination=Wallet.create().classic_address,
+                                                     token_id=f"{i:064X}") for i in range(4)]
+
+        results = list(submitter.run(offers))
+
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(result.offer_id == result.hash[::-1] for result in results))
+
+    def test_rejected_transaction_is_retried_after_resync(self):
+        client = FakeLedgerClient(sequence=10, reject={12: "telINSUF_FEE_P"})
+        submitter = BatchSubmitter(conn=FakeConnection(client), wallet=self.wallet, window=5, poll_interval=0)
+
+        results = list(submitter.run(self._mints(6)))
+
+        self.assertEqual(6, len(results))
+        self.assertTrue(all(result.status == BatchItemStatus.VALIDATED for result in results))
+        self.assertEqual(list(range(6)), sorted(result.index for result in results))
+        self.assertEqual(2, client.requests.count("account_info"))
+
+    def test_malformed_transaction_does_not_consume_sequence(self):
+        client = FakeLedgerClient(sequence=10, reject={11: "temMALFORMED"})
+        submitter = BatchSubmitter(conn=FakeConnection(client), wallet=self.wallet, window=5, poll_interval=0)
+
+        results = list(submitter.run(self._mints(4)))
+
+        failed = [result for result in results if result.status == BatchItemStatus.FAILED]
+        self.assertEqual(1, len(failed))
+        self.assertEqual(1, failed[0].index)
+        self.assertEqual(3, len([result for result in results if result.status == BatchItemStatus.VALIDATED]))
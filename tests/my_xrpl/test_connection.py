@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock
+
+from typer.testing import CliRunner
+from xrpl.models import ServerInfo
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.__main__ import app
+from filedgr_xrpl_cli.dto.network import load_networks
+from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection, load_probe_results, save_probe_results
+
+
+class _Handler(BaseHTTPRequestHandler):
+    error = None
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.delay)
+        result = {"status": "success", "info": {"server_state": "full"}}
+        if self.server.ledger:
+            result["info"]["validated_ledger"] = {"seq": self.server.ledger}
+        if self.server.error:
+            result = {"status": "error", "error": self.server.error}
+        body = json.dumps({"result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestXRPLConnection(TestCase):
+
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def _serve(self, error=None, ledger=None, delay=0.0) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.error = error
+        server.ledger = ledger
+        server.delay = delay
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/"
+
+    def test_fails_over_to_next_endpoint(self):
+        busy = self._serve(error="tooBusy")
+        healthy = self._serve()
+        conn = XRPLConnection(json_rpc_urls=[busy, healthy])
+
+        response = conn.get_client().request(ServerInfo())
+
+        self.assertTrue(response.is_successful())
+        self.assertEqual([healthy, busy], conn.get_endpoints().ordered())
+
+    def test_close_closes_the_async_clients(self):
+        conn = XRPLConnection(json_rpc_urls=[self._serve()])
+        client = conn.get_async_client()
+
+        with mock.patch("httpx.AsyncClient.aclose", autospec=True) as aclose:
+            # The client of the first event loop is replaced and closed on the second one
+            for _ in range(2):
+                self.assertTrue(asyncio.run(client._request_impl(ServerInfo())).is_successful())
+            self.assertEqual(1, aclose.call_count)
+            conn.close()
+
+        self.assertEqual(2, aclose.call_count)
+
+    def test_health_check_takes_endpoint_out_of_rotation(self):
+        down = self._serve(error="noNetwork")
+        healthy = self._serve()
+        conn = XRPLConnection(json_rpc_urls=[down, healthy])
+
+        self.assertEqual({down: False, healthy: True}, conn.check_health())
+        self.assertEqual(healthy, conn.get_endpoints().ordered()[0])
+
+    def test_probe_prefers_the_fastest_fresh_endpoint(self):
+        slow = self._serve(ledger=1000, delay=0.05)
+        lagging = self._serve(ledger=990)
+        fast = self._serve(ledger=1001)
+        conn = XRPLConnection(json_rpc_urls=[slow, lagging, fast])
+
+        probes = {probe.url: probe for probe in conn.probe()}
+
+        self.assertEqual((True, False, True), (probes[slow].healthy, probes[lagging].healthy, probes[fast].healthy))
+        self.assertEqual(11, probes[lagging].ledger_lag)
+        self.assertEqual([fast, slow, lagging], conn.get_endpoints().ordered())
+
+        with tempfile.TemporaryDirectory() as path:
+            save_probe_results("testnet", list(probes.values()), path)
+            seeded = XRPLConnection(json_rpc_urls=[slow, lagging, fast])
+            seeded.seed_latencies(load_probe_results("testnet", path))
+            self.assertEqual([fast, slow, lagging], seeded.get_endpoints().ordered())
+            self.assertEqual({}, load_probe_results("testnet", path, max_age=-1))
+
+    def test_networks_file_overrides_builtin_networks(self):
+        with tempfile.TemporaryDirectory() as path:
+            with open(f"{path}/networks", "w") as file:
+                json.dump({"mainnet": {"json_rpc_url": "http://node:5005/", "ws_url": "ws://node:6006/",
+                                       "ws_fallback_urls": ["ws://backup:6006/"]}}, file)
+
+            networks = load_networks(path)
+
+            self.assertIs(networks, load_networks(path))
+            self.assertEqual(["ws://node:6006/", "ws://backup:6006/"], networks["mainnet"].ws_urls())
+            self.assertIn("testnet", networks)
+
+    def test_connections_use_the_networks_file_of_their_directory(self):
+        with tempfile.TemporaryDirectory() as path, mock.patch.dict(XRPLConnection._connections, clear=True):
+            with open(f"{path}/networks", "w") as file:
+                json.dump({"mainnet": {"json_rpc_url": "http://node:5005/", "ws_url": "ws://node:6006/"}}, file)
+
+            conn = XRPLConnection.for_network("mainnet", path)
+            try:
+                self.assertIs(conn, XRPLConnection.for_network("mainnet", path))
+                self.assertEqual(["http://node:5005/"], conn.get_endpoints().get_urls())
+                self.assertTrue(os.path.exists(f"{path}/accounts.db"))
+            finally:
+                conn.close()
+
+    def test_networks_of_the_networks_file_can_be_selected(self):
+        issuer = Wallet.create().classic_address
+        with tempfile.TemporaryDirectory() as path:
+            with open(f"{path}/networks", "w") as file:
+                json.dump({"private": {"json_rpc_url": "http://node:5005/", "ws_url": "ws://node:6006/"}}, file)
+
+            # --network is checked against the networks of --path, wherever it is given
+            selected = CliRunner().invoke(app, ["nft", "predict-ids", issuer, "--minted-tokens", "0",
+                                                "--network", "private", "--path", path])
+            unknown = CliRunner().invoke(app, ["nft", "predict-ids", issuer, "--minted-tokens", "0",
+                                               "--network", "private"])
+
+        self.assertEqual(0, selected.exit_code, selected.output)
+        self.assertEqual(2, unknown.exit_code)
+        self.assertIn("Unknown network private", unknown.output)
+
+    def test_requires_an_endpoint(self):
+        with self.assertRaises(ValueError):
+            XRPLConnection(json_rpc_urls=[])
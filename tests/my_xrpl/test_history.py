@@ -0,0 +1,115 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from orjson import orjson
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.dto.export_format import ExportFormat
+from filedgr_xrpl_cli.my_xrpl.history import AccountHistoryExporter, to_record
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+ACCOUNT = Wallet.create().classic_address
+
+
+def _payment(index: int) -> dict:
+    return {"validated": True, "meta": {"TransactionResult": "tesSUCCESS"},
+            "tx": {"hash": f"{index:064X}", "ledger_index": 10 + index, "TransactionType": "Payment",
+                   "Account": ACCOUNT, "Sequence": index + 1, "Fee": "12",
+                   "Amount": {"currency": "46494C4544475200000000000000000000000000", "issuer": ACCOUNT,
+                              "value": "1"},
+                   "Memos": [{"Memo": {"MemoData": f"memo {index}".encode().hex().upper(),
+                                       "MemoFormat": b"txt".hex().upper()}}]}}
+
+
+class HistoryLedgerClient(FakeLedgerClient):
+
+    def __init__(self, transactions, **kwargs):
+        super().__init__(**kwargs)
+        self.history = transactions
+        self.fail_at = None
+
+    def _account_tx(self, request):
+        start = int(request.marker or 0)
+        if start == self.fail_at:
+            raise ConnectionError("interrupted")
+        entries = [entry for entry in self.history
+                   if request.ledger_index_min <= entry["tx"]["ledger_index"] <= request.ledger_index_max]
+        result = {"transactions": entries[start:start + 2]}
+        if start + 2 < len(entries):
+            result["marker"] = str(start + 2)
+        return result
+
+
+class BufferingWriter:
+    """
+    Commits like the Parquet writer: nothing until `rows_per_part` rows are buffered or the export is complete.
+    """
+
+    def __init__(self, rows_per_part):
+        self.rows_per_part = rows_per_part
+        self.buffered = []
+        self.parts = []
+
+    def write(self, record):
+        self.buffered.append(record)
+
+    def commit(self, final):
+        if len(self.buffered) < self.rows_per_part and not (final and self.buffered):
+            return {"parts": len(self.parts)} if final else None
+        self.parts.append(self.buffered)
+        self.buffered = []
+        return {"parts": len(self.parts)}
+
+    def close(self):
+        self.buffered = []
+
+
+class TestAccountHistoryExporter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = f"{self.directory.name}/history.ndjson"
+        self.client = HistoryLedgerClient([_payment(i) for i in range(5)], ledger_index=50)
+        self.exporter = AccountHistoryExporter(FakeConnection(self.client), ACCOUNT, page_size=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _read(self):
+        with open(self.output, "rb") as file:
+            return [orjson.loads(line) for line in file]
+
+    def test_resumes_after_an_interruption_and_appends_new_ledgers(self):
+        self.client.fail_at = 4
+        with self.assertRaises(ConnectionError):
+            self.exporter.export(self.output)
+        self.assertEqual(4, len(self._read()))
+
+        self.client.fail_at = None
+        self.assertEqual(1, self.exporter.export(self.output))
+        self.assertEqual(0, self.exporter.export(self.output))
+
+        self.client.history.append(_payment(60))
+        self.client.ledger_index = 80
+        self.assertEqual(1, self.exporter.export(self.output))
+        self.assertEqual([1, 2, 3, 4, 5, 61], [record["sequence"] for record in self._read()])
+
+    def test_restarts_when_the_output_is_gone(self):
+        self.exporter.export(self.output)
+        os.remove(self.output)
+        self.assertEqual(5, self.exporter.export(self.output))
+
+    def test_record_decodes_memos_and_currencies(self):
+        record = to_record(_payment(3))
+        self.assertEqual(("FILEDGR", "1", ACCOUNT), (record["currency"], record["amount"], record["issuer"]))
+        self.assertEqual([{"type": None, "format": "txt", "data": "memo 3"}], record["memos"])
+        self.assertEqual("0.000012", to_record({"tx": {"Amount": "12"}})["amount"])
+
+    def test_buffering_writer_reads_every_page_once(self):
+        writer = BufferingWriter(rows_per_part=3)
+        with mock.patch("filedgr_xrpl_cli.my_xrpl.history._open_writer", return_value=writer):
+            written = self.exporter.export(f"{self.directory.name}/history", ExportFormat.PARQUET, rows_per_part=3)
+
+        self.assertEqual(5, written)
+        self.assertEqual([[1, 2, 3, 4], [5]], [[record["sequence"] for record in part] for part in writer.parts])
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from typer.testing import CliRunner
+from xrpl.models import SubmitOnly
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.__main__ import app
+from filedgr_xrpl_cli.my_xrpl.batch import BatchSubmitter
+from filedgr_xrpl_cli.my_xrpl.journal import JOURNAL_ENV, JournalStatus, get_journal, use_journal
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestSubmissionJournal(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = f"{self.directory.name}/journal.db"
+        use_journal(self.path)
+        self.wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+
+    def tearDown(self):
+        use_journal(None)
+        self.directory.cleanup()
+
+    def _statuses(self):
+        with sqlite3.connect(self.path) as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM submissions GROUP BY status").fetchall())
+
+    def test_every_submission_is_settled_in_the_journal(self):
+        client = FakeLedgerClient(sequence=10, reject={11: "temMALFORMED"})
+        conn = FakeConnection(client)
+        submitter = BatchSubmitter(conn=conn, wallet=self.wallet, window=3, poll_interval=0)
+
+        list(submitter.run(TransactionBuilder.build_nft_mint(issuer=self.wallet, uri=f"ipfs://{i}") for i in range(3)))
+        TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://single")
+
+        # The blob signed after the malformed one was never submitted
+        self.assertEqual({"validated": 3, "failed": 1, "discarded": 1}, self._statuses())
+        self.assertEqual([], get_journal().outstanding("fake"))
+
+    def test_past_sequence_is_settled_and_not_left_outstanding(self):
+        client = FakeLedgerClient(sequence=10)
+        conn = FakeConnection(client)
+        # A stale local sequence, the ledger is already past it
+        conn.get_state().set_sequence(self.wallet.get_wallet().classic_address, 5)
+
+        response = TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://stale")
+
+        self.assertEqual(10, response.result["Sequence"])
+        self.assertEqual({"validated": 1, "failed": 1}, self._statuses())
+        with sqlite3.connect(self.path) as db:
+            self.assertEqual([("tefPAST_SEQ",)], db.execute("SELECT engine_result FROM submissions "
+                                                            "WHERE status = 'failed'").fetchall())
+        self.assertEqual([], get_journal().outstanding("fake"))
+
+    def test_transport_errors_leave_the_entry_to_resume_and_reset_the_sequence(self):
+        client = FakeLedgerClient(sequence=10, reject={10: ConnectionError("reset")})
+        conn = FakeConnection(client)
+
+        with self.assertRaises(ConnectionError):
+            TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://lost")
+        response = TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://next")
+
+        # The sequence of the interrupted submission was read from the ledger again instead of leaving a gap
+        self.assertEqual(10, response.result["Sequence"])
+        self.assertEqual([JournalStatus.SUBMITTED], [entry.status for entry in get_journal().outstanding("fake")])
+
+    def test_resume_settles_what_a_crash_left_behind(self):
+        client = FakeLedgerClient(sequence=10)
+        conn = FakeConnection(client)
+        journal = get_journal()
+        signed = []
+        for uri in ("ipfs://validated", "ipfs://signed"):
+            transaction = TransactionBuilder.build_nft_mint(issuer=self.wallet, uri=uri)
+            prepared = TransactionBuilder._autofill_and_sign(conn=conn, transaction=transaction, wallet=self.wallet)
+            signed.append(journal.record_transaction("fake", prepared))
+        # The first was submitted before the process died, the second not
+        client.request(SubmitOnly(tx_blob=journal.get(signed[0]).blob))
+        # Signed long ago, its LastLedgerSequence passed
+        journal.record_signed("fake", self.wallet.get_wallet().classic_address, [("AB" * 32, "00", 5, 50)])
+
+        settled = {entry.hash: entry.status for entry in journal.resume(conn, "fake", poll_interval=0)}
+
+        self.assertEqual({signed[0]: JournalStatus.VALIDATED, signed[1]: JournalStatus.VALIDATED,
+                          "AB" * 32: JournalStatus.EXPIRED}, settled)
+        self.assertEqual([], journal.outstanding("fake"))
+        # Only the transaction which was not validated yet was submitted again
+        self.assertEqual(2, client.requests.count("submit"))
+
+    def test_settled_entries_are_pruned_after_the_retention(self):
+        account = self.wallet.get_wallet().classic_address
+        journal = get_journal()
+        journal.record_signed("fake", account, [("AA" * 32, "00", 1, 50), ("BB" * 32, "00", 2, 50),
+                                                ("CC" * 32, "00", 3, 50)])
+        journal.record_status("AA" * 32, JournalStatus.VALIDATED, "tesSUCCESS")
+        journal.record_status("BB" * 32, JournalStatus.EXPIRED)
+        with sqlite3.connect(self.path) as db:
+            db.execute("UPDATE submissions SET updated = updated - 3600")
+        journal.record_status("BB" * 32, JournalStatus.EXPIRED)
+
+        self.assertEqual(1, journal.prune(time.time() - 60))
+        self.assertIsNone(journal.get("AA" * 32))
+        self.assertIsNotNone(journal.get("BB" * 32))
+        # Outstanding entries are kept however old they are
+        self.assertEqual(["CC" * 32], [entry.hash for entry in journal.outstanding("fake")])
+
+    def test_the_default_journal_is_in_the_directory_of_the_command(self):
+        use_journal(None)
+        with mock.patch("filedgr_xrpl_cli.my_xrpl.connection.XRPLConnection.for_network"):
+            result = CliRunner().invoke(app, ["resume", "--network", "testnet", "--path", self.directory.name],
+                                        env={JOURNAL_ENV: None})
+
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertTrue(os.path.exists(self.path))
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from orjson import orjson
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.keystore import WalletKeystore, KeystoreWalletLoader
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+
+
+class TestWalletKeystore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        self.keystore = WalletKeystore(f"{self.path}/wallets.db")
+
+    def tearDown(self):
+        self.keystore.close()
+        self.directory.cleanup()
+
+    def test_lookup_by_name_and_address_without_derivation(self):
+        wallet = XRPLWallet(seed=Wallet.create().seed, sequence=3)
+        self.keystore.put("issuer", wallet)
+
+        with mock.patch("xrpl.wallet.main.derive_keypair", side_effect=AssertionError("derived")):
+            by_name = self.keystore.get("issuer").get_wallet()
+            by_address = self.keystore.get(wallet.get_wallet().classic_address).get_wallet()
+
+        self.assertEqual(wallet.get_wallet().__dict__, by_name.__dict__)
+        self.assertEqual(wallet.get_wallet().__dict__, by_address.__dict__)
+        self.assertIsNone(self.keystore.get("unknown"))
+
+    def test_import_directory(self):
+        os.mkdir(f"{self.path}/wallets")
+        expected = {}
+        for i in range(5):
+            wallet = Wallet.create()
+            expected[f"distributor-{i}"] = wallet.classic_address
+            with open(f"{self.path}/wallets/distributor-{i}", "wb") as file:
+                file.write(orjson.dumps(wallet.__dict__))
+
+        self.assertEqual(5, self.keystore.import_directory(f"{self.path}/wallets"))
+        self.assertEqual(sorted(expected.items()), list(self.keystore.iter_names()))
+        self.assertEqual(sorted(expected), [name for name, _ in self.keystore.iter_wallets()])
+
+    def test_loader_falls_back_to_wallet_file(self):
+        os.mkdir(f"{self.path}/wallets")
+        wallet = Wallet.create()
+        with open(f"{self.path}/wallets/legacy", "wb") as file:
+            file.write(orjson.dumps(wallet.__dict__))
+
+        loaded = KeystoreWalletLoader(self.path).load_wallet("legacy")
+
+        self.assertEqual(wallet.classic_address, loaded.get_wallet().classic_address)
+
+    def test_a_wallet_is_not_stored_under_two_names(self):
+        wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        replaced = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        self.keystore.put("issuer", replaced)
+        self.keystore.put("issuer", wallet)
+        self.keystore.put("issuer", wallet)
+
+        with self.assertRaisesRegex(ValueError, "stored as issuer already"):
+            self.keystore.put_many([("other", XRPLWallet(seed=Wallet.create().seed, sequence=0)),
+                                    ("copy", wallet)])
+
+        # Nothing of the failed batch was stored and the existing wallet was kept
+        self.assertEqual([("issuer", wallet.get_wallet().classic_address)], list(self.keystore.iter_names()))
+
+    def test_wallet_files_must_derive_from_their_seed(self):
+        os.mkdir(f"{self.path}/wallets")
+        wallet = Wallet.create()
+        with open(f"{self.path}/wallets/tampered", "wb") as file:
+            file.write(orjson.dumps({**wallet.__dict__, "classic_address": Wallet.create().classic_address}))
+
+        with self.assertRaisesRegex(ValueError, "classic_address"):
+            self.keystore.import_directory(f"{self.path}/wallets")
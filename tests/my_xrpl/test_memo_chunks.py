@@ -0,0 +1,60 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from xrpl.core.binarycodec import encode
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.dto.memo import MemoFormat
+from filedgr_xrpl_cli.my_xrpl.memo_chunks import MAX_MEMO_CHUNK_SIZE, MemoChunkHeader, iter_memo_chunks, \
+    reassemble_memo_chunks
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+
+
+class TestMemoChunks(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = f"{self.directory.name}/document.pdf"
+        self.payload = os.urandom(5000)
+        with open(self.source, "wb") as file:
+            file.write(self.payload)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def as_ledger_json(self, memos):
+        return [{"Memo": {"MemoData": memo.memo_data, "MemoType": memo.memo_type, "MemoFormat": memo.memo_format}}
+                for memo in memos]
+
+    def test_round_trip_in_any_order(self):
+        memos = list(iter_memo_chunks(self.source, MemoFormat.PDF, chunk_size=768))
+        output = f"{self.directory.name}/out.pdf"
+
+        header = reassemble_memo_chunks(reversed(self.as_ledger_json(memos)), output)
+
+        self.assertEqual(7, len(memos))
+        self.assertEqual(7, header.total)
+        with open(output, "rb") as file:
+            self.assertEqual(self.payload, file.read())
+
+    def test_missing_or_tampered_chunks_are_rejected(self):
+        memos = self.as_ledger_json(iter_memo_chunks(self.source, MemoFormat.PDF))
+        with self.assertRaises(ValueError):
+            reassemble_memo_chunks(memos[1:], f"{self.directory.name}/out")
+
+        memos[0]["Memo"]["MemoData"] = "00" + memos[0]["Memo"]["MemoData"][2:]
+        with self.assertRaises(ValueError):
+            reassemble_memo_chunks(memos, f"{self.directory.name}/out")
+
+    def test_largest_chunk_fits_the_memo_limit(self):
+        issuer = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        distributor = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        memo = next(iter_memo_chunks(self.source, MemoFormat.PDF, chunk_size=MAX_MEMO_CHUNK_SIZE))
+        payment = TransactionBuilder.build_transaction_token_with_memos(issuer=issuer, distributor=distributor,
+                                                                        code="DOC", memos=[memo])
+
+        memos_size = len(bytes.fromhex(encode({"Memos": payment.to_xrpl()["Memos"]})))
+        self.assertLessEqual(memos_size, 1024)
+        self.assertEqual(0, MemoChunkHeader.from_memo_type(memo.memo_type).index)
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from filedgr_xrpl_cli.my_xrpl.network_state import NetworkStateCache
+from tests.my_xrpl.fake_ledger import FakeLedgerClient
+
+ACCOUNT = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+OTHER_ACCOUNT = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+
+
+class _BlockingLedgerClient(FakeLedgerClient):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def _account_info(self, request):
+        self.entered.set()
+        self.release.wait(5)
+        return super()._account_info(request)
+
+
+class _YieldingLedgerClient(FakeLedgerClient):
+
+    async def _request_impl(self, request):
+        # Lets the other tasks run while a request is in flight, as a network client does
+        await asyncio.sleep(0)
+        return await super()._request_impl(request)
+
+
+class TestNetworkStateCache(TestCase):
+
+    def test_sequence_is_fetched_once_and_bumped_locally(self):
+        client = FakeLedgerClient(sequence=5)
+        state = NetworkStateCache()
+
+        self.assertEqual([5, 6, 7], [state.next_sequence(ACCOUNT, client) for _ in range(3)])
+        self.assertEqual(1, client.requests.count("account_info"))
+
+    def test_reading_one_account_does_not_block_the_others(self):
+        slow = _BlockingLedgerClient(sequence=5)
+        state = NetworkStateCache()
+        reader = threading.Thread(target=state.next_sequence, args=(ACCOUNT, slow))
+        reader.start()
+        slow.entered.wait(5)
+
+        sequences = []
+        other = threading.Thread(target=lambda: sequences.append(
+            state.next_sequence(OTHER_ACCOUNT, FakeLedgerClient(sequence=9))))
+        other.start()
+        other.join(2)
+        finished = not other.is_alive()
+        slow.release.set()
+        reader.join()
+        other.join()
+
+        self.assertTrue(finished)
+        self.assertEqual([9], sequences)
+        self.assertEqual(6, state.next_sequence(ACCOUNT, slow))
+
+    def test_async_allocations_across_event_loops(self):
+        client = _YieldingLedgerClient(sequence=5)
+        state = NetworkStateCache()
+
+        async def allocate():
+            return await asyncio.gather(*[state.next_sequence_async(ACCOUNT, client) for _ in range(3)])
+
+        # Concurrent allocations contend on the lock of the account, in one event loop after the other
+        self.assertEqual([5, 6, 7], sorted(asyncio.run(allocate())))
+        state.reset_sequence(ACCOUNT)
+        client.sequence = 8
+        self.assertEqual([8, 9, 10], sorted(asyncio.run(allocate())))
+
+    def test_set_and_reset_sequence(self):
+        client = FakeLedgerClient(sequence=5)
+        state = NetworkStateCache()
+        state.next_sequence(ACCOUNT, client)
+
+        state.set_sequence(ACCOUNT, 5)
+        self.assertEqual(5, state.next_sequence(ACCOUNT, client))
+
+        client.sequence = 9
+        state.reset_sequence(ACCOUNT)
+        self.assertEqual(9, state.next_sequence(ACCOUNT, client))
+
+    def test_fee_is_cached_until_a_ledger_closes(self):
+        client = FakeLedgerClient()
+        state = NetworkStateCache(ttl=60)
+
+        state.fee(client)
+        state.fee(client)
+        self.assertEqual(1, client.requests.count("fee"))
+        self.assertEqual(1, client.requests.count("ledger"))
+
+        state.observe_ledger(state.validated_ledger(client) + 1)
+        state.fee(client)
+        self.assertEqual(2, client.requests.count("fee"))
@@ -0,0 +1,95 @@
+import tempfile
+from unittest import TestCase
+
+from xrpl.core.addresscodec import decode_classic_address
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.nft_index import NftIndex
+from filedgr_xrpl_cli.nft_utils.token_id import nft_token_ids
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+ISSUER = Wallet.create().classic_address
+HOLDER = Wallet.create().classic_address
+
+
+def _page(kind: str, owner: str, final=None, previous=None) -> dict:
+    fields = {"LedgerEntryType": "NFTokenPage",
+              "LedgerIndex": decode_classic_address(owner).hex().upper() + "F" * 24}
+    tokens = [{"NFToken": {"NFTokenID": token_id, "URI": uri.encode().hex()}} for token_id, uri in final or []]
+    fields["NewFields" if kind == "CreatedNode" else "FinalFields"] = {"NFTokens": tokens}
+    if previous is not None:
+        fields["PreviousFields"] = {"NFTokens": [{"NFToken": {"NFTokenID": token_id, "URI": uri.encode().hex()}}
+                                                 for token_id, uri in previous]}
+    return {kind: fields}
+
+
+class NftLedgerClient(FakeLedgerClient):
+
+    def __init__(self, nfts, transactions=(), **kwargs):
+        super().__init__(**kwargs)
+        self.nfts = nfts
+        self.account_tx = list(transactions)
+
+    def _account_nfts(self, request):
+        start = int(request.marker or 0)
+        page = self.nfts[start:start + 2]
+        result = {"account_nfts": [{"NFTokenID": token_id, "URI": uri.encode().hex()} for token_id, uri in page]}
+        if start + 2 < len(self.nfts):
+            result["marker"] = str(start + 2)
+        return result
+
+    def _account_tx(self, request):
+        return {"ledger_index_max": self.ledger_index,
+                "transactions": [entry for entry in self.account_tx
+                                 if entry["tx"]["ledger_index"] >= request.ledger_index_min]}
+
+
+class TestNftIndex(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = NftIndex(f"{self.directory.name}/nfts.db")
+        self.token_ids = nft_token_ids(issuer=ISSUER, start_sequence=0, count=5, taxon=7)
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def test_crawls_all_pages_and_queries(self):
+        client = NftLedgerClient([(token_id, f"ipfs://drop/{i}") for i, token_id in enumerate(self.token_ids)])
+
+        self.assertEqual((5, 0), self.index.update(FakeConnection(client), HOLDER))
+
+        self.assertEqual(101, self.index.get_ledger_index(HOLDER))
+        self.assertEqual(5, len(list(self.index.query(issuer=ISSUER, taxon=7, owner=HOLDER))))
+        self.assertEqual([], list(self.index.query(taxon=1)))
+        self.assertEqual([self.token_ids[3]], [nft.token_id for nft in self.index.query(uri_prefix="ipfs://drop/3")])
+        nft = self.index.get(self.token_ids[2].lower())
+        self.assertEqual(("ipfs://drop/2", 2, 7), (nft.uri, nft.sequence, nft.taxon))
+
+    def test_updates_from_the_page_changes_since_the_last_ledger(self):
+        first, second, third = self.token_ids[:3]
+        client = NftLedgerClient([(first, "a"), (second, "b")])
+        conn = FakeConnection(client)
+        self.index.update(conn, HOLDER)
+
+        client.account_tx = [
+            # Old transaction, already part of the crawl
+            {"validated": True, "meta": {"TransactionResult": "tesSUCCESS", "AffectedNodes": [
+                _page("CreatedNode", HOLDER, final=[(first, "a")])]}, "tx": {"ledger_index": 90}},
+            # Received the third NFT, the page split moves the second to a new page
+            {"validated": True, "meta": {"TransactionResult": "tesSUCCESS", "AffectedNodes": [
+                _page("ModifiedNode", HOLDER, final=[(first, "a"), (third, "c")],
+                      previous=[(first, "a"), (second, "b")]),
+                _page("CreatedNode", HOLDER, final=[(second, "b")])]}, "tx": {"ledger_index": 102}},
+            # Sent the first NFT away, the receiver's page is not ours
+            {"validated": True, "meta": {"TransactionResult": "tesSUCCESS", "AffectedNodes": [
+                _page("ModifiedNode", HOLDER, final=[(third, "c")], previous=[(first, "a"), (third, "c")]),
+                _page("ModifiedNode", ISSUER, final=[(first, "a")], previous=[])]}, "tx": {"ledger_index": 103}},
+        ]
+        client.ledger_index = 104
+
+        self.assertEqual((1, 1), self.index.update(conn, HOLDER))
+        self.assertEqual(104, self.index.get_ledger_index(HOLDER))
+        self.assertEqual([second, third], [nft.token_id for nft in self.index.query(owner=HOLDER)])
+        self.assertEqual(102, self.index.get(third).ledger_index)
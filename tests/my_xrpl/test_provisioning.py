@@ -0,0 +1,122 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock
+
+from typer.testing import CliRunner
+
+from filedgr_xrpl_cli.__main__ import app
+from filedgr_xrpl_cli.my_xrpl.keystore import WalletKeystore
+from filedgr_xrpl_cli.my_xrpl.provisioning import ProvisioningResult, WalletProvisioner, _RateLimiter
+from tests.my_xrpl.fake_ledger import FakeConnection, FakeLedgerClient
+
+
+class _FaucetHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        destination = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["destination"]
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), destination))
+            attempts = sum(1 for _, address in self.server.requests if address == destination)
+        # Busy on the first request of every address, the address in `broken` never gets funded
+        status = 503 if attempts == 1 or destination == self.server.broken else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestWalletProvisioner(TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FaucetHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.broken = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.provisioner = WalletProvisioner(conn=FakeConnection(FakeLedgerClient(sequence=7)),
+                                             faucet_url=f"http://127.0.0.1:{self.server.server_port}/accounts",
+                                             rate=20.0,
+                                             retries=2,
+                                             backoff=0.01,
+                                             processes=1)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_funds_concurrently_with_retries_and_rate_limit(self):
+        wallets = self.provisioner.generate(6)
+        self.server.broken = wallets[2].get_wallet().classic_address
+
+        started = time.monotonic()
+        result = asyncio.run(self.provisioner.fund(wallets))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(wallets, result.wallets)
+        self.assertEqual([wallet for i, wallet in enumerate(wallets) if i != 2], result.funded())
+        self.assertEqual([self.server.broken], list(result.failed))
+        self.assertEqual({7}, {wallet.get_wallet().sequence for wallet in result.funded()})
+        self.assertTrue(wallets[2].get_wallet().seed)
+        # Two requests per funded wallet and all retries of the broken one
+        self.assertEqual(5 * 2 + 3, len(self.server.requests))
+        # 13 requests at 20 per second, the spacing itself is checked on the rate limiter
+        self.assertGreater(elapsed, 12 * 0.05 * 0.9)
+
+    def test_rate_limiter_spaces_out_requests_and_pauses(self):
+        clock = _FakeClock()
+        limiter = _RateLimiter(rate=20.0, clock=clock, sleep=clock.sleep)
+
+        async def requests():
+            for _ in range(3):
+                await limiter.wait()
+            await limiter.pause(1.0)
+            await limiter.wait()
+
+        asyncio.run(requests())
+
+        self.assertEqual(3, len(clock.sleeps))
+        for expected, slept in zip([0.05, 0.05, 1.0], clock.sleeps):
+            self.assertAlmostEqual(expected, slept)
+
+    def test_generates_distinct_wallets_with_keys(self):
+        wallets = self.provisioner.generate(4)
+
+        self.assertEqual(4, len({wallet.get_wallet().classic_address for wallet in wallets}))
+        self.assertTrue(all(wallet.get_wallet().private_key for wallet in wallets))
+
+    def test_unfunded_wallets_keep_their_names(self):
+        wallets = self.provisioner.generate(3)
+        failed = wallets[1].get_wallet().classic_address
+        result = ProvisioningResult(wallets=wallets, failed={failed: "timed out"})
+
+        with tempfile.TemporaryDirectory() as path, \
+                mock.patch.object(WalletProvisioner, "provision", return_value=result), \
+                mock.patch("filedgr_xrpl_cli.my_xrpl.connection.XRPLConnection.for_network"):
+            output = CliRunner().invoke(app, ["wallet", "create-batch", "d", "--count", "3", "--path", path]).output
+            keystore = WalletKeystore(f"{path}/wallets.db")
+            names = dict(keystore.iter_names())
+            keystore.close()
+
+        self.assertEqual({f"d-{i}": wallet.get_wallet().classic_address for i, wallet in enumerate(wallets)}, names)
+        self.assertIn(f"Stored d-1 ({failed}) unfunded: timed out", output)
@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+import xrpl
+from xrpl.core.binarycodec import encode
+from xrpl.models import Transaction
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.signing import ParallelSigner, hash_blob
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+
+
+class TestParallelSigner(TestCase):
+
+    def setUp(self):
+        self.wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        self.transactions = []
+        for i in range(20):
+            transaction_json = TransactionBuilder.build_nft_mint(issuer=self.wallet, uri=f"ipfs://{i}").to_xrpl()
+            transaction_json.update({"Sequence": 100 + i, "Fee": "12", "LastLedgerSequence": 5000})
+            self.transactions.append(transaction_json)
+
+    def _expected(self):
+        return [
+            encode(xrpl.transaction.safe_sign_transaction(Transaction.from_xrpl(dict(transaction)),
+                                                          self.wallet.get_wallet()).to_xrpl())
+            for transaction in self.transactions
+        ]
+
+    def test_blobs_match_xrpl_signing_in_input_order(self):
+        with ParallelSigner([self.wallet], processes=2, chunksize=3) as signer:
+            blobs = signer.sign([dict(transaction) for transaction in self.transactions])
+        self.assertEqual(self._expected(), blobs)
+
+    def test_single_process(self):
+        signer = ParallelSigner([self.wallet], processes=1)
+        self.assertEqual(self._expected(), signer.sign([dict(transaction) for transaction in self.transactions]))
+
+    def test_hash_blob(self):
+        blob = ParallelSigner([self.wallet], processes=1).sign([dict(self.transactions[0])])[0]
+        self.assertEqual(Transaction.from_blob(blob).get_hash(), hash_blob(blob))
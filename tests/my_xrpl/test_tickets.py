@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from xrpl.transaction import XRPLReliableSubmissionException
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.tickets import TicketPool
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestTicketPool(TestCase):
+
+    def setUp(self):
+        self.wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+
+    def test_uses_existing_tickets_then_refills(self):
+        client = FakeLedgerClient(sequence=20, tickets={5, 6})
+        pool = TicketPool(FakeConnection(client), self.wallet, low_water=1, batch_size=3)
+
+        tickets = [pool.acquire() for _ in range(4)]
+
+        self.assertEqual([5, 6, 21, 22], tickets)
+        self.assertEqual(1, pool.available())
+        self.assertEqual(1, client.requests.count("account_objects"))
+
+    def test_parallel_submissions_do_not_block_on_a_failure(self):
+        client = FakeLedgerClient(sequence=20, tickets=range(1, 7), reject={3: "temMALFORMED"})
+        conn = FakeConnection(client)
+        pool = TicketPool(conn, self.wallet, low_water=0)
+
+        def mint(i):
+            try:
+                return TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri=f"ipfs://{i}", tickets=pool)
+            except XRPLReliableSubmissionException as ex:
+                return ex
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(mint, range(5)))
+
+        failed = [result for result in results if isinstance(result, Exception)]
+        self.assertEqual(1, len(failed))
+        self.assertTrue(all(result.result["validated"] for result in results if result not in failed))
+        # The rejected ticket went back to the pool and may have been used by another mint since, the account
+        # sequence was never touched
+        self.assertEqual(2, len(client.tickets))
+        self.assertEqual(sorted(client.tickets), sorted(pool.acquire() for _ in range(2)))
+        self.assertEqual(20, client.sequence)
+        self.assertEqual(0, client.requests.count("account_info"))
+
+    def test_sequence_continues_after_the_tickets(self):
+        client = FakeLedgerClient(sequence=20)
+        conn = FakeConnection(client)
+
+        tickets = TransactionBuilder.create_tickets(conn=conn, wallet=self.wallet, count=5)
+        result = TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://1")
+
+        self.assertEqual([21, 22, 23, 24, 25], tickets)
+        self.assertTrue(result.result["validated"])
+        self.assertEqual(26, result.result["Sequence"])
+        self.assertEqual(27, client.sequence)
+
+    def test_tickets_come_back_after_transport_errors_and_are_dropped_when_unknown(self):
+        client = FakeLedgerClient(sequence=20, tickets={5, 6, 7}, reject={5: ConnectionError("reset"),
+                                                                          6: "tefNO_TICKET"})
+        conn = FakeConnection(client)
+        pool = TicketPool(conn, self.wallet, low_water=0)
+
+        with self.assertRaises(ConnectionError):
+            TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://1", tickets=pool)
+        self.assertEqual(3, pool.available())
+        # The ticket came back and is used again
+        self.assertTrue(TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://2",
+                                                     tickets=pool).result["validated"])
+        with self.assertRaises(XRPLReliableSubmissionException):
+            TransactionBuilder.issue_nft(conn=conn, issuer=self.wallet, uri="ipfs://3", tickets=pool)
+
+        # The ticket the ledger did not know is not handed out again
+        self.assertEqual(1, pool.available())
+        self.assertEqual(7, pool.acquire())
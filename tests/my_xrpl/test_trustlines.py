@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.my_xrpl.currency import decode_currency, encode_currency
+from filedgr_xrpl_cli.my_xrpl.trustlines import TrustlineBatch
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestTrustlineBatch(TestCase):
+
+    def test_skips_existing_trustlines_and_sets_the_others_concurrently(self):
+        issuer = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        distributor = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        client = FakeLedgerClient(sequence=7, lines=[
+            {"currency": encode_currency("EXISTING"), "limit": "0.000001"},
+            {"currency": encode_currency("ZERO"), "limit": "0"},
+        ])
+
+        batch = TrustlineBatch(conn=FakeConnection(client), issuer=issuer)
+        outcomes = batch.run([distributor], ["EXISTING", "ZERO", "NEW"])
+
+        self.assertEqual([("EXISTING", "exists"), ("ZERO", "created"), ("NEW", "created")],
+                         [(outcome.code, outcome.status) for outcome in outcomes])
+        self.assertEqual(1, client.requests.count("account_lines"))
+        self.assertEqual(["ZERO", "NEW"], [decode_currency(tx["LimitAmount"]["currency"])
+                                           for tx in sorted(client.transactions.values(),
+                                                            key=lambda tx: tx["Sequence"])])
+        self.assertEqual(9, client.sequence)
+
+    def test_currency_codes(self):
+        self.assertEqual("46494C4544475200000000000000000000000000", encode_currency("FILEDGR"))
+        self.assertEqual("FILEDGR", decode_currency(encode_currency("FILEDGR")))
+        self.assertEqual("USD", decode_currency("USD"))
@@ -0,0 +1,90 @@
+import threading
+import time
+from unittest import TestCase, mock
+
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.dto.batch import BatchItemStatus
+from filedgr_xrpl_cli.my_xrpl.batch import BatchSubmitter
+from filedgr_xrpl_cli.my_xrpl.network_state import NetworkStateCache
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.validation import ValidationTracker
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+def transaction_message(tx_hash, ledger_index):
+    return {"type": "transaction", "validated": True, "ledger_index": ledger_index,
+            "transaction": {"hash": tx_hash}, "meta": {"TransactionResult": "tesSUCCESS"}}
+
+
+class StreamingFakeLedger(FakeLedgerClient):
+    """
+    Streams the transactions validated by every closed ledger and the ledger itself to a tracker.
+    """
+
+    def __init__(self, tracker, **kwargs):
+        super().__init__(**kwargs)
+        self.tracker = tracker
+
+    def _ledger(self, request):
+        with self.lock:
+            validated = set(self.validated)
+            result = super()._ledger(request)
+            for tx_hash in set(self.validated) - validated:
+                self.tracker.handle(transaction_message(tx_hash, self.ledger_index))
+            self.tracker.handle({"type": "ledgerClosed", "ledger_index": self.ledger_index})
+            return result
+
+
+class TestValidationTracker(TestCase):
+
+    def test_resolves_validated_and_expired_transactions(self):
+        state = NetworkStateCache()
+        tracker = ValidationTracker("wss://fake", state=state)
+        validated = tracker.track("A" * 64, "rAccount", last_ledger_sequence=105)
+        expired = tracker.track("B" * 64, "rAccount", last_ledger_sequence=105)
+
+        tracker.handle(transaction_message("A" * 64, 104))
+        tracker.handle({"type": "ledgerClosed", "ledger_index": 105})
+        self.assertTrue(validated.result(timeout=0).validated)
+        self.assertFalse(expired.done())
+
+        tracker.handle({"type": "ledgerClosed", "ledger_index": 106})
+        self.assertFalse(expired.result(timeout=0).validated)
+        self.assertEqual(106, state.validated_ledger(client=None))
+
+    def test_transaction_validated_before_tracking(self):
+        tracker = ValidationTracker("wss://fake")
+        tracker.handle(transaction_message("A" * 64, 104))
+
+        self.assertEqual(104, tracker.track("A" * 64, "rAccount", last_ledger_sequence=120).result(timeout=0)
+                         .ledger_index)
+
+    def test_batch_submitter_does_not_poll_with_a_connected_tracker(self):
+        wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        tracker = ValidationTracker("wss://fake")
+        client = StreamingFakeLedger(tracker, sequence=10)
+        conn = FakeConnection(client)
+        stop = threading.Event()
+
+        def close_ledgers():
+            while not stop.wait(0.02):
+                client._ledger(None)
+
+        closer = threading.Thread(target=close_ledgers, daemon=True)
+        with mock.patch.object(tracker, "is_connected", return_value=True):
+            closer.start()
+            try:
+                submitter = BatchSubmitter(conn=conn, wallet=wallet, window=5, poll_interval=0.2, tracker=tracker)
+                transactions = [TransactionBuilder.build_nft_mint(issuer=wallet, uri=f"ipfs://{i}") for i in range(8)]
+                start = time.monotonic()
+                results = list(submitter.run(transactions))
+            finally:
+                stop.set()
+                closer.join()
+
+        self.assertEqual(8, len(results))
+        self.assertTrue(all(result.status == BatchItemStatus.VALIDATED for result in results))
+        self.assertEqual(0, client.requests.count("tx"))
+        self.assertLess(time.monotonic() - start, 2)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from orjson import orjson
+
+from filedgr_xrpl_cli.dto.filedgr_nft_type import FiledgrArtV0NftType, FiledgrArtV0NftTypeAttributeTraitEnum, \
+    FiledgrArtV0NftTypeCollection, FiledgrArtV0NftTypeTemplate
+from filedgr_xrpl_cli.nft_utils.metadata import MetadataGenerator
+
+TEMPLATE = {
+    "collection": {"name": "Filedgr Drop", "family": "Version 1"},
+    "attributes": [
+        {"trait_type": "smartNftUri", "value": "https://example.com/smart", "description": "The smart NFT"},
+        {"trait_type": "transactionReceiver", "column": "receiver", "description": "The receiver"},
+    ]
+}
+
+
+class TestMetadataGenerator(TestCase):
+
+    def setUp(self):
+        self.generator = MetadataGenerator(FiledgrArtV0NftTypeTemplate.parse_obj(TEMPLATE))
+        self.record = {"id": "a1", "name": "NFT 1", "description": "The first", "image": "ipfs://img",
+                       "receiver": "rReceiver"}
+
+    def test_matches_the_pydantic_model(self):
+        nft_type = FiledgrArtV0NftType(
+            name="NFT 1",
+            description="The first",
+            image="ipfs://img",
+            collection=FiledgrArtV0NftTypeCollection(name="Filedgr Drop", family="Version 1")
+        )
+        nft_type.add_attribute(trait_type=FiledgrArtV0NftTypeAttributeTraitEnum.SMART_NFT_URI,
+                               value="https://example.com/smart", description="The smart NFT")
+        nft_type.add_attribute(trait_type=FiledgrArtV0NftTypeAttributeTraitEnum.TX_RECEIVER,
+                               value="rReceiver", description="The receiver")
+
+        self.assertEqual(orjson.loads(nft_type.json(by_alias=True)), orjson.loads(self.generator.dumps(self.record)))
+
+    def test_missing_values_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.generator.build({"name": "NFT 1", "description": "The first", "receiver": "rReceiver"})
+        with self.assertRaises(ValueError):
+            self.generator.build({"name": "NFT 1", "description": "The first", "image": "ipfs://img"})
+
+    def test_writes_ndjson_and_files(self):
+        records = [dict(self.record, id=f"a{i}", name=f"NFT {i}") for i in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            ndjson_count = self.generator.write_ndjson(iter(records), f"{directory}/meta.ndjson")
+            files_count = self.generator.write_files(iter(records), f"{directory}/meta")
+
+            with open(f"{directory}/meta.ndjson", "rb") as file:
+                lines = [orjson.loads(line) for line in file]
+            self.assertEqual(3, ndjson_count)
+            self.assertEqual(["NFT 0", "NFT 1", "NFT 2"], [line["name"] for line in lines])
+            self.assertEqual(3, files_count)
+            self.assertEqual(["a0.json", "a1.json", "a2.json"], sorted(os.listdir(f"{directory}/meta")))
+
+    def test_file_names_cannot_leave_the_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("../escaped", "..", "sub/name"):
+                with self.assertRaises(ValueError):
+                    self.generator.write_files(iter([dict(self.record, id=name)]), f"{directory}/meta")
+
+            self.assertEqual(["meta"], os.listdir(directory))
+            self.assertEqual([], os.listdir(f"{directory}/meta"))
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from orjson import orjson
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.dto.filedgr_nft_type import FiledgrArtV0NftTypeTemplate
+from filedgr_xrpl_cli.dto.memo import MemoFormat, MyMemo
+from filedgr_xrpl_cli.dto.metadata_format import MetadataFormat
+from filedgr_xrpl_cli.my_io.file_io import MyFileIO
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from filedgr_xrpl_cli.nft_utils.metadata import MetadataGenerator
+from filedgr_xrpl_cli.nft_utils.metadata_codec import decode_metadata, encode_metadata, iter_delimited
+
+TEMPLATE = {
+    "collection": {"name": "Filedgr Drop", "family": "Version 1"},
+    "attributes": [
+        {"trait_type": "smartNftUri", "value": "https://example.com/smart", "description": "The smart NFT"},
+        {"trait_type": "transactionReceiver", "column": "receiver"},
+    ]
+}
+
+
+class TestMetadataCodec(TestCase):
+
+    def setUp(self):
+        self.generator = MetadataGenerator(FiledgrArtV0NftTypeTemplate.parse_obj(TEMPLATE))
+        self.metadata = self.generator.build({"name": "NFT 1", "description": "The first", "image": "ipfs://img",
+                                              "file": "ipfs://file", "receiver": "rReceiver"})
+
+    def test_round_trip_is_smaller_than_json(self):
+        encoded = encode_metadata(self.metadata)
+
+        self.assertEqual(self.metadata, decode_metadata(encoded))
+        self.assertLess(len(encoded), len(orjson.dumps(self.metadata)) / 2)
+
+    def test_round_trip_of_optional_and_custom_fields(self):
+        metadata = {"schema": "ipfs://custom", "nftType": "art.v1", "name": "NFT", "description": "", "image": "i",
+                    "file": None, "collection": {"name": "Drop", "family": None}, "attributes": None}
+
+        self.assertEqual(metadata, decode_metadata(encode_metadata(metadata)))
+
+    def test_writes_files_and_delimited_stream(self):
+        records = [{"id": f"a{i}", "name": f"NFT {i}", "description": "The first", "image": "ipfs://img",
+                    "receiver": "rReceiver"} for i in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(3, self.generator.write_delimited(iter(records), f"{directory}/meta.pb"))
+            self.assertEqual(3, self.generator.write_files(iter(records), f"{directory}/files",
+                                                           metadata_format=MetadataFormat.PROTOBUF))
+
+            with MyFileIO.map_file(f"{directory}/meta.pb") as content:
+                names = [decode_metadata(message)["name"] for message in iter_delimited(content)]
+            with open(os.path.join(directory, "files", "a2.pb"), "rb") as file:
+                single = decode_metadata(file.read())
+
+        self.assertEqual(["NFT 0", "NFT 1", "NFT 2"], names)
+        self.assertEqual(self.generator.build(records[2]), single)
+
+    def test_protobuf_memos_carry_the_encoded_metadata(self):
+        issuer, distributor = (XRPLWallet(seed=Wallet.create().seed, sequence=0) for _ in range(2))
+        memo = MyMemo(memo=orjson.dumps(self.metadata).decode("utf-8"), memo_format=MemoFormat.PROTOBUF)
+
+        payment = TransactionBuilder.build_transaction_token(issuer=issuer, distributor=distributor, code="NFT",
+                                                             memos=[memo])
+
+        self.assertEqual(self.metadata, decode_metadata(bytes.fromhex(payment.memos[0].memo_data)))
+        self.assertEqual("protobuf", bytes.fromhex(payment.memos[0].memo_format).decode("utf-8"))
@@ -0,0 +1,55 @@
+from unittest import TestCase, mock
+
+from typer.testing import CliRunner
+from xrpl.core.addresscodec import encode_classic_address
+
+from filedgr_xrpl_cli.__main__ import app
+from filedgr_xrpl_cli.nft_utils import token_id
+from filedgr_xrpl_cli.nft_utils.token_id import nft_token_ids, iter_nft_token_ids, parse_nft_token_id
+
+# The example NFTokenID of the XLS-20 specification
+SPEC_TOKEN_ID = "000B0539C35B55AA096BA6D87A6E6C965A6534150DC56E5E12C5D09E0000000C"
+SPEC_ISSUER = encode_classic_address(bytes.fromhex("C35B55AA096BA6D87A6E6C965A6534150DC56E5E"))
+
+
+class TestNftTokenIds(TestCase):
+
+    def test_specification_example(self):
+        result = nft_token_ids(SPEC_ISSUER, start_sequence=12, taxon=1337, transfer_fee=1337)
+        self.assertEqual([SPEC_TOKEN_ID], result)
+
+    def test_parse_specification_example(self):
+        self.assertEqual((0x000B, 1337, SPEC_ISSUER, 1337, 12), tuple(parse_nft_token_id(SPEC_TOKEN_ID)))
+
+    def test_range_matches_single_predictions(self):
+        result = nft_token_ids(SPEC_ISSUER, start_sequence=100, count=50, taxon=7)
+        expected = [nft_token_ids(SPEC_ISSUER, start_sequence=100 + i, taxon=7)[0] for i in range(50)]
+        self.assertEqual(expected, result)
+
+    def test_pure_python_fallback(self):
+        vectorized = nft_token_ids(SPEC_ISSUER, start_sequence=4294967290, count=10)
+        numpy = token_id._get_numpy()
+        token_id._numpy = False
+        try:
+            self.assertEqual(vectorized, nft_token_ids(SPEC_ISSUER, start_sequence=4294967290, count=10))
+        finally:
+            token_id._numpy = numpy
+
+    def test_chunks(self):
+        chunks = list(iter_nft_token_ids(SPEC_ISSUER, start_sequence=0, count=10, chunk_size=4))
+        self.assertEqual([4, 4, 2], [len(chunk) for chunk in chunks])
+        self.assertEqual(nft_token_ids(SPEC_ISSUER, start_sequence=0, count=10), sum(chunks, []))
+
+    def test_predict_ids_reads_the_ledger_unless_cached(self):
+        with mock.patch("filedgr_xrpl_cli.my_xrpl.connection.XRPLConnection.for_network") as for_network:
+            next_token_sequence = for_network.return_value.get_state.return_value.next_token_sequence
+            next_token_sequence.return_value = 12
+            refreshed = CliRunner().invoke(app, ["nft", "predict-ids", SPEC_ISSUER, "--taxon", "1337",
+                                                 "--fees", "1337", "--flags", "11"])
+            refreshed_call = next_token_sequence.call_args
+            cached = CliRunner().invoke(app, ["nft", "predict-ids", SPEC_ISSUER, "--cached"])
+
+        self.assertEqual(SPEC_TOKEN_ID, refreshed.output.strip())
+        self.assertTrue(refreshed_call.kwargs["refresh"])
+        self.assertEqual(0, cached.exit_code, cached.output)
+        self.assertFalse(next_token_sequence.call_args.kwargs["refresh"])
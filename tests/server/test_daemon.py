@@ -0,0 +1,114 @@
+import http.client
+import os
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from typer.testing import CliRunner
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.__main__ import app
+from filedgr_xrpl_cli.my_xrpl.connection import XRPLConnection
+from filedgr_xrpl_cli.my_xrpl.keystore import KeystoreWalletLoader
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from filedgr_xrpl_cli.server.client import DaemonClient, DaemonError, use_daemon
+from filedgr_xrpl_cli.server.daemon import XRPLDaemon, create_server
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestXRPLDaemon(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        KeystoreWalletLoader(self.path).store_wallet("issuer", XRPLWallet(seed=Wallet.create().seed, sequence=0))
+
+        self.ledger = FakeLedgerClient(sequence=7)
+        connections = mock.patch.dict(XRPLConnection._connections,
+                                      {(self.path, "testnet"): FakeConnection(self.ledger)})
+        connections.start()
+        self.addCleanup(connections.stop)
+
+        self.socket_path = f"{self.path}/daemon.sock"
+        self.server = create_server(XRPLDaemon(self.path), socket_path=self.socket_path)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = DaemonClient(self.socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        use_daemon(None)
+        self.directory.cleanup()
+
+    def test_operations_share_wallets_and_network_state(self):
+        first = self.client.call("nft/mint", issuer="issuer", uri="ipfs://1")
+        second = self.client.call("nft/mint", issuer="issuer", uri="ipfs://2")
+
+        self.assertTrue(first["result"]["validated"])
+        self.assertTrue(second["result"]["validated"])
+        self.assertEqual(1, self.ledger.requests.count("account_info"))
+        self.assertEqual(1, self.client.health()["wallets"])
+
+    def test_errors_are_reported_with_status(self):
+        with self.assertRaises(DaemonError) as unknown_operation:
+            self.client.call("nft/unknown")
+        with self.assertRaises(DaemonError) as unknown_wallet:
+            self.client.call("nft/mint", issuer="nobody", uri="ipfs://1")
+        with self.assertRaises(DaemonError) as bad_arguments:
+            self.client.call("nft/mint", issuer="issuer")
+
+        self.assertEqual(404, unknown_operation.exception.status)
+        self.assertEqual(404, unknown_wallet.exception.status)
+        self.assertEqual(400, bad_arguments.exception.status)
+
+    def test_cli_forwards_to_daemon(self):
+        result = CliRunner().invoke(app, ["--daemon", self.socket_path, "nft", "burn", "issuer", "00" * 32,
+                                          "--path", self.path])
+
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn("tesSUCCESS", result.output)
+        self.assertIn("submit", self.ledger.requests)
+
+    def test_requests_for_another_directory_are_refused(self):
+        with tempfile.TemporaryDirectory() as other:
+            with self.assertRaises(DaemonError) as other_path:
+                self.client.call("nft/mint", path=other, issuer="issuer", uri="ipfs://1")
+            result = CliRunner().invoke(app, ["--daemon", self.socket_path, "nft", "burn", "issuer", "00" * 32,
+                                              "--path", other])
+        minted = self.client.call("nft/mint", path=f"{self.path}/.", issuer="issuer", uri="ipfs://1")
+
+        self.assertEqual(400, other_path.exception.status)
+        self.assertIn(other, str(other_path.exception))
+        self.assertNotEqual(0, result.exit_code)
+        self.assertTrue(minted["result"]["validated"])
+        self.assertEqual(1, self.ledger.requests.count("submit"))
+
+    def test_requests_need_the_token_json_and_a_loopback_host(self):
+        server = create_server(XRPLDaemon(self.path), socket_path=f"{self.path}/tcp.sock", port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        with open(f"{self.path}/tcp.sock.token") as file:
+            token = file.read()
+
+        def post(headers: dict) -> int:
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            try:
+                connection.request("POST", "/nft/burn", body=b'{"issuer": "issuer", "token_id": "00"}',
+                                   headers=headers)
+                return connection.getresponse().status
+            finally:
+                connection.close()
+
+        authorization = {"Authorization": f"Bearer {token}"}
+        self.assertEqual(401, post({"Content-Type": "application/json"}))
+        self.assertEqual(415, post({**authorization, "Content-Type": "text/plain"}))
+        self.assertEqual(403, post({**authorization, "Content-Type": "application/json", "Host": "evil.example"}))
+        self.assertNotIn("submit", self.ledger.requests)
+        self.assertEqual(0o600, os.stat(f"{self.path}/tcp.sock.token").st_mode & 0o777)
+
+    def test_socket_is_private_and_remote_hosts_are_refused(self):
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+        with self.assertRaises(ValueError):
+            create_server(XRPLDaemon(self.path), socket_path=self.socket_path, host="0.0.0.0", port=0)
@@ -0,0 +1,54 @@
+import io
+import tempfile
+from unittest import TestCase
+
+from orjson import orjson
+from typer.testing import CliRunner
+from xrpl.wallet import Wallet
+
+from filedgr_xrpl_cli.__main__ import app
+from filedgr_xrpl_cli.metrics import Metrics, metrics
+from filedgr_xrpl_cli.my_xrpl.tx import TransactionBuilder
+from filedgr_xrpl_cli.my_xrpl.wallet import XRPLWallet
+from tests.my_xrpl.fake_ledger import FakeLedgerClient, FakeConnection
+
+
+class TestMetrics(TestCase):
+
+    def test_aggregates_and_exports(self):
+        sink = io.StringIO()
+        timings = Metrics()
+        timings.set_sink(sink)
+        timings.observe("rpc", 0.5, method="submit", endpoint="https://s1")
+        timings.observe("rpc", 0.25, method="submit", endpoint="https://s1")
+        with self.assertRaises(RuntimeError):
+            with timings.time("sign"):
+                raise RuntimeError()
+
+        rpc = [entry for entry in timings.snapshot() if entry["phase"] == "rpc"][0]
+        self.assertEqual((2, 0.75, 0.5), (rpc["count"], rpc["total"], rpc["max"]))
+        self.assertEqual(["rpc", "rpc", "sign"], [orjson.loads(line)["phase"] for line in sink.getvalue().splitlines()])
+        self.assertIn('filedgr_xrpl_phase_seconds_count{phase="rpc",endpoint="https://s1",method="submit"} 2',
+                      timings.to_prometheus())
+
+    def test_transaction_phases_are_timed(self):
+        metrics.reset()
+        wallet = XRPLWallet(seed=Wallet.create().seed, sequence=0)
+        TransactionBuilder.issue_nft(conn=FakeConnection(FakeLedgerClient()), issuer=wallet, uri="ipfs://1")
+
+        phases = {entry["phase"] for entry in metrics.snapshot()}
+        self.assertTrue({"autofill", "sign", "submit"} <= phases)
+
+    def test_cli_writes_profile_outputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = CliRunner(mix_stderr=False).invoke(app, [
+                "--profile", "--cprofile", f"{directory}/cli.prof", "--metrics-prom", f"{directory}/metrics.prom",
+                "generate-id"
+            ])
+
+            self.assertEqual(0, result.exit_code, result.output)
+            self.assertIn("avg ms", result.stderr)
+            with open(f"{directory}/metrics.prom") as file:
+                self.assertIn("# TYPE filedgr_xrpl_phase_seconds summary", file.read())
+            with open(f"{directory}/cli.prof", "rb") as file:
+                self.assertTrue(file.read())
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import time
+from unittest import TestCase
+
+# typer and rich alone take ~150ms to import, the budget leaves room for a slow interpreter start on top of that
+STARTUP_BUDGET = float(os.environ.get("XRPL_CLI_STARTUP_BUDGET", "1.5"))
+
+HEAVY_MODULES = ("xrpl", "pydantic", "orjson", "httpx", "numpy", "filedgr_nft_protobuf")
+
+_PROBE = """
+import sys
+from filedgr_xrpl_cli.__main__ import app
+try:
+    app(sys.argv[1:], prog_name="xrpl")
+except SystemExit:
+    pass
+print(",".join(m for m in {modules!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def run_cli(*args: str):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", _PROBE.format(modules=HEAVY_MODULES), *args],
+                            capture_output=True, text=True)
+    return time.perf_counter() - started, result
+
+
+class TestStartup(TestCase):
+
+    def assert_light(self, *args: str):
+        elapsed, result = run_cli(*args)
+        loaded = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ""
+        self.assertEqual("", loaded, f"xrpl {' '.join(args)} imported {loaded}")
+        self.assertLess(elapsed, STARTUP_BUDGET)
+        return result
+
+    def test_generate_id_is_light(self):
+        result = self.assert_light("generate-id")
+        self.assertIn("The NFT ID:", result.stdout)
+
+    def test_help_is_light(self):
+        result = self.assert_light("--help")
+        for command in ("wallet", "payment", "nft", "generate-id"):
+            self.assertIn(command, result.stdout)
+
+    def test_sub_command_help_is_light(self):
+        result = self.assert_light("nft", "predict-ids", "--help")
+        self.assertIn("--count", result.stdout)
+
+    def test_transactions_and_metadata_load_the_protobuf_codec_only_when_needed(self):
+        for module in ("filedgr_xrpl_cli.my_xrpl.tx", "filedgr_xrpl_cli.nft_utils.metadata"):
+            result = subprocess.run([sys.executable, "-c", f"import sys; import {module}; "
+                                     "print('google.protobuf' in sys.modules)"], capture_output=True, text=True)
+            self.assertEqual("False", result.stdout.strip(), f"{module} {result.stderr}")